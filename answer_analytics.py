@@ -0,0 +1,276 @@
+"""답변 분석용 열 배열 스냅샷 (numpy 패키지 필요)
+
+Answer 테이블을 열 단위 NumPy 배열로 메모리에 올려 두고 정답률 분포, 단원별 백분위,
+학생 집단 비교 같은 임의 분석을 DB 조회 없이 벡터 연산으로 계산합니다.
+
+- 과목/학년/단원은 사전 인코딩(문자열 목록 + 작은 정수 코드), 답변의 category_id로 분류별 코드를 한 번만 찾음
+- user_id는 int32, 정답 여부는 bool, 시각은 int64(UTC 마이크로초)
+- 마지막으로 읽은 Answer.id(워터마크) 이후의 답변만 추가로 읽고,
+  삭제/분류 수정이 있었으면(stats_rollup.rewrite_version) 전체를 다시 읽음
+"""
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from models import Answer, Category
+import stats_rollup
+
+try:
+    import numpy as np
+except ImportError:  # numpy가 없으면 분석 API만 비활성화
+    np = None
+
+# 한 번에 DB에서 읽어 배열로 변환할 행 수
+ANALYTICS_BATCH_SIZE = int(os.environ.get('ANALYTICS_BATCH_SIZE', 50000))
+# 이 시간(초)마다 전체를 다시 읽음 (동시 저장으로 커밋 순서와 ID 순서가 다를 때 빠진 답변 보정)
+ANALYTICS_RELOAD_INTERVAL = int(os.environ.get('ANALYTICS_RELOAD_INTERVAL', 3600))
+
+DIMENSIONS = ('subject', 'grade', 'unit')
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def available():
+    return np is not None
+
+
+def _code_dtype(size):
+    """사전 크기에 맞는 가장 작은 코드 자료형"""
+    if size <= 0xFF:
+        return np.uint8
+    if size <= 0xFFFF:
+        return np.uint16
+    return np.uint32
+
+
+def to_micros(value):
+    """naive UTC datetime을 int64 마이크로초로 변환"""
+    return (value - EPOCH) // MICROSECOND
+
+
+class AnswerAnalytics:
+    """Answer 열 배열 스냅샷과 벡터화된 집계"""
+
+    def __init__(self, batch_size=ANALYTICS_BATCH_SIZE, reload_interval=ANALYTICS_RELOAD_INTERVAL):
+        if np is None:
+            raise RuntimeError("답변 분석에는 numpy 패키지가 필요합니다")
+        self.batch_size = batch_size
+        self.reload_interval = reload_interval
+        self.stats = {'refreshes': 0, 'full_loads': 0, 'rows_loaded': 0, 'last_refresh_ms': 0}
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.watermark = 0
+        self.rewrite_version = None
+        self.loaded_at = time.time()
+        self.user_id = np.empty(0, np.int32)
+        self.is_correct = np.empty(0, np.bool_)
+        self.timestamp = np.empty(0, np.int64)
+        self.values = {name: [] for name in DIMENSIONS}       # 코드 -> 문자열
+        self._codes = {name: {} for name in DIMENSIONS}       # 문자열 -> 코드
+        self._category_codes = {}                             # category_id -> 과목/학년/단원 코드
+        self.codes = {name: np.empty(0, np.uint8) for name in DIMENSIONS}
+
+    def __len__(self):
+        return len(self.user_id)
+
+    @property
+    def nbytes(self):
+        return (self.user_id.nbytes + self.is_correct.nbytes + self.timestamp.nbytes
+                + sum(codes.nbytes for codes in self.codes.values()))
+
+    def refresh(self, session):
+        """워터마크 이후 답변을 읽어 배열에 추가하고 추가한 행 수를 반환"""
+        with self._lock:
+            started = time.perf_counter()
+            rewrite = stats_rollup.rewrite_version(session)
+            if rewrite != self.rewrite_version or time.time() - self.loaded_at > self.reload_interval:
+                self._reset()
+                self.rewrite_version = rewrite
+                self.stats['full_loads'] += 1
+
+            statement = select(
+                Answer.id, Answer.user_id, Answer.category_id, Answer.is_correct, Answer.timestamp
+            ).where(Answer.id > self.watermark).order_by(Answer.id)
+            parts = [self._encode(session, rows) for rows in
+                     session.execute(statement.execution_options(yield_per=self.batch_size)).partitions()]
+            added = sum(len(part[0]) for part in parts)
+            if parts:
+                self._append(parts)
+
+            self.stats['refreshes'] += 1
+            self.stats['rows_loaded'] += added
+            self.stats['last_refresh_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            return added
+
+    def _encode(self, session, rows):
+        ids, user_ids, category_ids, correct, timestamps = zip(*rows)
+        self.watermark = max(self.watermark, ids[-1])
+        # 분류는 배치 안의 서로 다른 category_id만 코드로 바꾼 뒤 인덱스로 펼침 (Category로 옮기기 전 답변은 0)
+        categories, inverse = np.unique(np.fromiter((value or 0 for value in category_ids), np.int64, len(ids)),
+                                        return_inverse=True)
+        category_codes = self._category_lookup(session, categories.tolist())
+        return (
+            np.fromiter(user_ids, np.int32, len(ids)),
+            np.fromiter(correct, np.bool_, len(ids)),
+            np.fromiter((to_micros(value) for value in timestamps), np.int64, len(ids)),
+            {name: category_codes[:, index][inverse] for index, name in enumerate(DIMENSIONS)}
+        )
+
+    def _category_lookup(self, session, category_ids):
+        """category_id 목록 순서의 (과목, 학년, 단원) 코드 배열 (처음 보는 분류만 Category에서 읽음)"""
+        missing = [category_id for category_id in category_ids if category_id not in self._category_codes]
+        if missing:
+            labels = {row[0]: row[1:] for row in session.execute(
+                select(Category.id, Category.subject, Category.grade, Category.unit).where(Category.id.in_(missing))
+            )}
+            for category_id in missing:
+                values = labels.get(category_id, ('', '', ''))
+                self._category_codes[category_id] = tuple(self._code(name, value)
+                                                          for name, value in zip(DIMENSIONS, values))
+        return np.array([self._category_codes[category_id] for category_id in category_ids],
+                        np.uint32).reshape(-1, len(DIMENSIONS))
+
+    def _code(self, name, value):
+        value = value or ''
+        codes = self._codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.values[name])
+            self.values[name].append(value)
+        return code
+
+    def _append(self, parts):
+        self.user_id = np.concatenate([self.user_id] + [part[0] for part in parts])
+        self.is_correct = np.concatenate([self.is_correct] + [part[1] for part in parts])
+        self.timestamp = np.concatenate([self.timestamp] + [part[2] for part in parts])
+        for name in DIMENSIONS:
+            dtype = _code_dtype(len(self.values[name]))
+            self.codes[name] = np.concatenate(
+                [self.codes[name].astype(dtype)] + [part[3][name].astype(dtype) for part in parts]
+            )
+
+    # --- 필터와 집계 ---
+
+    def mask(self, student_id=None, subject=None, grade=None, unit=None, start=None, end=None, user_ids=None):
+        """필터 조건에 맞는 행의 bool 배열 (start/end는 datetime, end는 미포함)"""
+        selected = np.ones(len(self), np.bool_)
+        if student_id:
+            selected &= self.user_id == student_id
+        if user_ids is not None:
+            selected &= np.isin(self.user_id, np.asarray(list(user_ids), np.int32))
+        for name, value in (('subject', subject), ('grade', grade), ('unit', unit)):
+            if value:
+                code = self._codes[name].get(value)
+                if code is None:
+                    return np.zeros(len(self), np.bool_)
+                selected &= self.codes[name] == code
+        if start:
+            selected &= self.timestamp >= to_micros(start)
+        if end:
+            selected &= self.timestamp < to_micros(end)
+        return selected
+
+    def summary(self, selected=None):
+        """풀이 수, 정답 수, 정답률, 학생 수"""
+        selected = self._all(selected)
+        attempts = int(selected.sum())
+        correct = int((self.is_correct & selected).sum())
+        return {
+            'attempts': attempts,
+            'correct': correct,
+            'accuracy_rate': round(correct * 100.0 / attempts, 1) if attempts else 0,
+            'students': int(np.unique(self.user_id[selected]).size)
+        }
+
+    def group_by(self, dimensions=('subject',), selected=None):
+        """과목/학년/단원(과 user_id) 조합별 풀이 수와 정답률 (풀이 수 내림차순)"""
+        selected = self._all(selected)
+        keys, inverse, count = self._group_keys(dimensions, selected)
+        attempts = np.bincount(inverse, minlength=count)
+        correct = np.bincount(inverse, weights=self.is_correct[selected], minlength=count).astype(np.int64)
+        order = np.argsort(-attempts, kind='stable')
+        groups = []
+        for index in order:
+            group = {name: self._label(name, keys[name][index]) for name in dimensions}
+            group.update(attempts=int(attempts[index]), correct=int(correct[index]),
+                         accuracy_rate=round(correct[index] * 100.0 / attempts[index], 1))
+            groups.append(group)
+        return groups
+
+    def student_accuracy(self, selected=None, min_attempts=1):
+        """학생별 (user_id 배열, 풀이 수 배열, 정답률 배열)"""
+        selected = self._all(selected)
+        users, inverse = np.unique(self.user_id[selected], return_inverse=True)
+        attempts = np.bincount(inverse, minlength=len(users))
+        correct = np.bincount(inverse, weights=self.is_correct[selected], minlength=len(users))
+        keep = attempts >= max(1, min_attempts)
+        return users[keep], attempts[keep], correct[keep] * 100.0 / attempts[keep]
+
+    def accuracy_distribution(self, selected=None, bins=10, min_attempts=1):
+        """학생별 정답률 분포 (0~100%를 bins개 구간으로 나눈 학생 수)"""
+        _, _, accuracy = self.student_accuracy(selected, min_attempts)
+        counts, edges = np.histogram(accuracy, bins=bins, range=(0, 100))
+        return [{'from': float(edges[i]), 'to': float(edges[i + 1]), 'students': int(counts[i])}
+                for i in range(len(counts))]
+
+    def unit_percentiles(self, selected=None, percentiles=(25, 50, 75), min_attempts=1):
+        """단원별 학생 정답률 백분위"""
+        selected = self._all(selected)
+        keys, inverse, count = self._group_keys(('subject', 'grade', 'unit', 'user_id'), selected)
+        attempts = np.bincount(inverse, minlength=count)
+        correct = np.bincount(inverse, weights=self.is_correct[selected], minlength=count)
+        keep = attempts >= max(1, min_attempts)
+        accuracy = correct[keep] * 100.0 / attempts[keep]
+        subjects, grades, units = (keys[name][keep] for name in DIMENSIONS)
+        # 고유 키는 (단원, 학생) 순으로 정렬되어 있으므로 같은 단원의 학생은 연속된 구간
+        changed = (np.diff(subjects) != 0) | (np.diff(grades) != 0) | (np.diff(units) != 0)
+        boundaries = np.concatenate(([0], np.flatnonzero(changed) + 1, [accuracy.size]))
+        results = []
+        for begin, end in zip(boundaries[:-1], boundaries[1:]):
+            if begin == end:
+                continue
+            values = accuracy[begin:end]
+            result = {'subject': self.values['subject'][subjects[begin]],
+                      'grade': self.values['grade'][grades[begin]],
+                      'unit': self.values['unit'][units[begin]], 'students': int(values.size)}
+            result.update({f"p{p}": round(float(v), 1) for p, v in zip(percentiles, np.percentile(values, percentiles))})
+            results.append(result)
+        return results
+
+    def compare_cohorts(self, cohorts, selected=None):
+        """학생 집단({이름: user_id 목록})별 요약 통계"""
+        selected = self._all(selected)
+        return {name: self.summary(selected & np.isin(self.user_id, np.asarray(list(user_ids), np.int32)))
+                for name, user_ids in cohorts.items()}
+
+    def snapshot(self):
+        return dict(self.stats, rows=len(self), bytes=int(self.nbytes), watermark=self.watermark,
+                    dictionary_sizes={name: len(values) for name, values in self.values.items()})
+
+    def _all(self, selected):
+        return np.ones(len(self), np.bool_) if selected is None else selected
+
+    def _group_keys(self, dimensions, selected):
+        """선택한 행의 차원 조합별 고유 키, 각 행의 그룹 번호, 그룹 수"""
+        columns = [self.user_id[selected].astype(np.int64) if name == 'user_id'
+                   else self.codes[name][selected].astype(np.int64) for name in dimensions]
+        # 차원 코드를 하나의 정수 키로 합쳐서 np.unique 한 번으로 그룹화
+        combined = np.zeros(int(selected.sum()), np.int64)
+        sizes = []
+        for column in columns:
+            size = int(column.max()) + 1 if column.size else 1
+            sizes.append(size)
+            combined = combined * size + column
+        unique, inverse = np.unique(combined, return_inverse=True)
+        keys = {}
+        remainder = unique
+        for name, size in reversed(list(zip(dimensions, sizes))):
+            keys[name] = remainder % size
+            remainder = remainder // size
+        return keys, inverse.reshape(-1), len(unique)
+
+    def _label(self, name, code):
+        return int(code) if name == 'user_id' else self.values[name][int(code)]
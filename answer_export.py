@@ -0,0 +1,97 @@
+"""답변 원본 내보내기 (CSV / NDJSON 스트리밍)
+
+서버 측 커서(yield_per)로 조금씩 읽어 바로 전송하므로 답변 수와 관계없이 메모리 사용량이 일정합니다.
+"""
+import io
+import csv
+import json
+import zlib
+from datetime import datetime, timedelta
+from sqlalchemy import select, func
+from models import User, Answer, Category, Question
+from question_store import question_text
+from category_store import answer_criteria
+from stats_rollup import day_start_utc
+
+# 한 번에 DB에서 읽고 전송할 행 수
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = ('id', 'user_id', 'username', 'subject', 'grade', 'unit', 'main_unit', 'sub_unit',
+                  'question', 'user_answer', 'is_correct', 'timestamp')
+
+
+def parse_date_range(start, end):
+    """YYYY-MM-DD 형식의 시작일/종료일(종료일 포함)을 datetime 범위로 변환 (형식이 틀리면 ValueError)
+
+    날짜는 통계 버킷과 같은 STATS_TIMEZONE 기준이며, 답변 시각과 비교하도록 UTC로 바꿔 반환합니다.
+    """
+    start_at = day_start_utc(datetime.strptime(start, '%Y-%m-%d').date()) if start else None
+    end_before = day_start_utc(datetime.strptime(end, '%Y-%m-%d').date() + timedelta(days=1)) if end else None
+    return start_at, end_before
+
+
+def answer_filters(student_id=None, subject=None, grade=None, start_at=None, end_before=None):
+    """download_statistics와 같은 학생/과목/학년 필터에 기간 조건을 더한 조건 목록"""
+    criteria = []
+    if student_id:
+        criteria.append(Answer.user_id == student_id)
+    criteria.extend(answer_criteria(subject, grade))
+    if start_at:
+        criteria.append(Answer.timestamp >= start_at)
+    if end_before:
+        criteria.append(Answer.timestamp < end_before)
+    return criteria
+
+
+def iter_answer_batches(session, criteria, batch_size=EXPORT_BATCH_SIZE):
+    """조건에 맞는 답변을 batch_size개씩 튜플 목록으로 반환"""
+    statement = select(
+        Answer.id, Answer.user_id, User.username,
+        # Category로 옮기기 전 답변은 답변에 저장된 분류
+        func.coalesce(Category.subject, Answer.subject), func.coalesce(Category.grade, Answer.grade),
+        func.coalesce(Category.unit, Answer.unit),
+        Answer.main_unit, Answer.sub_unit, question_text(), Answer.user_answer, Answer.is_correct,
+        Answer.timestamp
+    ).join(User, User.id == Answer.user_id).outerjoin(Category, Category.id == Answer.category_id).outerjoin(
+        Question, Question.id == Answer.question_id).where(*criteria).order_by(Answer.id)
+    result = session.execute(statement.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield partition
+
+
+def csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in batches:
+        for row in rows:
+            writer.writerow(_values(row))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(batches):
+    for rows in batches:
+        yield ''.join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, _values(row))), ensure_ascii=False) + '\n' for row in rows
+        )
+
+
+def gzip_chunks(chunks):
+    """텍스트 조각을 gzip 형식으로 압축하면서 전송"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _values(row):
+    values = list(row)
+    timestamp = values[-1]
+    values[-1] = timestamp.isoformat() if timestamp else None
+    return values
@@ -0,0 +1,173 @@
+import os
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError, InterfaceError
+from models import db, Answer
+import stats_rollup
+import item_analysis
+import question_store
+import category_store
+
+logger = logging.getLogger(__name__)
+
+# 이 개수만큼 쌓이거나 마지막 저장 후 이 시간(초)이 지나면 한 번에 저장
+ANSWER_FLUSH_SIZE = int(os.environ.get('ANSWER_FLUSH_SIZE', 50))
+ANSWER_FLUSH_INTERVAL = float(os.environ.get('ANSWER_FLUSH_INTERVAL', 2))
+# 저장하지 못하고 쌓아 둘 최대 답변 수 (DB 장애가 길어질 때 메모리 보호)
+ANSWER_QUEUE_MAX = int(os.environ.get('ANSWER_QUEUE_MAX', 10000))
+
+# Answer.user_answer 컬럼 길이
+USER_ANSWER_MAX_LENGTH = 10
+
+
+class AnswerRecorder:
+    """채점 결과를 메모리에 모았다가 백그라운드에서 일괄 저장 (채점 응답이 DB 쓰기를 기다리지 않도록)"""
+
+    def __init__(self, app, flush_size=ANSWER_FLUSH_SIZE, flush_interval=ANSWER_FLUSH_INTERVAL,
+                 max_queue=ANSWER_QUEUE_MAX):
+        self.app = app
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.stats = {'recorded': 0, 'flushed': 0, 'batches': 0, 'failed_batches': 0, 'dropped': 0, 'rejected': 0,
+                      'last_flush_ms': 0, 'max_flush_ms': 0, 'total_flush_ms': 0}
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()   # 백그라운드 저장과 종료 시 저장이 겹치지 않도록
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name='answer-recorder', daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def record(self, user_id, quiz, user_answer, is_correct, category=None):
+        """채점한 답변 한 건을 저장 대기열에 추가"""
+        category = category or {}
+        row = {
+            'user_id': user_id,
+            'subject': category.get('subject'),
+            'grade': category.get('grade'),
+            'unit': category.get('unit'),
+            'question': quiz.get('question', ''),
+            'user_answer': (user_answer or '').strip()[:USER_ANSWER_MAX_LENGTH],
+            'is_correct': bool(is_correct),
+            'timestamp': datetime.utcnow()
+        }
+        with self._condition:
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.stats['dropped'] += 1
+            self._queue.append(row)
+            self.stats['recorded'] += 1
+            if len(self._queue) >= self.flush_size:
+                self._condition.notify()
+
+    def flush(self):
+        """대기 중인 답변을 한 번의 트랜잭션으로 저장하고 저장한 개수를 반환
+
+        일괄 저장이 실패하면 DB 연결 장애일 때만 전체를 대기열에 되돌리고, 그 밖의 오류는 답변을 한 건씩
+        다시 저장해 혼자서도 실패하는 답변만 로그에 남기고 제외합니다 (한 건 때문에 이후 저장이 막히지 않도록).
+        """
+        with self._flush_lock:
+            with self._condition:
+                rows = list(self._queue)
+                self._queue.clear()
+            if not rows:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                self._save(rows)
+                saved = len(rows)
+            except (OperationalError, InterfaceError) as e:
+                logger.error(f"답변 일괄 저장 실패 ({len(rows)}건): {str(e)}")
+                self.stats['failed_batches'] += 1
+                self._requeue(rows)
+                return 0
+            except Exception as e:
+                logger.error(f"답변 일괄 저장 실패, 한 건씩 다시 저장 ({len(rows)}건): {str(e)}")
+                self.stats['failed_batches'] += 1
+                saved = self._save_each(rows)
+            if not saved:
+                return 0
+
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stats['flushed'] += saved
+            self.stats['batches'] += 1
+            self.stats['last_flush_ms'] = round(elapsed, 2)
+            self.stats['max_flush_ms'] = round(max(self.stats['max_flush_ms'], elapsed), 2)
+            self.stats['total_flush_ms'] += elapsed
+            return saved
+
+    def _save(self, rows):
+        with self.app.app_context():
+            # 답변과 집계 테이블을 같은 트랜잭션에서 저장
+            answers = category_store.attach(db.session, rows)
+            db.session.execute(insert(Answer), question_store.attach(db.session, answers))
+            item_analysis.add_answers(db.session, answers)
+            stats_rollup.add_answers(db.session, answers)
+            db.session.commit()
+
+    def _save_each(self, rows):
+        """답변을 한 건씩 저장하고 저장한 개수를 반환 (DB 연결 장애가 나면 남은 답변은 대기열에 되돌림)"""
+        saved = 0
+        for index, row in enumerate(rows):
+            try:
+                self._save([row])
+            except (OperationalError, InterfaceError) as e:
+                logger.error(f"답변 저장 실패 ({len(rows) - index}건 다시 시도 예정): {str(e)}")
+                self._requeue(rows[index:])
+                break
+            except Exception as e:
+                logger.error(f"저장할 수 없는 답변 제외 (user_id={row['user_id']}, 문제={row['question'][:50]!r}): {str(e)}")
+                self.stats['rejected'] += 1
+            else:
+                saved += 1
+        return saved
+
+    def _requeue(self, rows):
+        # 실패한 답변을 앞에 되돌려 다음 저장 때 다시 시도 (한도를 넘는 오래된 답변은 버림)
+        with self._condition:
+            self._queue.extendleft(reversed(rows))
+            while len(self._queue) > self.max_queue:
+                self._queue.popleft()
+                self.stats['dropped'] += 1
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._closed and len(self._queue) < self.flush_size:
+                    self._condition.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"답변 저장 스레드 오류: {str(e)}")
+
+    def close(self):
+        """워커 종료 시 남은 답변을 모두 저장"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._worker.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+    @property
+    def queue_depth(self):
+        return len(self._queue)
+
+    def snapshot(self):
+        batches = self.stats['batches']
+        return dict(self.stats,
+                    total_flush_ms=round(self.stats['total_flush_ms'], 2),
+                    avg_flush_ms=round(self.stats['total_flush_ms'] / batches, 2) if batches else 0,
+                    queue_depth=self.queue_depth,
+                    flush_size=self.flush_size,
+                    flush_interval=self.flush_interval)
@@ -1,18 +1,42 @@
-from flask import Flask, request, jsonify, render_template, session, redirect, url_for, flash, make_response
+from flask import Flask, request, jsonify, render_template, stream_template, session, redirect, url_for, flash, make_response, Response, stream_with_context, send_file
 from openai import OpenAI
 import json
 import random
-from datetime import datetime
-from models import db, User, Answer
+from datetime import datetime, timedelta
+from models import db, User, Answer, AnswerRollup, AnswerBucket, StatsVersion, ItemStat
+import stats_rollup
+from stats_engine import StatsResult, iter_student_stats, student_summary, accuracy_trend, TREND_DEFAULT_WEEKS
+from stats_cache import StatsCache, STATS_CACHE_TTL
+from assistant_runner import AssistantRunner, RunFailedError
+from question_bank import QuestionBankFiller
+from grading import GradingEngine
+from quiz_cache import QuizCache, make_cache_key
+from quiz_stream import QuestionStreamParser, FieldStreamParser, sse_event
+from quiz_planner import FanOutPlanner
+from quiz_prefetch import QuizPrefetcher
+from session_store import create_session_store
+from answer_recorder import AnswerRecorder
+from report_jobs import ReportJobs, REPORT_TYPES
+import answer_analytics
+import item_analysis
+import question_store
+import category_store
+import schema_migrations
+import answer_export
+import unit_normalizer
+from student_pages import student_page, student_options, student_count, StudentRow, SORT_KEYS, STUDENT_PAGE_SIZE
 from sqlalchemy import func, case, distinct
 from sqlalchemy.sql import expression
-import time
 from dotenv import load_dotenv
 import os
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_login import UserMixin
 import re
+import queue
+import time
+import threading
 import traceback
+import click
 import logging
 
 # 로깅 설정
@@ -60,10 +84,27 @@ login_manager.login_message = "이 페이지에 접근하려면 로그인이 필
 # 데이터베이스 초기화
 db.init_app(app)
 
+def pending_data_commands(session):
+    """기존 답변 이전/집계가 필요하면 실행할 CLI 명령 목록 (실행 순서대로)"""
+    if session.query(Answer.id).first() is None:
+        return []
+    commands = []
+    if session.query(Answer.id).filter(Answer.category_id.is_(None)).first() is not None:
+        commands.append('migrate-categories')
+    elif session.query(AnswerRollup.id).first() is None or session.query(AnswerBucket.id).first() is None:
+        commands.append('rebuild-rollups')
+    if session.query(Answer.id).filter(Answer.question_id.is_(None)).first() is not None:
+        commands.append('migrate-questions')
+    if session.query(ItemStat.question_hash).first() is None:
+        commands.append('rebuild-item-stats')
+    return commands
+
 # 앱 컨텍스트 내에서 데이터베이스 생성
 with app.app_context():
     # 테이블 생성 (테이블이 없는 경우에만 생성됨)
     db.create_all()
+    # 기존 테이블 변경 (적용하지 않은 마이그레이션만 실행)
+    schema_migrations.upgrade(db.engine)
     
     # 관리자 계정이 없는 경우 생성
     if not User.query.filter_by(username='admin').first():
@@ -74,6 +115,21 @@ with app.app_context():
         db.session.commit()
         print("관리자 계정이 생성되었습니다.")
     
+    # 여러 워커가 동시에 시작해도 안전한 초기화만 실행 (기존 답변 이전/집계는 CLI 명령으로 한 번만 실행)
+    try:
+        if db.session.get(StatsVersion, stats_rollup.VERSION_ID) is None:
+            # 새 DB에서 이전 DB의 캐시 버전을 재사용하지 않도록 현재 시각에서 시작
+            db.session.add(StatsVersion(id=stats_rollup.VERSION_ID, version=int(time.time())))
+            db.session.commit()
+        # categories.json의 분류를 Category에 추가 (이미 있는 분류는 그대로)
+        category_store.seed(db.session)
+        db.session.commit()
+        for command in pending_data_commands(db.session):
+            print(f"이전 버전의 답변이 있습니다. 다음 명령을 실행하세요: flask --app app {command}")
+    except Exception as e:
+        db.session.rollback()
+        print(f"데이터베이스 초기화 오류: {str(e)}")
+    
     print("데이터베이스가 연결되었습니다.")
 
 # API 키 확인
@@ -90,17 +146,29 @@ client = OpenAI(
     base_url="https://api.openai.com/v1"  # 기본 OpenAI API 엔드포인트 사용
 )
 
-# 전역 변수로 current_quiz_store 저장
-current_quiz_store = {}
-
 # 쓰레드 ID별 활성 요청 상태 추적
-active_requests = {}
-
 # 임시 파일 저장 디렉토리 확인 및 생성
 temp_dir = os.path.join(os.path.dirname(__file__), 'temp')
 if not os.path.exists(temp_dir):
     os.makedirs(temp_dir)
 
+# 쓰레드별 퀴즈 진행 정보 (기본값: 워커끼리 공유하는 SQLite 저장소, QUIZ_SESSION_STORE로 변경)
+current_quiz_store = create_session_store(default_path=os.path.join(temp_dir, 'quiz_sessions.db'))
+
+# 관리자 통계 결과 캐시 (워커끼리 공유, 답변이 바뀌면 데이터 버전으로 무효화)
+stats_cache = StatsCache(create_session_store(
+    os.environ.get('STATS_CACHE_STORE') or 'sqlite',
+    default_path=os.path.join(temp_dir, 'stats_cache.db'),
+    ttl=STATS_CACHE_TTL
+))
+
+# 관리자 임의 분석용 답변 열 배열 스냅샷 (numpy가 없으면 비활성화)
+analytics = answer_analytics.AnswerAnalytics() if answer_analytics.available() else None
+
+# 통계 보고서 백그라운드 생성 결과 (같은 데이터 버전의 보고서는 재사용)
+report_jobs = ReportJobs(os.environ.get('REPORT_ARTIFACT_DIR') or os.path.join(temp_dir, 'reports'),
+                         lambda report_type, params, out: render_report(report_type, params, out))
+
 # 타임아웃 클래스 추가
 class TimeoutError(Exception):
     """요청 시간이 초과되었을 때 발생하는 예외"""
@@ -115,17 +183,248 @@ class ScienceQuizBot:
         if not self.assistant_id:
             raise ValueError("ASSISTANT_ID 환경변수가 설정되지 않았습니다.")
         
+        # 실행 완료 대기와 응답 조회를 담당하는 공통 실행기
+        self.runner = AssistantRunner(client, self.assistant_id)
+        
+        # 문제 유형별 정책에 따라 로컬에서 답변을 채점
+        self.grader = GradingEngine()
+        
+        # 5/10문제 요청은 여러 실행으로 나누어 동시에 생성
+        self.planner = FanOutPlanner(self.generate_batch)
+        
         # 다른 초기화 코드는 유지...
 
-    def get_quiz(self, thread_id, question_count=1, main_unit=None, sub_unit=None, question_types=None):
-        logger.info(f"문제 출제 요청: thread_id={thread_id}, 문제 수={question_count}, 과목={main_unit}, 학년={sub_unit}, 문제 유형={question_types}")
+    def _build_quiz_prompt(self, subject, grade, question_types, question_count, unit=None):
+        """문제 출제 프롬프트 구성"""
+        prompt_parts = []
+        if subject:
+            prompt_parts.append(f"과목: {subject}")
+        if grade:
+            prompt_parts.append(f"학년: {grade}")
+        if unit:
+            prompt_parts.append(f"단원: {unit}")
+        
+        # 문제 유형 텍스트 구성
+        type_text = "문제 유형: "
+        if len(question_types) == 1:
+            type_text += question_types[0]
+        else:
+            type_text += ", ".join(question_types[:-1]) + " 및 " + question_types[-1]
+        prompt_parts.append(type_text)
+        
+        # 문제 수 지정
+        prompt_parts.append(f"{question_count}개의 문제를 출제해주세요.")
+        return "\n".join(prompt_parts)
+
+    def _parse_quiz_response(self, response_message):
+        """응답에서 퀴즈 JSON을 추출 (JSON이 없으면 None 반환)"""
+        json_start = response_message.find('{')
+        json_end = response_message.rfind('}') + 1
+        
+        if json_start == -1 or json_end == 0:
+            return None
+        return json.loads(response_message[json_start:json_end])
+
+    def _store_quiz(self, thread_id, quiz_data, expected_total=None, streaming=False, category=None):
+        """퀴즈 정보를 쓰레드별 저장소에 저장 (category는 답변 기록용 과목/학년/단원)"""
+        entry = None
+        if 'questions' in quiz_data and quiz_data['questions']:
+            # 여러 문제가 있는 경우
+            entry = {
+                'questions': list(quiz_data['questions']),
+                'current_index': 0,
+                'quiz': quiz_data['questions'][0],
+                'progress': {
+                    'current': 1,
+                    'total': max(len(quiz_data['questions']), expected_total or 0)
+                }
+            }
+            if streaming:
+                entry['streaming'] = True
+        elif 'quiz' in quiz_data:
+            # 단일 문제인 경우
+            entry = {
+                'quiz': quiz_data['quiz'],
+                'progress': {
+                    'current': 1,
+                    'total': 1
+                }
+            }
+        else:
+            print("퀴즈 데이터에 'questions' 또는 'quiz' 필드가 없습니다.")
+            return
+        if category:
+            entry['category'] = category
+        current_quiz_store[thread_id] = entry
+
+    def store_streamed_question(self, thread_id, question, position, expected_total, category=None):
+        """스트리밍 중 완성된 문제를 바로 저장 (첫 문제가 나오면 전체 생성 전에도 답변 채점 가능)"""
+        if position == 0:
+            self._store_quiz(thread_id, {'questions': [question]}, expected_total, streaming=True, category=category)
+            return
+        self._append_questions(thread_id, [question])
+
+    def _append_questions(self, thread_id, questions):
+        """출제 중인 문제 목록 뒤에 새로 생성된 문제를 추가 (다른 워커의 채점과 겹쳐도 안전하도록 update 사용)"""
+        def append(entry):
+            if 'questions' in entry:
+                entry['questions'].extend(questions)
+                entry['progress']['total'] = max(entry['progress'].get('total', 0), len(entry['questions']))
+        current_quiz_store.update(thread_id, append)
+
+    def _finish_streamed_quiz(self, thread_id, quiz_data):
+        """스트리밍으로 저장한 퀴즈가 있으면 진행 위치는 유지하고 최종 문제 목록만 반영"""
+        questions = quiz_data.get('questions')
+        if not questions:
+            return False
+
+        finished = []
+
+        def finish(entry):
+            if not entry.pop('streaming', False) or 'questions' not in entry:
+                return
+            entry['questions'] = list(questions)
+            entry['progress']['total'] = len(questions)
+            finished.append(True)
+        current_quiz_store.update(thread_id, finish)
+        return bool(finished)
+
+    def _serve_questions(self, thread_id, questions, quiz_request):
+        """미리 준비된 문제 목록으로 퀴즈 응답 구성"""
+        quiz_data = {
+            'type': 'QUIZ',
+            'questions': questions,
+            'thread_id': thread_id
+        }
+        self._store_quiz(thread_id, quiz_data, category=quiz_category(quiz_request))
+        return quiz_data
+
+    def generate_questions(self, subject, grade, question_type, question_count, unit=None):
+        """새 스레드에서 문제를 생성해 문제 목록만 반환 (문제 은행 보충용)"""
+        return self.generate_batch(subject, grade, [question_type], question_count, unit)
+
+    def generate_batch(self, subject, grade, question_types, question_count, unit=None):
+        """새 스레드에서 문제를 생성해 문제 목록만 반환 (문제 은행 보충, 분할 출제용)"""
+        thread = client.beta.threads.create()
+        prompt = self._build_quiz_prompt(subject, grade, question_types, question_count, unit)
+        response_message = self.runner.run(thread.id, prompt)
+        return self._questions_from_response(response_message)
+
+    def _questions_from_response(self, response_message):
+        quiz_data = self._parse_quiz_response(response_message)
+        if not quiz_data:
+            raise ValueError("퀴즈 JSON을 찾을 수 없습니다")
+        if quiz_data.get('questions'):
+            return quiz_data['questions']
+        if quiz_data.get('quiz'):
+            return [quiz_data['quiz']]
+        raise ValueError("퀴즈 데이터에 문제가 없습니다")
+
+    def _prepare_quiz_request(self, subject, grade, question_types, question_count, unit=None, viewer=None):
+        """출제 조건 정리 (동기/비동기 출제 경로 공통, viewer는 캐시 중복 출제 확인용 사용자/스레드)"""
+        # 기본값 설정
+        if question_types is None or len(question_types) == 0:
+            question_types = ['객관식']
+        return {
+            'subject': subject,
+            'grade': grade,
+            'unit': unit,
+            'question_types': question_types,
+            'question_count': question_count,
+            'viewer': viewer,
+            'cache_key': make_cache_key(subject, grade, question_types, question_count, unit),
+            'prompt': self._build_quiz_prompt(subject, grade, question_types, question_count, unit)
+        }
+
+    def _serve_from_prefetch(self, thread_id, quiz_request, wait=True):
+        """이전 세트를 푸는 동안 같은 조건으로 미리 생성해 둔 문제가 있으면 바로 출제"""
+        prefetched_questions = quiz_prefetcher.take(quiz_request['viewer'], quiz_request['cache_key'], wait)
+        if not prefetched_questions:
+            return None
+        print(f"미리 생성한 {len(prefetched_questions)}개 문제 출제")
+        return self._serve_questions(thread_id, prefetched_questions, quiz_request)
+
+    def _prefetch_if_due(self, thread_id, current_quiz):
+        """채점한 문제의 진행률이 기준을 넘으면 다음 세트를 미리 생성"""
+        progress = current_quiz.get('progress') or {}
+        quiz_prefetcher.on_progress(thread_id, progress.get('current', 1), progress.get('total', 1))
+
+    def _serve_from_cache(self, thread_id, quiz_request):
+        """같은 조건으로 최근 생성된 퀴즈가 있으면 보기 순서만 섞어서 출제"""
+        cached_questions = quiz_cache.get(quiz_request['cache_key'], quiz_request['viewer'])
+        if not cached_questions:
+            return None
+        print(f"퀴즈 캐시에서 {len(cached_questions)}개 문제 출제")
+        return self._serve_questions(thread_id, cached_questions, quiz_request)
+
+    def _serve_from_bank(self, thread_id, quiz_request, banked_questions):
+        """문제 은행에서 꺼낸 문제로 출제"""
+        if not banked_questions:
+            return None
+        print(f"문제 은행에서 {len(banked_questions)}개 문제 출제")
+        return self._serve_questions(thread_id, banked_questions, quiz_request)
+
+    def _fan_out_quiz(self, thread_id, quiz_request):
+        """여러 실행으로 나누어 생성하고 첫 배치가 완성되면 바로 출제 (나머지는 도착하는 대로 뒤에 추가)"""
+        callbacks = self._fan_out_callbacks(thread_id, quiz_request)
+        questions = self.planner.generate_first(
+            quiz_request['subject'], quiz_request['grade'], quiz_request['question_types'],
+            quiz_request['question_count'], quiz_request['unit'], **callbacks
+        )
+        print(f"분할 생성 첫 배치 {len(questions)}개 문제 출제")
+        return {'type': 'QUIZ', 'questions': questions, 'thread_id': thread_id}
+
+    def _fan_out_callbacks(self, thread_id, quiz_request):
+        """분할 생성 결과를 세션 저장소와 캐시에 반영하는 콜백"""
+        def on_first(questions, total):
+            self._store_quiz(thread_id, {'questions': questions}, total, category=quiz_category(quiz_request))
+
+        def on_more(questions):
+            self._append_questions(thread_id, questions)
+
+        def on_total(total):
+            # 실패한 배치만큼 전체 문제 수를 줄여 오지 않을 문제를 기다리지 않게 함
+            def lower(entry):
+                if 'questions' in entry:
+                    entry['progress']['total'] = max(total, len(entry['questions']))
+            current_quiz_store.update(thread_id, lower)
+
+        def on_complete(questions):
+            quiz_cache.put(quiz_request['cache_key'], list(questions), quiz_request['viewer'])
+
+        return {'on_first': on_first, 'on_more': on_more, 'on_total': on_total, 'on_complete': on_complete}
+
+    def _quiz_from_response(self, thread_id, quiz_request, response_message):
+        """Assistant 응답을 파싱해 퀴즈 정보를 저장하고 캐시에 등록"""
+        try:
+            quiz_data = self._parse_quiz_response(response_message)
+        except json.JSONDecodeError as e:
+            print(f"JSON 파싱 오류: {str(e)}")
+            print(f"응답: {response_message}")
+            return {"type": "ERROR", "message": "퀴즈 데이터 형식이 유효하지 않습니다."}
+        
+        if quiz_data is None:
+            print(f"JSON 형식을 찾을 수 없습니다. 응답: {response_message}")
+            # JSON이 아닌 일반 텍스트 응답
+            return {
+                "type": "CHAT",
+                "message": response_message,
+                "thread_id": thread_id
+            }
+        
+        print("JSON 파싱 성공")
+        
+        # 스레드 ID 추가 후 퀴즈 정보 저장
+        quiz_data['thread_id'] = thread_id
+        if not self._finish_streamed_quiz(thread_id, quiz_data):
+            self._store_quiz(thread_id, quiz_data, category=quiz_category(quiz_request))
+        quiz_cache.put(quiz_request['cache_key'], quiz_data.get('questions'), quiz_request['viewer'])
+        return quiz_data
+
+    def get_quiz(self, thread_id, question_count=1, main_unit=None, sub_unit=None, question_types=None, unit=None, user_id=None,
+                 on_text_delta=None):
+        logger.info(f"문제 출제 요청: thread_id={thread_id}, 문제 수={question_count}, 과목={main_unit}, 학년={sub_unit}, 단원={unit}, 문제 유형={question_types}")
         try:
-            # 기본값 설정
-            if question_types is None or len(question_types) == 0:
-                question_types = ['객관식']
-            
-            print("=== 전송하는 프롬프트 ===")
-            
             # 스레드 ID가 없는 경우 새로 생성
             if not thread_id:
                 print("get_quiz에서 새 스레드 ID 생성")
@@ -133,125 +432,45 @@ class ScienceQuizBot:
                 thread_id = thread.id
                 print(f"생성된 Thread ID: {thread_id}")
             
-            # 단위 파라미터 준비
-            subject = main_unit
-            grade = sub_unit
+            quiz_request = self._prepare_quiz_request(
+                main_unit, sub_unit, question_types, question_count, unit, user_id or thread_id
+            )
+            quiz_prefetcher.register(thread_id, quiz_request)
             
-            # 프롬프트 준비
-            prompt_parts = []
-            if subject:
-                prompt_parts.append(f"과목: {subject}")
-            if grade:
-                prompt_parts.append(f"학년: {grade}")
+            quiz_data = self._serve_from_prefetch(thread_id, quiz_request)
+            if quiz_data:
+                return quiz_data
             
-            # 문제 유형 텍스트 구성
-            type_text = "문제 유형: "
-            if len(question_types) == 1:
-                type_text += question_types[0]
-            else:
-                type_text += ", ".join(question_types[:-1]) + " 및 " + question_types[-1]
-            prompt_parts.append(type_text)
+            quiz_data = self._serve_from_cache(thread_id, quiz_request)
+            if quiz_data:
+                return quiz_data
             
-            # 문제 수 지정
-            prompt_parts.append(f"{question_count}개의 문제를 출제해주세요.")
-            prompt = "\n".join(prompt_parts)
+            # 문제 은행에 미리 생성된 문제가 있으면 바로 출제
+            banked_questions = question_bank.take(
+                quiz_request['subject'], quiz_request['grade'],
+                quiz_request['question_types'], question_count, quiz_request['unit']
+            )
+            quiz_data = self._serve_from_bank(thread_id, quiz_request, banked_questions)
+            if quiz_data:
+                return quiz_data
             
-            print(prompt)
-            print("========================")
+            if self.planner.should_split(question_count):
+                try:
+                    return self._fan_out_quiz(thread_id, quiz_request)
+                except Exception as e:
+                    print(f"분할 생성 실패, 한 번에 생성: {str(e)}")
             
-            # 사용자 메시지 추가
-            try:
-                client.beta.threads.messages.create(
-                    thread_id=thread_id,
-                    role="user",
-                    content=prompt
-                )
-            except Exception as e:
-                print(f"메시지 생성 에러: {str(e)}")
-                return {"type": "ERROR", "message": f"메시지 생성 에러: {str(e)}"}
+            print("=== 전송하는 프롬프트 ===")
+            print(quiz_request['prompt'])
+            print("========================")
             
-            # 응답 생성 요청 
+            # 응답 생성 요청 (메시지 추가와 실행을 한 번에 처리)
             try:
-                run = client.beta.threads.runs.create(
-                    thread_id=thread_id,
-                    assistant_id=self.assistant_id
-                )
-                
-                # 완료 대기
-                while True:
-                    run_status = client.beta.threads.runs.retrieve(
-                        thread_id=thread_id,
-                        run_id=run.id
-                    )
-                    if run_status.status == 'completed':
-                        break
-                    elif run_status.status in ['failed', 'cancelled', 'expired']:
-                        return {"type": "ERROR", "message": f"응답 생성 실패: {run_status.status}"}
-                    time.sleep(1)
-                
-                # 응답 메시지 가져오기
-                messages = client.beta.threads.messages.list(
-                    thread_id=thread_id
-                )
-                
-                # 첫 번째 메시지(최신) 가져오기
-                response_message = messages.data[0].content[0].text.value
-                
-                # JSON 응답 파싱
-                try:
-                    json_start = response_message.find('{')
-                    json_end = response_message.rfind('}') + 1
-                    
-                    if json_start != -1 and json_end != -1:
-                        json_text = response_message[json_start:json_end]
-                        try:
-                            quiz_data = json.loads(json_text)
-                            print("JSON 파싱 성공")
-                            
-                            # 스레드 ID 추가
-                            quiz_data['thread_id'] = thread_id
-                            
-                            # JSON 파싱 성공 후 퀴즈 정보 저장
-                            if 'questions' in quiz_data and quiz_data['questions']:
-                                # 여러 문제가 있는 경우
-                                current_quiz_store[thread_id] = {
-                                    'questions': quiz_data['questions'],
-                                    'current_index': 0,
-                                    'quiz': quiz_data['questions'][0],
-                                    'progress': {
-                                        'current': 1,
-                                        'total': len(quiz_data['questions'])
-                                    }
-                                }
-                            elif 'quiz' in quiz_data:
-                                # 단일 문제인 경우
-                                current_quiz_store[thread_id] = {
-                                    'quiz': quiz_data['quiz'],
-                                    'progress': {
-                                        'current': 1,
-                                        'total': 1
-                                    }
-                                }
-                            else:
-                                print("퀴즈 데이터에 'questions' 또는 'quiz' 필드가 없습니다.")
-                            
-                            return quiz_data
-                        except json.JSONDecodeError as e:
-                            print(f"JSON 파싱 오류: {str(e)}")
-                            print(f"JSON 텍스트: {json_text}")
-                            return {"type": "ERROR", "message": "퀴즈 데이터 형식이 유효하지 않습니다."}
-                    else:
-                        print(f"JSON 형식을 찾을 수 없습니다. 응답: {response_message}")
-                        # JSON이 아닌 일반 텍스트 응답
-                        return {
-                            "type": "CHAT",
-                            "message": response_message,
-                            "thread_id": thread_id
-                        }
-                except Exception as e:
-                    print(f"응답 처리 오류: {str(e)}")
-                    return {"type": "ERROR", "message": f"응답 처리 오류: {str(e)}"}
-                
+                response_message = self.runner.run(thread_id, quiz_request['prompt'], on_text_delta)
+                return self._quiz_from_response(thread_id, quiz_request, response_message)
+            except RunFailedError as e:
+                print(f"Run failed: {e.status}")
+                return {"type": "ERROR", "message": f"응답 생성 실패: {e.status}"}
             except Exception as e:
                 print(f"Error in run creation or retrieval: {str(e)}")
                 return {"type": "ERROR", "message": f"응답 생성 오류: {str(e)}"}
@@ -261,17 +480,16 @@ class ScienceQuizBot:
             traceback.print_exc()
             return {"type": "ERROR", "message": f"퀴즈 생성 중 오류가 발생했습니다: {str(e)}"}
 
-    def check_answer(self, message, thread_id):
+    def check_answer(self, message, thread_id, on_text_delta=None, user_id=None):
         logger.info(f"답변 평가 요청: thread_id={thread_id}, 답변={message}")
         try:
-            # 현재 퀴즈 정보 가져오기
-            if thread_id not in current_quiz_store:
+            # 현재 퀴즈 정보 가져오기 (다른 워커에서 출제한 퀴즈도 공유 저장소에서 조회)
+            current_quiz = current_quiz_store.get(thread_id)
+            if current_quiz is None:
                 print(f"thread_id {thread_id}에 대한 퀴즈 정보가 없습니다.")
-                print(f"현재 저장된 쓰레드 IDs: {list(current_quiz_store.keys())}")
+                print(f"현재 저장된 쓰레드 수: {len(current_quiz_store)}")
                 return {"type": "ERROR", "message": "퀴즈 정보를 찾을 수 없습니다. 새로운 문제를 먼저 요청해주세요."}
             
-            current_quiz = current_quiz_store.get(thread_id)
-            
             # 퀴즈 정보 추출
             quiz = current_quiz.get('quiz', {})
             question = quiz.get('question', '')
@@ -285,121 +503,97 @@ class ScienceQuizBot:
             print(f"문제 유형: {question_type}")
             print(f"문제: {question}")
             
+            # 저장된 정답으로 판정 가능한 답변은 GPT 호출 없이 채점
+            result = self.grader.grade(message, quiz)
+            if result is not None:
+                print("로컬 채점 완료")
+                self._record_answer(user_id, current_quiz, message, result)
+                self._add_next_question_if_available(thread_id, current_quiz, result)
+                self._prefetch_if_due(thread_id, current_quiz)
+                return result
+            
             # 답변 평가 요청 프롬프트 구성
-            prompt = f"""
-            다음은 방금 출제한 {question_type} 문제와 사용자의 답변입니다:
-
-            문제: {question}
-            정답: {correct_answer}
-            사용자 답변: {message}
-
-            사용자 답변이 정답인지 평가하고, 아래 JSON 형식으로 응답해주세요:
-            {{
-                "type": "ANSWER",
-                "answer": {{
-                    "correct": true/false,
-                    "explanation": "정답/오답에 대한 설명", 
-                    "correct_answer": "정답" // 오답인 경우에만 제공
-                }}
-            }}
-            """
+            prompt = self._build_grading_prompt(quiz, message)
             
             print("=== 평가 프롬프트 ===")
             print(prompt)
             print("=====================")
             
             try:
-                # 메시지 추가
-                client.beta.threads.messages.create(
-                    thread_id=thread_id,
-                    role="user",
-                    content=prompt
-                )
-                
-                # 실행 요청
-                run = client.beta.threads.runs.create(
-                    thread_id=thread_id,
-                    assistant_id=self.assistant_id
-                )
-                
-                # 완료 대기
+                # 메시지 추가 및 실행 완료 대기
                 print("GPT 응답 대기 중...")
-                timeout_seconds = 30
-                start_time = time.time()
-                
-                while True:
-                    # 타임아웃 체크
-                    if time.time() - start_time > timeout_seconds:
-                        print("GPT 응답 타임아웃")
-                        raise TimeoutError("GPT 응답 시간 초과")
-                    
-                    run_status = client.beta.threads.runs.retrieve(
-                        thread_id=thread_id,
-                        run_id=run.id
-                    )
-                    
-                    print(f"Run 상태: {run_status.status}")
-                    
-                    if run_status.status == 'completed':
-                        break
-                    elif run_status.status in ['failed', 'cancelled', 'expired']:
-                        raise Exception(f"응답 생성 실패: {run_status.status}")
-                    
-                    time.sleep(1)
-                
-                # 응답 가져오기
-                messages = client.beta.threads.messages.list(
-                    thread_id=thread_id
-                )
-                
-                # 응답 내용 추출
-                response_message = messages.data[0].content[0].text.value
+                response_message = self.runner.run(thread_id, prompt, on_text_delta)
                 print("GPT 응답:", response_message)
-                
-                # JSON 응답 파싱
-                try:
-                    # JSON 부분 추출
-                    json_start = response_message.find('{')
-                    json_end = response_message.rfind('}') + 1
-                    
-                    if json_start != -1 and json_end != -1:
-                        json_text = response_message[json_start:json_end]
-                        print("추출된 JSON:", json_text)
-                        
-                        result = json.loads(json_text)
-                        
-                        # 필수 필드 확인 및 추가
-                        if "type" not in result:
-                            result["type"] = "ANSWER"
-                        
-                        # 다음 문제 처리
-                        self._add_next_question_if_available(thread_id, current_quiz, result)
-                        return result
-                    else:
-                        print("JSON 형식을 찾을 수 없음, 전체 응답:", response_message)
-                        # JSON이 없는 경우 기본 응답 생성
-                        raise ValueError("유효한 JSON 응답을 찾을 수 없습니다")
-                except (json.JSONDecodeError, ValueError) as e:
-                    print(f"JSON 파싱 오류: {str(e)}")
-                    # 오류 발생 시 기본 평가 방식 사용
-                    result = self._create_default_answer_response(message, quiz)
-                    # 다음 문제 처리
-                    self._add_next_question_if_available(thread_id, current_quiz, result)
-                    return result
-                
+                result = self._parse_answer_response(response_message, message, quiz)
             except Exception as e:
                 print(f"GPT 답변 평가 오류: {str(e)}")
                 # 오류 발생 시 기본 평가 방식 사용
                 result = self._create_default_answer_response(message, quiz)
-                # 다음 문제 처리
-                self._add_next_question_if_available(thread_id, current_quiz, result)
-                return result
+            
+            # 답변 기록 후 다음 문제 처리
+            self._record_answer(user_id, current_quiz, message, result)
+            self._add_next_question_if_available(thread_id, current_quiz, result)
+            self._prefetch_if_due(thread_id, current_quiz)
+            return result
             
         except Exception as e:
             print(f"check_answer 메서드 오류: {str(e)}")
             traceback.print_exc()
             return {"type": "ERROR", "message": f"답변 확인 중 오류가 발생했습니다: {str(e)}"}
 
+    def get_chat_response(self, message, thread_id, on_text_delta=None):
+        """일반 대화 응답"""
+        try:
+            response_message = self.runner.run(thread_id, message, on_text_delta)
+            return {"type": "CHAT", "message": response_message, "thread_id": thread_id}
+        except Exception as e:
+            print(f"대화 응답 오류: {str(e)}")
+            return {"type": "ERROR", "message": f"오류가 발생했습니다: {str(e)}"}
+
+    def _build_grading_prompt(self, quiz, message):
+        """답변 평가 요청 프롬프트 구성"""
+        return f"""
+            다음은 방금 출제한 {quiz.get('question_type', '객관식')} 문제와 사용자의 답변입니다:
+
+            문제: {quiz.get('question', '')}
+            정답: {quiz.get('correct', '')}
+            사용자 답변: {message}
+
+            사용자 답변이 정답인지 평가하고, 아래 JSON 형식으로 응답해주세요:
+            {{
+                "type": "ANSWER",
+                "answer": {{
+                    "correct": true/false,
+                    "explanation": "정답/오답에 대한 설명", 
+                    "correct_answer": "정답" // 오답인 경우에만 제공
+                }}
+            }}
+            """
+
+    def _parse_answer_response(self, response_message, message, quiz):
+        """GPT 평가 응답을 파싱 (실패 시 기본 평가 방식 사용)"""
+        try:
+            # JSON 부분 추출
+            json_start = response_message.find('{')
+            json_end = response_message.rfind('}') + 1
+            
+            if json_start == -1 or json_end == 0:
+                print("JSON 형식을 찾을 수 없음, 전체 응답:", response_message)
+                raise ValueError("유효한 JSON 응답을 찾을 수 없습니다")
+            
+            json_text = response_message[json_start:json_end]
+            print("추출된 JSON:", json_text)
+            
+            result = json.loads(json_text)
+            
+            # 필수 필드 확인 및 추가
+            if "type" not in result:
+                result["type"] = "ANSWER"
+            return result
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"JSON 파싱 오류: {str(e)}")
+            return self._create_default_answer_response(message, quiz)
+
     def _create_default_answer_response(self, message, quiz):
         """GPT 평가 실패 시 기본 문자열 비교로 답변 평가"""
         correct_answer = quiz.get('correct', '')
@@ -438,39 +632,70 @@ class ScienceQuizBot:
         
         return result
 
+    def _record_answer(self, user_id, current_quiz, message, result):
+        """채점 결과를 답변 기록 대기열에 추가 (DB 저장은 백그라운드에서 일괄 처리)"""
+        if not user_id or result.get('type') != 'ANSWER':
+            return
+        answer_recorder.record(
+            user_id, current_quiz.get('quiz', {}), message,
+            (result.get('answer') or {}).get('correct'), current_quiz.get('category')
+        )
+
     def _add_next_question_if_available(self, thread_id, current_quiz, result):
         """다음 문제가 있다면 결과에 추가"""
-        if 'questions' in current_quiz:
-            questions = current_quiz['questions']
-            current_index = current_quiz.get('current_index', 0)
+        if 'questions' not in current_quiz:
+            return
+        answered_index = current_quiz.get('current_index', 0)
+        
+        def advance(entry):
+            # 채점하는 동안 다른 요청이 이미 넘어갔거나 새 퀴즈가 출제됐으면 그대로 둠
+            questions = entry.get('questions') or []
+            if entry.get('current_index', 0) != answered_index or answered_index + 1 >= len(questions):
+                return
+            next_index = answered_index + 1
+            total = max(len(questions), entry.get('progress', {}).get('total', 0))
             
-            if current_index + 1 < len(questions):
-                next_index = current_index + 1
-                next_quiz = questions[next_index]
-                
-                # 다음 문제 정보 저장
-                current_quiz_store[thread_id] = {
-                    'questions': questions,
-                    'current_index': next_index,
-                    'quiz': next_quiz,
-                    'progress': {
-                        'current': next_index + 1,
-                        'total': len(questions)
-                    }
-                }
-                
-                # 다음 문제 정보 추가
-                result['next_question'] = {
-                    'quiz': next_quiz,
-                    'progress': {
-                        'current': next_index + 1,
-                        'total': len(questions)
-                    }
-                }
+            # 다음 문제 정보 저장
+            entry['current_index'] = next_index
+            entry['quiz'] = questions[next_index]
+            entry['progress'] = {
+                'current': next_index + 1,
+                'total': total
+            }
+            
+            # 다음 문제 정보 추가
+            result['next_question'] = {
+                'quiz': questions[next_index],
+                'progress': dict(entry['progress'])
+            }
+        
+        current_quiz_store.update(thread_id, advance)
+
+def quiz_category(quiz_request):
+    """출제 조건에서 답변 기록에 쓸 과목/학년/단원"""
+    return {
+        'subject': quiz_request['subject'],
+        'grade': quiz_request['grade'],
+        'unit': quiz_request['unit']
+    }
 
 # ScienceQuizBot 인스턴스 생성
 quiz_bot = ScienceQuizBot()
 
+# 채점 결과를 모아서 일괄 저장
+answer_recorder = AnswerRecorder(app)
+
+# 동일한 출제 조건의 퀴즈 재사용 캐시
+quiz_cache = QuizCache()
+
+# 문제를 푸는 동안 다음 문제 세트를 미리 생성
+quiz_prefetcher = QuizPrefetcher(quiz_bot.generate_batch, current_quiz_store)
+
+# 문제 은행 (미리 생성한 문제를 바로 출제하고 백그라운드에서 보충)
+question_bank = QuestionBankFiller(app, quiz_bot.generate_questions)
+if os.environ.get('QUESTION_BANK_WARM') == '1':
+    question_bank.warm()
+
 @login_manager.user_loader
 def load_user(user_id):
     return db.session.get(User, int(user_id))
@@ -563,19 +788,15 @@ def new_quiz():
         print(f"대단원 필터: {main_unit}")
         print(f"소단원 필터: {sub_unit}")
         
-        response = quiz_bot.get_quiz(thread_id, question_count, main_unit, sub_unit)
+        response = quiz_bot.get_quiz(thread_id, question_count, main_unit, sub_unit, user_id=current_user.id)
         
         if response.get('type') == 'QUIZ':
             print(json.dumps(response, indent=4, ensure_ascii=False))
             
+            # 퀴즈 정보는 get_quiz에서 세션 저장소에 저장됨
             if question_count > 1 and 'questions' in response:
                 # 첫 번째 문제 반환
                 first_question = response['questions'][0]
-                current_quiz_store[thread_id] = {
-                    'questions': response['questions'],
-                    'current_index': 0,
-                    'total_questions': question_count
-                }
                 return jsonify({
                     'type': 'QUIZ',
                     'quiz': first_question,
@@ -587,7 +808,6 @@ def new_quiz():
                 })
             
             # 단일 문제인 경우
-            current_quiz_store[thread_id] = response.get('questions')[0]
             return jsonify({
                 'type': 'QUIZ',
                 'quiz': response.get('questions')[0],
@@ -614,7 +834,8 @@ def submit_answer():
     answer = data.get('answer')
     
     quiz_bot = ScienceQuizBot()
-    result = quiz_bot.check_answer(answer, thread_id)
+    user_id = current_user.id if current_user.is_authenticated else None
+    result = quiz_bot.check_answer(answer, thread_id, user_id=user_id)
     
     return jsonify(result)
 
@@ -668,37 +889,16 @@ def chat():
                 question_count=question_count,
                 main_unit=subject,
                 sub_unit=grade,
-                question_types=question_types
+                question_types=question_types,
+                unit=unit,
+                user_id=current_user.id
             )
             
             # 스레드 ID 확인 및 업데이트
             if result and 'thread_id' in result:
                 thread_id = result['thread_id']
             
-            # 퀴즈 생성 결과에서 데이터 추출
-            if result.get('type') == 'QUIZ':
-                # 퀴즈 데이터가 있는 경우, 저장
-                if 'questions' in result and result['questions']:
-                    current_quiz_store[thread_id] = {
-                        'questions': result['questions'],
-                        'current_index': 0,
-                        'quiz': result['questions'][0],
-                        'progress': {
-                            'current': 1,
-                            'total': len(result['questions'])
-                        }
-                    }
-                    print(f"쓰레드 {thread_id}에 대한 퀴즈 정보 저장 완료 (여러 문제)")
-                elif 'quiz' in result:
-                    current_quiz_store[thread_id] = {
-                        'quiz': result['quiz'],
-                        'progress': {
-                            'current': 1,
-                            'total': 1
-                        }
-                    }
-                    print(f"쓰레드 {thread_id}에 대한 퀴즈 정보 저장 완료 (단일 문제)")
-            
+            # 퀴즈 정보는 get_quiz에서 세션 저장소에 저장됨
             return jsonify(result)
             
         elif is_quiz_answer:
@@ -712,10 +912,10 @@ def chat():
                 print(f"문제 유형: {quiz.get('question_type', '정보 없음')}")
             else:
                 print(f"thread_id {thread_id}에 대한 퀴즈 정보가 없습니다.")
-                print(f"현재 저장된 쓰레드 IDs: {list(current_quiz_store.keys())}")
+                print(f"현재 저장된 쓰레드 수: {len(current_quiz_store)}")
             
             # 답변 체크
-            result = quiz_bot.check_answer(message, thread_id)
+            result = quiz_bot.check_answer(message, thread_id, user_id=current_user.id)
             
             print("=== 답변 평가 결과 반환 ===")
             print(result)
@@ -731,6 +931,105 @@ def chat():
         traceback.print_exc()
         return jsonify({"type": "ERROR", "message": f"오류가 발생했습니다: {str(e)}"})
 
+@app.route('/api/chat/stream', methods=['POST'])
+@login_required
+def chat_stream():
+    """/api/chat 의 SSE 스트리밍 버전
+
+    문제 출제는 문제가 하나 완성될 때마다 question 이벤트로, 채점 해설과 일반 대화는 생성되는 대로
+    delta 이벤트로 보내고, 마지막에 /api/chat 과 같은 형식의 전체 결과를 result 이벤트로 보냅니다.
+    """
+    data = request.json or {}
+    message = data.get('message', '')
+    thread_id = data.get('thread_id')
+    is_quiz_answer = data.get('is_quiz_answer', False)
+    subject = data.get('subject')
+    grade = data.get('grade')
+    unit = data.get('unit')
+    question_types = data.get('question_types', ['객관식'])
+    user_id = current_user.id
+
+    if not thread_id:
+        thread = client.beta.threads.create()
+        thread_id = thread.id
+
+    match = re.search(r'(\d+)문제\s*(출제|내줘|주세요|풀고싶어요|풀래요|풀어볼래요)', message)
+    events = queue.Queue()
+
+    def send_question(question, position, total):
+        events.put(('question', {
+            'type': 'QUIZ',
+            'quiz': question,
+            'progress': {'current': position + 1, 'total': total},
+            'thread_id': thread_id
+        }))
+
+    def work():
+        try:
+            with app.app_context():
+                if match:
+                    question_count = int(match.group(1))
+                    parser = QuestionStreamParser()
+                    streamed = []
+                    category = {'subject': subject, 'grade': grade, 'unit': unit}
+
+                    def on_quiz_delta(text):
+                        for question in parser.feed(text):
+                            position = len(streamed)
+                            streamed.append(question)
+                            quiz_bot.store_streamed_question(thread_id, question, position, question_count, category)
+                            send_question(question, position, question_count)
+
+                    result = quiz_bot.get_quiz(
+                        thread_id=thread_id,
+                        question_count=question_count,
+                        main_unit=subject,
+                        sub_unit=grade,
+                        question_types=question_types,
+                        unit=unit,
+                        user_id=user_id,
+                        on_text_delta=on_quiz_delta
+                    )
+                    # 캐시/문제 은행에서 바로 출제된 경우 스트리밍 없이 문제를 차례로 전송
+                    questions = list(result.get('questions') or [])
+                    if result.get('type') == 'QUIZ':
+                        for position in range(len(streamed), len(questions)):
+                            send_question(questions[position], position, max(question_count, len(questions)))
+                elif is_quiz_answer:
+                    parser = FieldStreamParser('explanation')
+
+                    def on_answer_delta(text):
+                        explanation = parser.feed(text)
+                        if explanation:
+                            events.put(('delta', {'text': explanation}))
+
+                    result = quiz_bot.check_answer(message, thread_id, on_answer_delta, user_id)
+                else:
+                    result = quiz_bot.get_chat_response(
+                        message, thread_id, lambda text: events.put(('delta', {'text': text}))
+                    )
+            events.put(('result', result))
+        except Exception as e:
+            print(f"Error in chat stream: {str(e)}")
+            traceback.print_exc()
+            events.put(('result', {"type": "ERROR", "message": f"오류가 발생했습니다: {str(e)}"}))
+        finally:
+            events.put(None)
+
+    threading.Thread(target=work, name='chat-stream', daemon=True).start()
+
+    def generate():
+        while True:
+            item = events.get()
+            if item is None:
+                return
+            yield sse_event(*item)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/admin')
 @login_required
 def admin_dashboard():
@@ -742,225 +1041,60 @@ def admin_dashboard():
     print("관리자 대시보드 접근")
     
     try:
-        # 전체 학생 목록 조회 (admin 제외)
-        students = User.query.filter(User.username != 'admin').all()
-        
         # 필터링을 위한 파라미터 가져오기
         selected_student_id = request.args.get('student_id', type=int)
         selected_subject = request.args.get('subject')
         selected_grade = request.args.get('grade')
+        start, end = page_date_range()
+        sort, order = student_sort_params()
         
-        # 모든 과목 및 학년 목록 조회
-        unique_subjects = db.session.query(Answer.subject).distinct().all()
-        unique_subjects = [subj[0] for subj in unique_subjects if subj[0]]
-        
-        unique_grades = db.session.query(Answer.grade).distinct().all()
-        unique_grades = [grade[0] for grade in unique_grades if grade[0]]
+        # 학생 선택 목록은 이름 순 첫 페이지만 표시 (전체 학생을 읽지 않도록)
+        students = student_options(db.session)
+        if selected_student_id and all(student.id != selected_student_id for student in students):
+            selected = db.session.get(User, selected_student_id)
+            if selected:
+                students.append(StudentRow(selected.id, selected.username, selected.created_at))
         
         # 전체 학생 수
-        total_students = len(students)
+        total_students = student_count(db.session)
         
-        # 통계 쿼리 기본 필터 설정
-        base_query_filter = []
-        if selected_student_id:
-            base_query_filter.append(Answer.user_id == selected_student_id)
-        if selected_subject:
-            base_query_filter.append(Answer.subject == selected_subject)
-        if selected_grade:
-            base_query_filter.append(Answer.grade == selected_grade)
+        # 학생별 통계 표 첫 페이지 (나머지는 /api/admin/students로 이어서 불러옴)
+        student_stats = student_page(db.session, sort, order, student_id=selected_student_id,
+                                     subject=selected_subject, grade=selected_grade, start=start, end=end,
+                                     active_only=True)
         
-        # 안전하게 쿼리 실행
+        # 합계/진도율/단원·과목·학년·학생별 통계를 한 번에 계산
         try:
-            # 총 문제 풀이 수와 정답 수 (필터 적용)
-            total_answers_query = Answer.query
-            for filter_condition in base_query_filter:
-                total_answers_query = total_answers_query.filter(filter_condition)
-            total_answers = total_answers_query.count()
-            
-            total_correct_query = Answer.query.filter_by(is_correct=True)
-            for filter_condition in base_query_filter:
-                total_correct_query = total_correct_query.filter(filter_condition)
-            total_correct = total_correct_query.count()
-            
-            # 전체 정답률
-            accuracy_rate = (total_correct / total_answers * 100) if total_answers > 0 else 0
+            stats = stats_cache.load(db.session, selected_student_id, selected_subject, selected_grade, start, end)
         except Exception as e:
             print(f"통계 쿼리 오류: {e}")
-            total_answers = 0
-            total_correct = 0
-            accuracy_rate = 0
-        
-        # 평균 학습 진도율 계산 (100문제 기준, 필터 적용)
-        try:
-            student_progress_query = db.session.query(
-                User.id,
-                func.count(Answer.id).label('total_answers')
-            ).join(Answer, User.id == Answer.user_id)\
-             .filter(User.username != 'admin')
-            
-            # 과목 및 학년 필터 적용
-            if selected_subject:
-                student_progress_query = student_progress_query.filter(Answer.subject == selected_subject)
-            if selected_grade:
-                student_progress_query = student_progress_query.filter(Answer.grade == selected_grade)
-            
-            student_progress = student_progress_query.group_by(User.id).all()
-            
-            progress_count = len(student_progress)
-            if progress_count > 0:
-                total_progress = sum(min(total/100 * 100, 100) for _, total in student_progress)
-                average_progress = total_progress / progress_count
-            else:
-                average_progress = 0
-        except Exception as e:
-            print(f"진도율 계산 오류: {e}")
-            average_progress = 0
-        
-        # 단원별 통계 쿼리
-        try:
-            unit_stats_query = db.session.query(
-                Answer.subject,
-                Answer.grade,
-                Answer.unit,
-                func.count(Answer.id).label('attempts'),
-                func.sum(case((Answer.is_correct == True, 1), else_=0)).label('correct'),
-                func.count(func.distinct(Answer.user_id)).label('unique_students')
-            )
-            
-            # 필터 적용
-            for filter_condition in base_query_filter:
-                unit_stats_query = unit_stats_query.filter(filter_condition)
-            
-            # subject, grade, unit으로 그룹화
-            unit_stats = unit_stats_query.group_by(Answer.subject, Answer.grade, Answer.unit).all()
-            
-            # 결과 가공
-            unit_stats = [{
-                'subject': stat.subject or '미분류',
-                'grade': stat.grade or '',
-                'unit': stat.unit or '',
-                'name': f"{stat.subject or '미분류'} - {stat.grade or ''} - {stat.unit or ''}",
-                'total_questions': 100,
-                'attempts': stat.attempts,
-                'correct': stat.correct,
-                'accuracy_rate': (stat.correct / stat.attempts * 100) if stat.attempts > 0 else 0,
-                'unique_students': stat.unique_students if not selected_student_id else 1
-            } for stat in unit_stats]
-        except Exception as e:
-            print(f"단원별 통계 쿼리 오류: {e}")
-            unit_stats = []
+            stats = StatsResult(selected_student_id, selected_subject, selected_grade)
         
-        # 학생별 통계 (단원별 통계와 독립적)
-        try:
-            student_stats_query = db.session.query(
-                User,
-                func.count(Answer.id).label('total'),
-                func.sum(case((Answer.is_correct == True, 1), else_=0)).label('correct')
-            ).join(Answer, User.id == Answer.user_id)\
-             .filter(User.username != 'admin')
-            
-            # 과목 및 학년 필터 적용
-            if selected_subject:
-                student_stats_query = student_stats_query.filter(Answer.subject == selected_subject)
-            if selected_grade:
-                student_stats_query = student_stats_query.filter(Answer.grade == selected_grade)
-            
-            # 선택된 학생이 있는 경우 해당 학생의 통계만 조회
-            if selected_student_id:
-                student_stats_query = student_stats_query.filter(User.id == selected_student_id)
-            
-            student_stats = student_stats_query.group_by(User.id).all()
-        except Exception as e:
-            print(f"학생별 통계 쿼리 오류: {e}")
-            student_stats = []
-        
-        # 과목별 통계 데이터 조회
-        try:
-            subject_stats_query = db.session.query(
-                Answer.subject,
-                func.count(Answer.id).label('total_questions'),
-                func.sum(case((Answer.is_correct == True, 1), else_=0)).label('correct_answers'),
-                func.sum(case((Answer.is_correct == False, 1), else_=0)).label('incorrect_answers'),
-                func.round(func.sum(case((Answer.is_correct == True, 1), else_=0)) * 100.0 / func.count(Answer.id), 1).label('accuracy_rate'),
-                func.count(func.distinct(Answer.user_id)).label('unique_students')
-            )
-            
-            # 학생 필터와 학년 필터만 적용 (과목 필터는 제외)
-            if selected_student_id:
-                subject_stats_query = subject_stats_query.filter(Answer.user_id == selected_student_id)
-            if selected_grade:
-                subject_stats_query = subject_stats_query.filter(Answer.grade == selected_grade)
-            
-            # 과목 필터가 있는 경우, 해당 과목만 표시
-            if selected_subject:
-                subject_stats_query = subject_stats_query.filter(Answer.subject == selected_subject)
-            
-            subject_stats = subject_stats_query.group_by(Answer.subject).all()
-            
-            # 결과 가공
-            subject_stats_data = [{
-                'subject': stat.subject or '미분류',
-                'total_questions': stat.total_questions,
-                'correct_answers': stat.correct_answers,
-                'incorrect_answers': stat.incorrect_answers,
-                'accuracy_rate': stat.accuracy_rate or 0,
-                'unique_students': stat.unique_students
-            } for stat in subject_stats]
-        except Exception as e:
-            print(f"과목별 통계 쿼리 오류: {e}")
-            subject_stats_data = []
-        
-        # 학년별 통계 데이터 조회
-        try:
-            grade_stats_query = db.session.query(
-                Answer.grade,
-                func.count(Answer.id).label('total_questions'),
-                func.sum(case((Answer.is_correct == True, 1), else_=0)).label('correct_answers'),
-                func.sum(case((Answer.is_correct == False, 1), else_=0)).label('incorrect_answers'),
-                func.round(func.sum(case((Answer.is_correct == True, 1), else_=0)) * 100.0 / func.count(Answer.id), 1).label('accuracy_rate'),
-                func.count(func.distinct(Answer.user_id)).label('unique_students')
-            )
-            
-            # 학생 필터와 과목 필터만 적용 (학년 필터는 제외)
-            if selected_student_id:
-                grade_stats_query = grade_stats_query.filter(Answer.user_id == selected_student_id)
-            if selected_subject:
-                grade_stats_query = grade_stats_query.filter(Answer.subject == selected_subject)
-            
-            # 학년 필터가 있는 경우, 해당 학년만 표시
-            if selected_grade:
-                grade_stats_query = grade_stats_query.filter(Answer.grade == selected_grade)
-            
-            grade_stats = grade_stats_query.group_by(Answer.grade).all()
-            
-            # 결과 가공
-            grade_stats_data = [{
-                'grade': stat.grade or '미분류',
-                'total_questions': stat.total_questions,
-                'correct_answers': stat.correct_answers,
-                'incorrect_answers': stat.incorrect_answers,
-                'accuracy_rate': stat.accuracy_rate or 0,
-                'unique_students': stat.unique_students
-            } for stat in grade_stats]
-        except Exception as e:
-            print(f"학년별 통계 쿼리 오류: {e}")
-            grade_stats_data = []
+        # 주별 정답률 추이 (기간이 없으면 최근 TREND_DEFAULT_WEEKS주)
+        trend_start = start or (end or stats_rollup.today()) - timedelta(weeks=TREND_DEFAULT_WEEKS - 1)
+        trend = accuracy_trend(db.session, 'week', trend_start, end, selected_student_id, selected_subject,
+                               selected_grade)
         
         return render_template('admin.html',
                              students=students,
                              selected_student_id=selected_student_id,
                              selected_subject=selected_subject,
                              selected_grade=selected_grade,
-                             unique_subjects=unique_subjects,
-                             unique_grades=unique_grades,
+                             start=start,
+                             end=end,
+                             trend=trend,
+                             unique_subjects=stats.subjects,
+                             unique_grades=stats.grades,
                              total_students=total_students,
-                             total_answers=total_answers,
-                             accuracy_rate=accuracy_rate,
-                             average_progress=average_progress,
-                             unit_stats=unit_stats,
+                             total_answers=stats.total_answers,
+                             accuracy_rate=stats.accuracy_rate,
+                             average_progress=stats.average_progress,
+                             unit_stats=stats.by_unit,
                              student_stats=student_stats,
-                             subject_stats=subject_stats_data,
-                             grade_stats=grade_stats_data)
+                             sort=sort,
+                             order=order,
+                             subject_stats=stats.by_subject,
+                             grade_stats=stats.by_grade)
                              
     except Exception as e:
         print(f"Error in admin_dashboard: {str(e)}")
@@ -989,8 +1123,76 @@ def user_management():
         flash('관리자 권한이 필요합니다.', 'error')
         return redirect(url_for('login'))
         
-    users = User.query.all()
-    return render_template('user_management.html', users=users)
+    sort, order = student_sort_params()
+    users = student_page(db.session, sort, order)
+    return render_template('user_management.html', users=users, sort=sort, order=order)
+
+@app.route('/admin/items')
+@login_required
+def item_analysis_page():
+    if current_user.username != 'admin':
+        flash('관리자 권한이 필요합니다.', 'error')
+        return redirect(url_for('login'))
+    
+    params = item_query_params()
+    items = item_analysis.item_rows(db.session, **params)
+    return render_template('item_analysis.html', items=items, **params,
+                           easy_p_value=item_analysis.EASY_P_VALUE, hard_p_value=item_analysis.HARD_P_VALUE,
+                           low_discrimination=item_analysis.LOW_DISCRIMINATION)
+
+@app.route('/api/admin/items')
+@login_required
+def item_analysis_api():
+    if current_user.username != 'admin':
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    
+    params = item_query_params()
+    items = item_analysis.item_rows(db.session, **params)
+    return jsonify({'items': [item.to_dict() for item in items], 'sort': params['sort'], 'order': params['order']})
+
+def item_query_params():
+    """문항 분석 정렬/필터 (잘못된 정렬 값이면 변별도 오름차순 - 검토가 필요한 문항부터)"""
+    sort = request.args.get('sort', 'discrimination')
+    order = request.args.get('order', 'asc')
+    if sort not in item_analysis.SORT_KEYS:
+        sort = 'discrimination'
+    if order not in ('asc', 'desc'):
+        order = 'asc'
+    return {
+        'sort': sort,
+        'order': order,
+        'subject': request.args.get('subject') or None,
+        'grade': request.args.get('grade') or None,
+        'unit': request.args.get('unit') or None,
+        'min_attempts': max(1, request.args.get('min_attempts', 1, type=int)),
+        'limit': min(max(1, request.args.get('limit', item_analysis.ITEM_PAGE_SIZE, type=int)),
+                     item_analysis.ITEM_PAGE_SIZE)
+    }
+
+def student_sort_params():
+    """요청의 정렬 기준/방향 (잘못된 값이면 이름 오름차순)"""
+    sort = request.args.get('sort', 'name')
+    order = request.args.get('order', 'asc')
+    if sort not in SORT_KEYS:
+        sort = 'name'
+    if order not in ('asc', 'desc'):
+        order = 'asc'
+    return sort, order
+
+def stats_date_range():
+    """요청의 start/end(YYYY-MM-DD, 종료일 포함)를 date로 변환 (형식이 틀리면 ValueError)"""
+    start = request.args.get('start')
+    end = request.args.get('end')
+    return (datetime.strptime(start, '%Y-%m-%d').date() if start else None,
+            datetime.strptime(end, '%Y-%m-%d').date() if end else None)
+
+def page_date_range():
+    """화면/보고서용 기간 (형식이 틀리면 안내 후 기간 없이 표시)"""
+    try:
+        return stats_date_range()
+    except ValueError:
+        flash('날짜 형식이 올바르지 않습니다. (YYYY-MM-DD)', 'error')
+        return None, None
 
 @app.route('/admin/users/add', methods=['POST'])
 @login_required
@@ -1056,7 +1258,10 @@ def delete_user(user_id):
             flash('관리자 계정은 삭제할 수 없습니다.', 'error')
             return redirect(url_for('user_management'))
             
-        # 사용자의 답변 기록도 함께 삭제
+        # 사용자의 답변 기록과 집계도 함께 삭제 (대기 중인 답변을 먼저 저장해야 삭제 후에 다시 생기지 않음)
+        answer_recorder.flush()
+        item_analysis.remove_user_answers(db.session, user_id)
+        stats_rollup.remove_answers(db.session, Answer.user_id == user_id)
         Answer.query.filter_by(user_id=user_id).delete()
         db.session.delete(user)
         db.session.commit()
@@ -1076,7 +1281,10 @@ def delete_user_stats(user_id):
         return jsonify({'error': '권한이 없습니다.'}), 403
         
     try:
-        # 해당 사용자의 모든 답변 기록 삭제
+        # 해당 사용자의 모든 답변 기록 삭제 (대기 중인 답변 포함)
+        answer_recorder.flush()
+        item_analysis.remove_user_answers(db.session, user_id)
+        stats_rollup.remove_answers(db.session, Answer.user_id == user_id)
         Answer.query.filter_by(user_id=user_id).delete()
         db.session.commit()
         flash('통계가 삭제되었습니다.', 'success')
@@ -1093,7 +1301,10 @@ def delete_all_stats():
         return jsonify({'error': '권한이 없습니다.'}), 403
         
     try:
-        # 모든 답변 기록 삭제
+        # 모든 답변 기록 삭제 (대기 중인 답변 포함)
+        answer_recorder.flush()
+        stats_rollup.clear(db.session)
+        item_analysis.clear(db.session)
         Answer.query.delete()
         db.session.commit()
         flash('모든 통계가 삭제되었습니다.', 'success')
@@ -1103,72 +1314,194 @@ def delete_all_stats():
         print(f"Error deleting all stats: {str(e)}")
         return jsonify({'error': '통계 삭제 중 오류가 발생했습니다.'}), 500
 
+@app.route('/api/admin/question-bank')
+@login_required
+def question_bank_status():
+    if current_user.username != 'admin':
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    
+    return jsonify({
+        'pool_size': question_bank.pool_size,
+        'stats': question_bank.stats,
+        'pools': question_bank.pool_sizes()
+    })
+
+@app.route('/api/admin/quiz-cache')
+@login_required
+def quiz_cache_status():
+    if current_user.username != 'admin':
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    
+    return jsonify(quiz_cache.stats())
+
+@app.route('/api/admin/quiz-prefetch')
+@login_required
+def quiz_prefetch_status():
+    if current_user.username != 'admin':
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    
+    return jsonify(quiz_prefetcher.snapshot())
+
+@app.route('/api/admin/stats-cache')
+@login_required
+def stats_cache_status():
+    if current_user.username != 'admin':
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    
+    return jsonify(stats_cache.snapshot(db.session))
+
+@app.route('/api/admin/analytics')
+@login_required
+def admin_analytics():
+    """답변 스냅샷 분석 (kind=summary|groups|distribution|percentiles|cohorts)
+
+    필터: student_id, subject, grade, unit, start/end(YYYY-MM-DD)
+    groups: by=subject,grade,unit,user_id 중 조합 / distribution: bins, min_attempts
+    cohorts: cohort=이름:학생ID,학생ID (여러 번 지정)
+    """
+    if current_user.username != 'admin':
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    if analytics is None:
+        return jsonify({'error': '답변 분석에는 numpy 패키지가 필요합니다.'}), 503
+    
+    kind = request.args.get('kind', 'summary')
+    try:
+        start_at, end_before = answer_export.parse_date_range(request.args.get('start'), request.args.get('end'))
+        by = tuple(request.args.get('by', 'subject').split(','))
+        if not set(by) <= {'subject', 'grade', 'unit', 'user_id'}:
+            raise ValueError(f"지원하지 않는 그룹 기준: {','.join(by)}")
+        cohorts = {}
+        for value in request.args.getlist('cohort'):
+            name, _, ids = value.partition(':')
+            cohorts[name] = [int(user_id) for user_id in ids.split(',') if user_id]
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    analytics.refresh(db.session)
+    selected = analytics.mask(student_id=request.args.get('student_id', type=int),
+                              subject=request.args.get('subject'),
+                              grade=request.args.get('grade'),
+                              unit=request.args.get('unit'),
+                              start=start_at,
+                              end=end_before)
+    min_attempts = request.args.get('min_attempts', 1, type=int)
+    if kind == 'summary':
+        result = analytics.summary(selected)
+    elif kind == 'groups':
+        result = analytics.group_by(by, selected)
+    elif kind == 'distribution':
+        result = analytics.accuracy_distribution(selected, request.args.get('bins', 10, type=int), min_attempts)
+    elif kind == 'percentiles':
+        result = analytics.unit_percentiles(selected, min_attempts=min_attempts)
+    elif kind == 'cohorts':
+        result = analytics.compare_cohorts(cohorts, selected)
+    else:
+        return jsonify({'error': f'지원하지 않는 분석 종류: {kind}'}), 400
+    return jsonify({'kind': kind, 'result': result, 'snapshot': analytics.snapshot()})
+
+@app.route('/api/admin/report-jobs')
+@login_required
+def report_jobs_status():
+    if current_user.username != 'admin':
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    
+    return jsonify(report_jobs.snapshot())
+
+@app.route('/api/admin/answer-recorder')
+@login_required
+def answer_recorder_status():
+    if current_user.username != 'admin':
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    
+    return jsonify(answer_recorder.snapshot())
+
+def process_memory_bytes():
+    """현재 워커 프로세스의 메모리 사용량(RSS, 바이트)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # /proc이 없는 환경에서는 최대 사용량으로 대신함 (리눅스: KB 단위)
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+@app.route('/api/admin/students')
+@login_required
+def admin_students():
+    """학생 목록 다음 페이지 (cursor는 이전 응답의 next_cursor)"""
+    if current_user.username != 'admin':
+        return jsonify({'error': '권한이 없습니다.'}), 403
+
+    sort, order = student_sort_params()
+    try:
+        start, end = stats_date_range()
+        page = student_page(db.session, sort, order,
+                            cursor=request.args.get('cursor'),
+                            limit=request.args.get('limit', STUDENT_PAGE_SIZE, type=int),
+                            student_id=request.args.get('student_id', type=int),
+                            subject=request.args.get('subject'),
+                            grade=request.args.get('grade'),
+                            start=start,
+                            end=end,
+                            active_only=request.args.get('active') == '1')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(page.to_dict())
+
+@app.route('/api/admin/stats/trend')
+@login_required
+def admin_stats_trend():
+    """일별/주별 정답률 추이 (period=day|week, start/end=YYYY-MM-DD)"""
+    if current_user.username != 'admin':
+        return jsonify({'error': '권한이 없습니다.'}), 403
+
+    period = request.args.get('period', 'week')
+    if period not in stats_rollup.BUCKET_PERIODS:
+        return jsonify({'error': f'지원하지 않는 기간 단위: {period}'}), 400
+    try:
+        start, end = stats_date_range()
+    except ValueError:
+        return jsonify({'error': '날짜 형식이 올바르지 않습니다. (YYYY-MM-DD)'}), 400
+
+    trend = accuracy_trend(db.session, period, start, end,
+                           student_id=request.args.get('student_id', type=int),
+                           subject=request.args.get('subject'),
+                           grade=request.args.get('grade'),
+                           unit=request.args.get('unit'))
+    return jsonify({'period': period, 'buckets': [point.to_dict() for point in trend]})
+
+@app.route('/api/admin/quiz-sessions')
+@login_required
+def quiz_session_status():
+    if current_user.username != 'admin':
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    
+    return jsonify(dict(current_quiz_store.stats(),
+                        pid=os.getpid(),
+                        process_memory=process_memory_bytes()))
+
 @app.route('/admin/stats/standardize-units', methods=['POST'])
 @login_required
 def standardize_unit_names():
     if current_user.username != 'admin':
         return jsonify({'error': '권한이 없습니다.'}), 403
         
+    dry_run = bool((request.get_json(silent=True) or {}).get('dry_run'))
     try:
-        # 과목, 학년, 단원 표준화 예시 (화학 반응의 규칙과 에너지 변화)
-        answers = Answer.query.filter(
-            Answer.unit.like('%화학%반응%규칙%에너지%변화%')
-        ).all()
-        
-        standardized_count = 0
-        for answer in answers:
-            if answer.unit != '화학 반응의 규칙과 에너지 변화':
-                answer.unit = '화학 반응의 규칙과 에너지 변화'
-                # 과목과 학년도 함께 표준화
-                if '과학' in answer.unit:
-                    answer.subject = '과학'
-                if not answer.grade and '중3' in answer.unit:
-                    answer.grade = '중3'
-                standardized_count += 1
-        
-        # 과목 표준화 (빈 값이나 오타 수정)
-        subject_mapping = {
-            '과': '과학',
-            '과학 ': '과학',
-            '과학.': '과학',
-            '사': '사회',
-            '사회 ': '사회',
-            '사회.': '사회',
-            '한': '한국사',
-            '한국': '한국사',
-            '한국사 ': '한국사',
-            '한국사.': '한국사'
-        }
-        
-        for wrong, correct in subject_mapping.items():
-            answers = Answer.query.filter(Answer.subject == wrong).all()
-            for answer in answers:
-                answer.subject = correct
-                standardized_count += 1
-        
-        # 학년 표준화
-        grade_mapping = {
-            '중1학년': '중1',
-            '중2학년': '중2',
-            '중3학년': '중3',
-            '중 1': '중1',
-            '중 2': '중2',
-            '중 3': '중3',
-            '1학년': '중1',
-            '2학년': '중2',
-            '3학년': '중3'
-        }
-        
-        for wrong, correct in grade_mapping.items():
-            answers = Answer.query.filter(Answer.grade == wrong).all()
-            for answer in answers:
-                answer.grade = correct
-                standardized_count += 1
-        
-        db.session.commit()
-        flash(f'단원명 표준화가 완료되었습니다. {standardized_count}개의 레코드가 수정되었습니다.', 'success')
+        # 매핑 파일의 규칙을 청크 단위 UPDATE로 적용 (집계 테이블도 청크마다 함께 갱신)
+        rules = unit_normalizer.load_rules()
+        answer_recorder.flush()
+        if dry_run:
+            results = unit_normalizer.dry_run(db.session, rules)
+        else:
+            results = unit_normalizer.run(db.session, rules)
+        standardized_count = sum(result['count'] for result in results)
+        if not dry_run:
+            flash(f'단원명 표준화가 완료되었습니다. {standardized_count}개의 레코드가 수정되었습니다.', 'success')
         return jsonify({
             'success': True,
+            'dry_run': dry_run,
+            'rules': results,
             'standardized_count': standardized_count
         })
     except Exception as e:
@@ -1184,40 +1517,12 @@ def download_unit_stats():
         return redirect(url_for('login'))
         
     student_id = request.args.get('student_id')
+    start, end = page_date_range()
     
     try:
-        # 단원별 통계 쿼리 - 새로운 분류 체계 (과목>학년>단원)
-        query = db.session.query(
-            Answer.subject,
-            Answer.grade,
-            Answer.unit,
-            func.count(Answer.id).label('attempts'),
-            func.sum(case((Answer.is_correct == True, 1), else_=0)).label('correct'),
-            func.count(func.distinct(Answer.user_id)).label('unique_students')
-        )
-        
-        if student_id:
-            query = query.filter(Answer.user_id == student_id)
-        
-        unit_stats = query.group_by(Answer.subject, Answer.grade, Answer.unit).all()
-        
-        # 선택된 학생 정보
-        selected_student = User.query.get(student_id) if student_id else None
-        
-        html = render_template('stats_report.html',
-                             generated_at=datetime.utcnow(),
-                             report_type='unit',
-                             selected_student=selected_student,
-                             unit_stats=[{
-                                 'subject': stat.subject or '미분류',
-                                 'grade': stat.grade or '',
-                                 'unit': stat.unit or '',
-                                 'name': f"{stat.subject or '미분류'} - {stat.grade or ''} - {stat.unit or ''}",
-                                 'attempts': stat.attempts,
-                                 'correct': stat.correct,
-                                 'accuracy_rate': (stat.correct / stat.attempts * 100) if stat.attempts > 0 else 0,
-                                 'unique_students': stat.unique_students
-                             } for stat in unit_stats])
+        # 단원별 통계 - 새로운 분류 체계 (과목>학년>단원)
+        context, _ = report_context('unit', int(student_id) if student_id else None, start=start, end=end)
+        html = render_template('stats_report.html', **context)
     except Exception as e:
         print(f"단원별 통계 다운로드 오류: {e}")
         # 대체 쿼리: 기존 main_unit, sub_unit 필드 사용 (하위 호환성)
@@ -1264,24 +1569,13 @@ def download_student_stats():
         flash('관리자 권한이 필요합니다.', 'error')
         return redirect(url_for('admin_login'))
         
-    # 학생별 통계 쿼리
-    student_stats = db.session.query(
-        User,
-        func.count(Answer.id).label('total'),
-        func.sum(case((Answer.is_correct == True, 1), else_=0)).label('correct')
-    ).join(Answer, User.id == Answer.user_id)\
-     .filter(User.username != 'admin')\
-     .group_by(User.id).all()
-    
-    html = render_template('stats_report.html',
-                         generated_at=datetime.utcnow(),
-                         report_type='student',
-                         student_stats=student_stats)
+    start, end = page_date_range()
     
-    response = make_response(html)
-    response.headers['Content-Type'] = 'text/html'
-    response.headers['Content-Disposition'] = f'attachment; filename=student_stats_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.html'
-    return response
+    # 학생별 통계 (학생 행은 조금씩 읽으며 바로 전송, 합계는 미리 집계된 결과 사용)
+    context, filename = report_context('student', start=start, end=end)
+    return Response(stream_template('stats_report.html', **context), mimetype='text/html', headers={
+        'Content-Disposition': f'attachment; filename={filename}'
+    })
 
 @app.route('/api/admin/statistics/download')
 @login_required
@@ -1294,120 +1588,13 @@ def download_statistics():
     selected_student_id = request.args.get('student_id', type=int)
     selected_subject = request.args.get('subject')
     selected_grade = request.args.get('grade')
-    
-    selected_student = User.query.get(selected_student_id) if selected_student_id else None
-    
-    # 기본 필터 설정
-    base_query_filter = []
-    if selected_student_id:
-        base_query_filter.append(Answer.user_id == selected_student_id)
-    if selected_subject:
-        base_query_filter.append(Answer.subject == selected_subject)
-    if selected_grade:
-        base_query_filter.append(Answer.grade == selected_grade)
+    start, end = page_date_range()
     
     try:
-        # 1. 학생별 통계 (합산 통계)
-        student_stats_query = db.session.query(
-            User,
-            func.count(Answer.id).label('total'),
-            func.sum(case((Answer.is_correct == True, 1), else_=0)).label('correct')
-        ).join(Answer, User.id == Answer.user_id)\
-         .filter(User.username != 'admin')
-        
-        # 과목 및 학년 필터 적용
-        if selected_subject:
-            student_stats_query = student_stats_query.filter(Answer.subject == selected_subject)
-        if selected_grade:
-            student_stats_query = student_stats_query.filter(Answer.grade == selected_grade)
-        
-        # 학생 필터 적용
-        if selected_student_id:
-            student_stats_query = student_stats_query.filter(User.id == selected_student_id)
-        
-        student_stats = student_stats_query.group_by(User.id).all()
-        
-        # 2. 과목별 통계
-        subject_stats_query = db.session.query(
-            Answer.subject,
-            func.count(Answer.id).label('total_questions'),
-            func.sum(case((Answer.is_correct == True, 1), else_=0)).label('correct_answers'),
-            func.sum(case((Answer.is_correct == False, 1), else_=0)).label('incorrect_answers'),
-            func.round(func.sum(case((Answer.is_correct == True, 1), else_=0)) * 100.0 / func.count(Answer.id), 1).label('accuracy_rate'),
-            func.count(func.distinct(Answer.user_id)).label('unique_students')
-        )
-        
-        # 학생 필터와 학년 필터 적용
-        if selected_student_id:
-            subject_stats_query = subject_stats_query.filter(Answer.user_id == selected_student_id)
-        if selected_grade:
-            subject_stats_query = subject_stats_query.filter(Answer.grade == selected_grade)
-        
-        # 과목 필터 적용
-        if selected_subject:
-            subject_stats_query = subject_stats_query.filter(Answer.subject == selected_subject)
-        
-        subject_stats = subject_stats_query.group_by(Answer.subject).all()
-        
-        # 3. 학년별 통계
-        grade_stats_query = db.session.query(
-            Answer.grade,
-            func.count(Answer.id).label('total_questions'),
-            func.sum(case((Answer.is_correct == True, 1), else_=0)).label('correct_answers'),
-            func.sum(case((Answer.is_correct == False, 1), else_=0)).label('incorrect_answers'),
-            func.round(func.sum(case((Answer.is_correct == True, 1), else_=0)) * 100.0 / func.count(Answer.id), 1).label('accuracy_rate'),
-            func.count(func.distinct(Answer.user_id)).label('unique_students')
-        )
-        
-        # 학생 필터와 과목 필터 적용
-        if selected_student_id:
-            grade_stats_query = grade_stats_query.filter(Answer.user_id == selected_student_id)
-        if selected_subject:
-            grade_stats_query = grade_stats_query.filter(Answer.subject == selected_subject)
-        
-        # 학년 필터 적용
-        if selected_grade:
-            grade_stats_query = grade_stats_query.filter(Answer.grade == selected_grade)
-        
-        grade_stats = grade_stats_query.group_by(Answer.grade).all()
-        
-        # 필터 정보 문자열 생성
-        filter_info = []
-        if selected_student:
-            filter_info.append(f"학생: {selected_student.username}")
-        if selected_subject:
-            filter_info.append(f"과목: {selected_subject}")
-        if selected_grade:
-            filter_info.append(f"학년: {selected_grade}")
-        
-        filter_text = " / ".join(filter_info) if filter_info else "전체"
-        
-        # 통합된 리포트 템플릿 렌더링
-        html = render_template('stats_report.html',
-                             generated_at=datetime.utcnow(),
-                             report_type='complete',  # 모든 통계를 포함하는 새로운 타입
-                             selected_student=selected_student,
-                             selected_subject=selected_subject,
-                             selected_grade=selected_grade,
-                             filter_text=filter_text,
-                             student_stats=student_stats,
-                             subject_stats=subject_stats,
-                             grade_stats=grade_stats)
-        
-        response = make_response(html)
-        response.headers['Content-Type'] = 'text/html'
-        
-        # 파일명에 필터 정보 추가
-        filename_parts = []
-        if selected_student:
-            filename_parts.append(selected_student.username)
-        if selected_subject:
-            filename_parts.append(selected_subject)
-        if selected_grade:
-            filename_parts.append(selected_grade)
-        
-        filename_prefix = "_".join(filename_parts) if filename_parts else "all"
-        filename = f"statistics_report_{filename_prefix}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.html"
+        # 통합된 리포트 템플릿을 스트리밍 렌더링 (학생 수와 관계없이 메모리 사용량 일정)
+        context, filename = report_context('complete', selected_student_id, selected_subject, selected_grade,
+                                           start, end)
+        response = Response(stream_template('stats_report.html', **context), mimetype='text/html')
         response.headers['Content-Disposition'] = f'attachment; filename={filename}'
         return response
         
@@ -1417,6 +1604,172 @@ def download_statistics():
         flash('통계 다운로드 중 오류가 발생했습니다.', 'error')
         return redirect(url_for('admin_dashboard'))
 
+@app.route('/api/admin/reports', methods=['POST'])
+@login_required
+def start_report_job():
+    """보고서 생성 작업 시작 (type=complete|student|unit|subject|grade, 필터는 다운로드 경로와 같음)"""
+    if current_user.username != 'admin':
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    
+    data = request.get_json(silent=True) or request.form
+    report_type = data.get('type', 'complete')
+    if report_type not in REPORT_TYPES:
+        return jsonify({'error': f'지원하지 않는 보고서 종류: {report_type}'}), 400
+    try:
+        student_id = int(data['student_id']) if data.get('student_id') else None
+        for name in ('start', 'end'):
+            if data.get(name):
+                datetime.strptime(data[name], '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': '잘못된 필터 값입니다.'}), 400
+    params = {
+        'student_id': student_id,
+        'subject': data.get('subject') or None,
+        'grade': data.get('grade') or None,
+        'start': data.get('start') or None,
+        'end': data.get('end') or None
+    }
+    
+    # 대기 중인 답변까지 반영한 데이터 버전으로 작업 ID 결정
+    answer_recorder.flush()
+    status = report_jobs.submit(report_type, params, stats_rollup.data_version(db.session))
+    return jsonify(report_job_response(status)), 200 if status['status'] == 'done' else 202
+
+@app.route('/api/admin/reports/<job_id>')
+@login_required
+def report_job_status(job_id):
+    if current_user.username != 'admin':
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    
+    status = report_jobs.status(job_id)
+    if status is None:
+        return jsonify({'error': '보고서 작업을 찾을 수 없습니다.'}), 404
+    return jsonify(report_job_response(status))
+
+@app.route('/api/admin/reports/<job_id>/download')
+@login_required
+def download_report_job(job_id):
+    if current_user.username != 'admin':
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    
+    status = report_jobs.status(job_id)
+    if status is None or status['status'] == 'failed' or (
+            status['status'] == 'done' and not os.path.exists(report_jobs.artifact_path(job_id))):
+        return jsonify({'error': '보고서를 찾을 수 없습니다. 다시 생성해 주세요.'}), 404
+    if status['status'] != 'done':
+        return jsonify(report_job_response(status)), 202
+    return send_file(report_jobs.artifact_path(job_id), mimetype='text/html', as_attachment=True,
+                     download_name=status['filename'])
+
+def report_job_response(status):
+    response = {key: status.get(key) for key in ('job_id', 'report_type', 'status', 'error', 'size', 'elapsed_ms')}
+    response['status_url'] = url_for('report_job_status', job_id=status['job_id'])
+    if status['status'] == 'done':
+        response['download_url'] = url_for('download_report_job', job_id=status['job_id'])
+    return response
+
+def render_report(report_type, params, out):
+    """보고서 작업 스레드에서 보고서를 파일에 저장하고 다운로드 파일명 반환"""
+    start = datetime.strptime(params['start'], '%Y-%m-%d').date() if params.get('start') else None
+    end = datetime.strptime(params['end'], '%Y-%m-%d').date() if params.get('end') else None
+    with app.app_context():
+        context, filename = report_context(report_type, params.get('student_id'), params.get('subject'),
+                                           params.get('grade'), start, end)
+        for chunk in app.jinja_env.get_template('stats_report.html').generate(**context):
+            out.write(chunk)
+        return filename
+
+def report_context(report_type, student_id=None, subject=None, grade=None, start=None, end=None):
+    """보고서 종류별 stats_report.html 변수와 다운로드 파일명 (요청과 보고서 작업에서 함께 사용)"""
+    generated_at = datetime.utcnow()
+    timestamp = generated_at.strftime('%Y%m%d_%H%M%S')
+    selected_student = db.session.get(User, student_id) if student_id else None
+    context = {'generated_at': generated_at, 'report_type': report_type, 'selected_student': selected_student}
+    
+    if report_type == 'student':
+        context.update(student_stats=iter_student_stats(db.session, start=start, end=end),
+                       student_summary=student_summary(db.session, start=start, end=end))
+        return context, f"student_stats_{timestamp}.html"
+    
+    if report_type == 'unit':
+        context.update(unit_stats=stats_cache.load(db.session, student_id, start=start, end=end).by_unit)
+        return context, f"unit_stats_{timestamp}.html"
+    
+    # 과목별/학년별 통계와 학생별 합계는 한 번에 계산, 학생 행은 렌더링하면서 조금씩 읽음
+    stats = stats_cache.load(db.session, student_id, subject, grade, start, end)
+    if report_type == 'subject':
+        context.update(subject_stats=stats.by_subject)
+        return context, f"subject_stats_{timestamp}.html"
+    if report_type == 'grade':
+        context.update(grade_stats=stats.by_grade)
+        return context, f"grade_stats_{timestamp}.html"
+    if report_type != 'complete':
+        raise ValueError(f"지원하지 않는 보고서 종류: {report_type}")
+    
+    # 필터 정보 문자열 생성
+    filter_info = []
+    if selected_student:
+        filter_info.append(f"학생: {selected_student.username}")
+    if subject:
+        filter_info.append(f"과목: {subject}")
+    if grade:
+        filter_info.append(f"학년: {grade}")
+    if start or end:
+        filter_info.append(f"기간: {start or ''} ~ {end or ''}")
+    
+    context.update(report_type='complete',  # 모든 통계를 포함하는 새로운 타입
+                   selected_subject=subject,
+                   selected_grade=grade,
+                   filter_text=" / ".join(filter_info) if filter_info else "전체",
+                   student_stats=iter_student_stats(db.session, student_id, subject, grade, start, end),
+                   student_summary=student_summary(db.session, student_id, subject, grade, start, end),
+                   subject_stats=stats.by_subject,
+                   grade_stats=stats.by_grade)
+    
+    # 파일명에 필터 정보 추가
+    filename_parts = [part for part in (selected_student.username if selected_student else None, subject, grade) if part]
+    filename_prefix = "_".join(filename_parts) if filename_parts else "all"
+    return context, f"statistics_report_{filename_prefix}_{timestamp}.html"
+
+@app.route('/api/admin/answers/export')
+@login_required
+def export_answers():
+    """답변 원본을 CSV 또는 NDJSON으로 스트리밍 (format=csv|ndjson, gzip=1, start/end=YYYY-MM-DD)"""
+    if current_user.username != 'admin':
+        return jsonify({'error': '권한이 없습니다.'}), 403
+    
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': '지원하지 않는 형식입니다. (csv, ndjson)'}), 400
+    try:
+        start_at, end_before = answer_export.parse_date_range(request.args.get('start'), request.args.get('end'))
+    except ValueError:
+        return jsonify({'error': '날짜는 YYYY-MM-DD 형식이어야 합니다.'}), 400
+    
+    criteria = answer_export.answer_filters(
+        request.args.get('student_id', type=int),
+        request.args.get('subject'),
+        request.args.get('grade'),
+        start_at,
+        end_before
+    )
+    # 이 워커에서 아직 저장되지 않은 답변도 포함
+    answer_recorder.flush()
+    
+    to_chunks = answer_export.csv_chunks if export_format == 'csv' else answer_export.ndjson_chunks
+    chunks = to_chunks(answer_export.iter_answer_batches(db.session, criteria))
+    filename = f"answers_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    if request.args.get('gzip') == '1':
+        chunks = answer_export.gzip_chunks(chunks)
+        filename += '.gz'
+        mimetype = 'application/gzip'
+    
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename={filename}',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/admin/reset-database', methods=['GET', 'POST'])
 @login_required
 def reset_database():
@@ -1427,6 +1780,8 @@ def reset_database():
     if request.method == 'POST':
         try:
             # 모든 답변 기록 삭제
+            stats_rollup.clear(db.session)
+            item_analysis.clear(db.session)
             Answer.query.delete()
             
             # 관리자를 제외한 모든 사용자 삭제
@@ -1457,47 +1812,19 @@ def download_subject_stats():
         flash('관리자 권한이 필요합니다.', 'error')
         return redirect(url_for('login'))
     
+    selected_student_id = request.args.get('student_id', type=int)
+    selected_subject = request.args.get('subject')
+    selected_grade = request.args.get('grade')
+    start, end = page_date_range()
+    
     try:
-        # 과목별 통계 데이터 조회
-        subject_stats_query = db.session.query(
-            Answer.subject,
-            func.count(Answer.id).label('total_questions'),
-            func.sum(case((Answer.is_correct == True, 1), else_=0)).label('correct_answers'),
-            func.sum(case((Answer.is_correct == False, 1), else_=0)).label('incorrect_answers'),
-            func.round(func.sum(case((Answer.is_correct == True, 1), else_=0)) * 100.0 / func.count(Answer.id), 1).label('accuracy_rate'),
-            func.count(func.distinct(Answer.user_id)).label('unique_students')
-        )
-        
-        # 학생 필터와 학년 필터만 적용 (과목 필터는 제외)
-        if selected_student_id:
-            subject_stats_query = subject_stats_query.filter(Answer.user_id == selected_student_id)
-        if selected_grade:
-            subject_stats_query = subject_stats_query.filter(Answer.grade == selected_grade)
-        
-        # 과목 필터가 있는 경우, 해당 과목만 표시
-        if selected_subject:
-            subject_stats_query = subject_stats_query.filter(Answer.subject == selected_subject)
-        
-        subject_stats = subject_stats_query.group_by(Answer.subject).all()
-        
-        # 결과 가공
-        subject_stats_data = [{
-            'subject': stat.subject or '미분류',
-            'total_questions': stat.total_questions,
-            'correct_answers': stat.correct_answers,
-            'incorrect_answers': stat.incorrect_answers,
-            'accuracy_rate': stat.accuracy_rate or 0,
-            'unique_students': stat.unique_students
-        } for stat in subject_stats]
-        
-        html = render_template('stats_report.html',
-                             generated_at=datetime.utcnow(),
-                             report_type='subject',
-                             subject_stats=subject_stats_data)
+        # 과목별 통계 (학생/학년 필터, 과목 필터가 있으면 해당 과목만)
+        context, filename = report_context('subject', selected_student_id, selected_subject, selected_grade, start, end)
+        html = render_template('stats_report.html', **context)
         
         response = make_response(html)
         response.headers['Content-Type'] = 'text/html'
-        response.headers['Content-Disposition'] = f'attachment; filename=subject_stats_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.html'
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
         return response
     except Exception as e:
         print(f"과목별 통계 다운로드 오류: {e}")
@@ -1511,47 +1838,19 @@ def download_grade_stats():
         flash('관리자 권한이 필요합니다.', 'error')
         return redirect(url_for('login'))
     
+    selected_student_id = request.args.get('student_id', type=int)
+    selected_subject = request.args.get('subject')
+    selected_grade = request.args.get('grade')
+    start, end = page_date_range()
+    
     try:
-        # 학년별 통계 데이터 조회
-        grade_stats_query = db.session.query(
-            Answer.grade,
-            func.count(Answer.id).label('total_questions'),
-            func.sum(case((Answer.is_correct == True, 1), else_=0)).label('correct_answers'),
-            func.sum(case((Answer.is_correct == False, 1), else_=0)).label('incorrect_answers'),
-            func.round(func.sum(case((Answer.is_correct == True, 1), else_=0)) * 100.0 / func.count(Answer.id), 1).label('accuracy_rate'),
-            func.count(func.distinct(Answer.user_id)).label('unique_students')
-        )
-        
-        # 학생 필터와 과목 필터만 적용 (학년 필터는 제외)
-        if selected_student_id:
-            grade_stats_query = grade_stats_query.filter(Answer.user_id == selected_student_id)
-        if selected_subject:
-            grade_stats_query = grade_stats_query.filter(Answer.subject == selected_subject)
-        
-        # 학년 필터가 있는 경우, 해당 학년만 표시
-        if selected_grade:
-            grade_stats_query = grade_stats_query.filter(Answer.grade == selected_grade)
-        
-        grade_stats = grade_stats_query.group_by(Answer.grade).all()
-        
-        # 결과 가공
-        grade_stats_data = [{
-            'grade': stat.grade or '미분류',
-            'total_questions': stat.total_questions,
-            'correct_answers': stat.correct_answers,
-            'incorrect_answers': stat.incorrect_answers,
-            'accuracy_rate': stat.accuracy_rate or 0,
-            'unique_students': stat.unique_students
-        } for stat in grade_stats]
-        
-        html = render_template('stats_report.html',
-                             generated_at=datetime.utcnow(),
-                             report_type='grade',
-                             grade_stats=grade_stats_data)
+        # 학년별 통계 (학생/과목 필터, 학년 필터가 있으면 해당 학년만)
+        context, filename = report_context('grade', selected_student_id, selected_subject, selected_grade, start, end)
+        html = render_template('stats_report.html', **context)
         
         response = make_response(html)
         response.headers['Content-Type'] = 'text/html'
-        response.headers['Content-Disposition'] = f'attachment; filename=grade_stats_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.html'
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
         return response
     except Exception as e:
         print(f"학년별 통계 다운로드 오류: {e}")
@@ -1589,6 +1888,8 @@ def update_categories():
             import json
             with open('categories.json', 'w', encoding='utf-8') as f:
                 json.dump(categories, f, ensure_ascii=False, indent=4)
+            category_store.seed(db.session)
+            db.session.commit()
             
             flash(f'{len(categories)}개의 카테고리가 성공적으로 업데이트되었습니다.', 'success')
             return redirect(url_for('admin_dashboard'))
@@ -1612,5 +1913,59 @@ def get_categories():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """답변 테이블 전체로 통계 집계 테이블을 다시 계산"""
+    answer_recorder.flush()
+    count = stats_rollup.rebuild(db.session)
+    db.session.commit()
+    print(f"답변 집계 테이블을 다시 만들었습니다: {count}개 항목")
+
+@app.cli.command('rebuild-item-stats')
+def rebuild_item_stats_command():
+    """답변 테이블 전체로 문항 통계(난이도/변별도)를 다시 계산"""
+    answer_recorder.flush()
+    count = item_analysis.rebuild(db.session)
+    db.session.commit()
+    print(f"문항 통계를 다시 만들었습니다: {count}개 문항")
+
+@app.cli.command('migrate-questions')
+def migrate_questions_command():
+    """답변마다 저장된 문제 내용을 Question 테이블로 옮김 (중단되면 다시 실행해 이어서 처리)"""
+    answer_recorder.flush()
+    count = question_store.migrate(db.session)
+    print(f"문제 내용을 옮겼습니다: 답변 {count}건, 남은 답변 {question_store.pending_count(db.session)}건")
+
+@app.cli.command('db-status')
+def db_status_command():
+    """스키마 마이그레이션별 적용 여부 출력"""
+    applied = schema_migrations.applied_versions(db.engine)
+    for migration in schema_migrations.MIGRATIONS:
+        print(f"{migration.version:>3} {'적용' if migration.version in applied else '대기'} {migration.name}")
+
+@app.cli.command('db-upgrade')
+def db_upgrade_command():
+    """적용하지 않은 스키마 마이그레이션 실행"""
+    versions = schema_migrations.upgrade(db.engine)
+    print(f"스키마 마이그레이션을 적용했습니다: {versions}" if versions else "적용할 스키마 마이그레이션이 없습니다")
+
+@app.cli.command('migrate-categories')
+def migrate_categories_command():
+    """답변마다 저장된 분류 문자열을 Category 테이블로 옮김 (중단되면 다시 실행해 이어서 처리)"""
+    answer_recorder.flush()
+    count = category_store.migrate(db.session)
+    print(f"분류를 옮겼습니다: 답변 {count}건, 남은 답변 {category_store.pending_count(db.session)}건")
+
+@app.cli.command('standardize-units')
+@click.option('--dry-run', is_flag=True, help='변경하지 않고 규칙별 대상 건수만 출력')
+def standardize_units_command(dry_run):
+    """매핑 파일의 규칙으로 답변 분류(과목/학년/단원) 표준화 (중단되면 다시 실행해 이어서 처리)"""
+    answer_recorder.flush()
+    rules = unit_normalizer.load_rules()
+    results = unit_normalizer.dry_run(db.session, rules) if dry_run else unit_normalizer.run(db.session, rules)
+    for result in results:
+        print(f"{result['name']}: {result['count']}건")
+    print(f"{'대상' if dry_run else '수정'} 합계: {sum(result['count'] for result in results)}건")
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,283 @@
+"""퀴즈/채팅 API용 비동기(ASGI) 서빙 진입점
+
+/api/chat, /api/quiz/new 는 asyncio 기반으로 처리하고, 나머지 경로(관리자 페이지 등)는
+기존 Flask 앱으로 그대로 전달합니다.
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+import re
+import logging
+import traceback
+from contextlib import asynccontextmanager
+from itsdangerous import BadSignature
+from openai import AsyncOpenAI
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route, Mount
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app as flask_app, api_key, ScienceQuizBot, current_quiz_store, question_bank, quiz_prefetcher
+from assistant_runner import AsyncAssistantRunner, RunFailedError
+from models import User
+
+logger = logging.getLogger(__name__)
+
+# 비동기 OpenAI 클라이언트
+async_client = AsyncOpenAI(
+    api_key=api_key,
+    base_url="https://api.openai.com/v1"
+)
+
+
+def async_database_url(url):
+    """Flask 설정의 DB URL을 비동기 드라이버 URL로 변환"""
+    if url.startswith('sqlite:'):
+        return url.replace('sqlite:', 'sqlite+aiosqlite:', 1)
+    if url.startswith('postgresql://'):
+        return url.replace('postgresql://', 'postgresql+asyncpg://', 1)
+    return url
+
+
+async_engine = create_async_engine(
+    async_database_url(flask_app.config['SQLALCHEMY_DATABASE_URI']),
+    pool_pre_ping=True
+)
+AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+class AsyncScienceQuizBot(ScienceQuizBot):
+    """ScienceQuizBot의 프롬프트/파싱/저장 로직을 그대로 쓰는 비동기 버전"""
+
+    def __init__(self):
+        super().__init__()
+        self.runner = AsyncAssistantRunner(async_client, self.assistant_id)
+
+    async def get_quiz(self, session, thread_id, question_count=1, main_unit=None, sub_unit=None, question_types=None, unit=None, user_id=None):
+        logger.info(f"[async] 문제 출제 요청: thread_id={thread_id}, 문제 수={question_count}, 과목={main_unit}, 학년={sub_unit}")
+        try:
+            if not thread_id:
+                thread = await async_client.beta.threads.create()
+                thread_id = thread.id
+
+            quiz_request = self._prepare_quiz_request(
+                main_unit, sub_unit, question_types, question_count, unit, user_id or thread_id
+            )
+            # 세션 저장소(SQLite/Redis) 읽기/쓰기는 이벤트 루프를 막지 않도록 스레드 풀에서 실행
+            await run_in_threadpool(quiz_prefetcher.register, thread_id, quiz_request)
+
+            # 이벤트 루프를 막지 않도록 생성이 끝난 세트만 사용
+            quiz_data = await run_in_threadpool(self._serve_from_prefetch, thread_id, quiz_request, wait=False)
+            if quiz_data:
+                return quiz_data
+
+            quiz_data = await run_in_threadpool(self._serve_from_cache, thread_id, quiz_request)
+            if quiz_data:
+                return quiz_data
+
+            banked_questions = await question_bank.take_async(
+                session, quiz_request['subject'], quiz_request['grade'],
+                quiz_request['question_types'], question_count, quiz_request['unit']
+            )
+            quiz_data = await run_in_threadpool(self._serve_from_bank, thread_id, quiz_request, banked_questions)
+            if quiz_data:
+                return quiz_data
+
+            if self.planner.should_split(question_count):
+                try:
+                    questions = await self.planner.generate_first_async(
+                        self.generate_batch_async, quiz_request['subject'], quiz_request['grade'],
+                        quiz_request['question_types'], question_count, quiz_request['unit'],
+                        **self._fan_out_callbacks(thread_id, quiz_request)
+                    )
+                    return {'type': 'QUIZ', 'questions': questions, 'thread_id': thread_id}
+                except Exception as e:
+                    logger.warning(f"[async] 분할 생성 실패, 한 번에 생성: {str(e)}")
+
+            try:
+                response_message = await self.runner.run(thread_id, quiz_request['prompt'])
+            except RunFailedError as e:
+                return {"type": "ERROR", "message": f"응답 생성 실패: {e.status}"}
+            return await run_in_threadpool(self._quiz_from_response, thread_id, quiz_request, response_message)
+
+        except Exception as e:
+            logger.error(f"[async] get_quiz 오류: {str(e)}")
+            traceback.print_exc()
+            return {"type": "ERROR", "message": f"퀴즈 생성 중 오류가 발생했습니다: {str(e)}"}
+
+    async def generate_batch_async(self, subject, grade, question_types, question_count, unit=None):
+        thread = await async_client.beta.threads.create()
+        prompt = self._build_quiz_prompt(subject, grade, question_types, question_count, unit)
+        return self._questions_from_response(await self.runner.run(thread.id, prompt))
+
+    async def check_answer(self, message, thread_id, user_id=None):
+        logger.info(f"[async] 답변 평가 요청: thread_id={thread_id}, 답변={message}")
+        try:
+            current_quiz = await run_in_threadpool(current_quiz_store.get, thread_id)
+            if current_quiz is None:
+                return {"type": "ERROR", "message": "퀴즈 정보를 찾을 수 없습니다. 새로운 문제를 먼저 요청해주세요."}
+            quiz = current_quiz.get('quiz', {})
+
+            result = self.grader.grade(message, quiz)
+            if result is None:
+                try:
+                    response_message = await self.runner.run(thread_id, self._build_grading_prompt(quiz, message))
+                    result = self._parse_answer_response(response_message, message, quiz)
+                except Exception as e:
+                    logger.warning(f"[async] GPT 답변 평가 오류: {str(e)}")
+                    result = self._create_default_answer_response(message, quiz)
+
+            self._record_answer(user_id, current_quiz, message, result)
+            await run_in_threadpool(self._add_next_question_if_available, thread_id, current_quiz, result)
+            await run_in_threadpool(self._prefetch_if_due, thread_id, current_quiz)
+            return result
+
+        except Exception as e:
+            logger.error(f"[async] check_answer 오류: {str(e)}")
+            traceback.print_exc()
+            return {"type": "ERROR", "message": f"답변 확인 중 오류가 발생했습니다: {str(e)}"}
+
+    async def get_chat_response(self, message, thread_id):
+        try:
+            response_message = await self.runner.run(thread_id, message)
+            return {"type": "CHAT", "message": response_message, "thread_id": thread_id}
+        except Exception as e:
+            logger.error(f"[async] 대화 응답 오류: {str(e)}")
+            return {"type": "ERROR", "message": f"오류가 발생했습니다: {str(e)}"}
+
+
+async_quiz_bot = AsyncScienceQuizBot()
+
+
+def session_user_id(request):
+    """Flask 로그인 세션 쿠키에서 사용자 ID를 읽음"""
+    cookie = request.cookies.get(flask_app.config.get('SESSION_COOKIE_NAME', 'session'))
+    if not cookie:
+        return None
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    try:
+        data = serializer.loads(cookie, max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return None
+    return data.get('_user_id')
+
+
+async def load_current_user(request, session):
+    user_id = session_user_id(request)
+    if not user_id:
+        return None
+    return await session.get(User, int(user_id))
+
+
+def login_required_response():
+    return JSONResponse({"type": "ERROR", "message": "이 페이지에 접근하려면 로그인이 필요합니다."}, status_code=401)
+
+
+async def chat(request):
+    async with AsyncSession() as session:
+        user = await load_current_user(request, session)
+        if user is None:
+            return login_required_response()
+
+        try:
+            data = await request.json()
+            message = data.get('message', '')
+            thread_id = data.get('thread_id')
+            is_quiz_answer = data.get('is_quiz_answer', False)
+
+            subject = data.get('subject')
+            grade = data.get('grade')
+            unit = data.get('unit')
+            question_types = data.get('question_types', ['객관식'])
+
+            if not thread_id:
+                thread = await async_client.beta.threads.create()
+                thread_id = thread.id
+
+            quiz_request_pattern = r'(\d+)문제\s*(출제|내줘|주세요|풀고싶어요|풀래요|풀어볼래요)'
+            match = re.search(quiz_request_pattern, message)
+
+            if match:
+                result = await async_quiz_bot.get_quiz(
+                    session,
+                    thread_id=thread_id,
+                    question_count=int(match.group(1)),
+                    main_unit=subject,
+                    sub_unit=grade,
+                    question_types=question_types,
+                    unit=unit,
+                    user_id=user.id
+                )
+            elif is_quiz_answer:
+                result = await async_quiz_bot.check_answer(message, thread_id, user.id)
+            else:
+                result = await async_quiz_bot.get_chat_response(message, thread_id)
+
+            return JSONResponse(result)
+
+        except Exception as e:
+            logger.error(f"[async] Error in chat API: {str(e)}")
+            traceback.print_exc()
+            return JSONResponse({"type": "ERROR", "message": f"오류가 발생했습니다: {str(e)}"})
+
+
+async def new_quiz(request):
+    async with AsyncSession() as session:
+        user = await load_current_user(request, session)
+        if user is None:
+            return login_required_response()
+
+        try:
+            thread = await async_client.beta.threads.create()
+            thread_id = thread.id
+
+            data = await request.json() if await request.body() else {}
+            message = (data.get('message') or '테스트 시작').strip()
+            question_count = 1
+            if '문제 출제' in message:
+                if '5문제' in message:
+                    question_count = 5
+                elif '10문제' in message:
+                    question_count = 10
+
+            response = await async_quiz_bot.get_quiz(
+                session, thread_id, question_count, data.get('main_unit'), data.get('sub_unit'), user_id=user.id
+            )
+            if response.get('type') != 'QUIZ' or not response.get('questions'):
+                raise ValueError("Invalid quiz format")
+
+            return JSONResponse({
+                'type': 'QUIZ',
+                'quiz': response['questions'][0],
+                'progress': {
+                    'current': 1,
+                    'total': len(response['questions'])
+                },
+                'thread_id': thread_id
+            })
+
+        except Exception as e:
+            logger.error(f"[async] Error in new_quiz: {str(e)}")
+            return JSONResponse({
+                'type': 'ERROR',
+                'message': '퀴즈를 생성하는 중 오류가 발생했습니다.'
+            }, status_code=500)
+
+
+@asynccontextmanager
+async def lifespan(application):
+    yield
+    await async_engine.dispose()
+    await async_client.close()
+
+
+application = Starlette(
+    routes=[
+        Route('/api/chat', chat, methods=['POST']),
+        Route('/api/quiz/new', new_quiz, methods=['POST']),
+        # 관리자 페이지 등 나머지 경로는 기존 Flask 앱에서 처리
+        Mount('/', app=WsgiToAsgi(flask_app)),
+    ],
+    lifespan=lifespan
+)
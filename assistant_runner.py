@@ -0,0 +1,286 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 실행(run) 대기 정책 - 모든 Assistant 호출이 같은 값을 사용
+RUN_TIMEOUT_SECONDS = float(os.environ.get('ASSISTANT_RUN_TIMEOUT', 60))
+
+# 스트리밍을 사용할 수 없을 때의 폴링 간격 (처음에는 빠르게, 점점 느리게)
+POLL_INITIAL_INTERVAL = 0.2
+POLL_MAX_INTERVAL = 2.0
+POLL_BACKOFF = 1.5
+
+FAILED_STATUSES = ('failed', 'cancelled', 'expired', 'incomplete', 'requires_action')
+
+# 스트림이 끊겼을 때 같은 요청의 실행을 찾기 위해 실행 metadata에 붙이는 요청 ID 키
+REQUEST_ID_KEY = 'request_id'
+# 스트림이 끊겼을 때 확인할 최근 실행 수
+RUN_LOOKUP_LIMIT = 5
+
+
+class RunTimeoutError(TimeoutError):
+    """Assistant 실행이 제한 시간 안에 끝나지 않았을 때 발생하는 예외"""
+    pass
+
+
+class RunFailedError(Exception):
+    """Assistant 실행이 실패 상태로 끝났을 때 발생하는 예외"""
+
+    def __init__(self, status):
+        super().__init__(f"응답 생성 실패: {status}")
+        self.status = status
+
+
+class AssistantRunner:
+    """스레드에 메시지를 추가하고 실행 완료 후 최신 Assistant 응답을 반환"""
+
+    def __init__(self, client, assistant_id, timeout=None, use_streaming=True):
+        self.client = client
+        self.assistant_id = assistant_id
+        self.timeout = timeout or RUN_TIMEOUT_SECONDS
+        self.use_streaming = use_streaming
+
+    def run(self, thread_id, prompt=None, on_text_delta=None):
+        """실행을 시작하고 완료될 때까지 기다린 뒤 응답 텍스트를 반환
+
+        on_text_delta가 주어지면 스트리밍 중 생성되는 텍스트 조각마다 호출됩니다.
+        """
+        deadline = time.monotonic() + self.timeout
+        additional_messages = [{"role": "user", "content": prompt}] if prompt else None
+
+        params = self._run_params(thread_id, additional_messages)
+
+        runs = self.client.beta.threads.runs
+        if self.use_streaming and hasattr(runs, 'stream'):
+            return self._run_streaming(params, deadline, on_text_delta)
+
+        run = runs.create(**params)
+        self._wait_for_run(thread_id, run.id, deadline)
+        return self._latest_assistant_message(thread_id, run.id)
+
+    def _run_params(self, thread_id, additional_messages):
+        """실행 생성 인자 (스트림이 끊겼을 때 이 요청의 실행만 찾도록 metadata에 요청 ID를 붙임)"""
+        params = {"thread_id": thread_id, "assistant_id": self.assistant_id,
+                  "metadata": {REQUEST_ID_KEY: uuid.uuid4().hex}}
+        if additional_messages:
+            params["additional_messages"] = additional_messages
+        return params
+
+    def _run_streaming(self, params, deadline, on_text_delta):
+        thread_id = params["thread_id"]
+        run_id = None
+        chunks = []
+        try:
+            with self.client.beta.threads.runs.stream(timeout=self.timeout, **params) as stream:
+                for event in stream:
+                    if time.monotonic() > deadline:
+                        raise RunTimeoutError("GPT 응답 시간 초과")
+
+                    run_id = _consume_event(event, chunks, on_text_delta) or run_id
+        except RunTimeoutError:
+            self._cancel_run(thread_id, run_id)
+            raise
+        except RunFailedError as e:
+            if e.status == 'requires_action':
+                self._cancel_run(thread_id, run_id)
+            raise
+        except Exception as e:
+            # 스트림 연결이 끊긴 경우 이미 생성된 실행은 폴링으로 마무리
+            logger.warning(f"스트리밍 실행 오류, 폴링으로 전환: {str(e)}")
+            if run_id is None:
+                run_id = self._find_started_run(thread_id, params["metadata"])
+            if run_id is None:
+                run_id = self.client.beta.threads.runs.create(**params).id
+            self._wait_for_run(thread_id, run_id, deadline)
+            return self._latest_assistant_message(thread_id, run_id)
+
+        if chunks:
+            return "".join(chunks)
+        return self._latest_assistant_message(thread_id, run_id)
+
+    def _wait_for_run(self, thread_id, run_id, deadline):
+        """적응형 간격으로 실행 상태를 확인"""
+        interval = POLL_INITIAL_INTERVAL
+        while True:
+            run = self.client.beta.threads.runs.retrieve(
+                thread_id=thread_id,
+                run_id=run_id
+            )
+            if run.status == 'completed':
+                return run
+            if run.status == 'requires_action':
+                # 도구 호출 결과를 제출하지 않으므로 스레드가 잠기지 않도록 취소
+                self._cancel_run(thread_id, run_id)
+            if run.status in FAILED_STATUSES:
+                raise RunFailedError(run.status)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._cancel_run(thread_id, run_id)
+                raise RunTimeoutError("GPT 응답 시간 초과")
+
+            time.sleep(min(interval, remaining))
+            interval = min(interval * POLL_BACKOFF, POLL_MAX_INTERVAL)
+
+    def _find_started_run(self, thread_id, metadata):
+        """스트림이 끊기기 전에 이 요청으로 이미 생성된 실행이 있으면 그 ID를 반환"""
+        try:
+            runs = self.client.beta.threads.runs.list(thread_id=thread_id, order="desc", limit=RUN_LOOKUP_LIMIT)
+        except Exception as e:
+            logger.warning(f"실행 목록 조회 실패: {str(e)}")
+            return None
+        return _started_run_id(runs.data, metadata)
+
+    def _latest_assistant_message(self, thread_id, run_id=None):
+        """가장 최근 Assistant 메시지 하나만 조회"""
+        params = {"thread_id": thread_id, "order": "desc", "limit": 1}
+        if run_id:
+            params["run_id"] = run_id
+        messages = self.client.beta.threads.messages.list(**params)
+        if not messages.data:
+            raise ValueError("Assistant 응답 메시지가 없습니다")
+        return message_text(messages.data[0])
+
+    def _cancel_run(self, thread_id, run_id):
+        # 시간 초과된 실행이 스레드를 계속 점유하지 않도록 취소
+        if not run_id:
+            return
+        try:
+            self.client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+        except Exception as e:
+            logger.warning(f"실행 취소 실패: {str(e)}")
+
+
+class AsyncAssistantRunner(AssistantRunner):
+    """AsyncOpenAI 클라이언트용 실행기 (ASGI 서빙 경로에서 사용)"""
+
+    async def run(self, thread_id, prompt=None, on_text_delta=None):
+        deadline = time.monotonic() + self.timeout
+        additional_messages = [{"role": "user", "content": prompt}] if prompt else None
+
+        params = self._run_params(thread_id, additional_messages)
+
+        runs = self.client.beta.threads.runs
+        if self.use_streaming and hasattr(runs, 'stream'):
+            return await self._run_streaming(params, deadline, on_text_delta)
+
+        run = await runs.create(**params)
+        await self._wait_for_run(thread_id, run.id, deadline)
+        return await self._latest_assistant_message(thread_id, run.id)
+
+    async def _run_streaming(self, params, deadline, on_text_delta):
+        thread_id = params["thread_id"]
+        run_id = None
+        chunks = []
+        try:
+            async with self.client.beta.threads.runs.stream(timeout=self.timeout, **params) as stream:
+                async for event in stream:
+                    if time.monotonic() > deadline:
+                        raise RunTimeoutError("GPT 응답 시간 초과")
+
+                    run_id = _consume_event(event, chunks, on_text_delta) or run_id
+        except RunTimeoutError:
+            await self._cancel_run(thread_id, run_id)
+            raise
+        except RunFailedError as e:
+            if e.status == 'requires_action':
+                await self._cancel_run(thread_id, run_id)
+            raise
+        except Exception as e:
+            logger.warning(f"스트리밍 실행 오류, 폴링으로 전환: {str(e)}")
+            if run_id is None:
+                run_id = await self._find_started_run(thread_id, params["metadata"])
+            if run_id is None:
+                run_id = (await self.client.beta.threads.runs.create(**params)).id
+            await self._wait_for_run(thread_id, run_id, deadline)
+            return await self._latest_assistant_message(thread_id, run_id)
+
+        if chunks:
+            return "".join(chunks)
+        return await self._latest_assistant_message(thread_id, run_id)
+
+    async def _wait_for_run(self, thread_id, run_id, deadline):
+        interval = POLL_INITIAL_INTERVAL
+        while True:
+            run = await self.client.beta.threads.runs.retrieve(
+                thread_id=thread_id,
+                run_id=run_id
+            )
+            if run.status == 'completed':
+                return run
+            if run.status == 'requires_action':
+                await self._cancel_run(thread_id, run_id)
+            if run.status in FAILED_STATUSES:
+                raise RunFailedError(run.status)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                await self._cancel_run(thread_id, run_id)
+                raise RunTimeoutError("GPT 응답 시간 초과")
+
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * POLL_BACKOFF, POLL_MAX_INTERVAL)
+
+    async def _find_started_run(self, thread_id, metadata):
+        try:
+            runs = await self.client.beta.threads.runs.list(thread_id=thread_id, order="desc", limit=RUN_LOOKUP_LIMIT)
+        except Exception as e:
+            logger.warning(f"실행 목록 조회 실패: {str(e)}")
+            return None
+        return _started_run_id(runs.data, metadata)
+
+    async def _latest_assistant_message(self, thread_id, run_id=None):
+        params = {"thread_id": thread_id, "order": "desc", "limit": 1}
+        if run_id:
+            params["run_id"] = run_id
+        messages = await self.client.beta.threads.messages.list(**params)
+        if not messages.data:
+            raise ValueError("Assistant 응답 메시지가 없습니다")
+        return message_text(messages.data[0])
+
+    async def _cancel_run(self, thread_id, run_id):
+        if not run_id:
+            return
+        try:
+            await self.client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+        except Exception as e:
+            logger.warning(f"실행 취소 실패: {str(e)}")
+
+
+def _started_run_id(runs, metadata):
+    """같은 요청 ID로 생성된 실행의 ID를 반환 (이전 요청의 실행은 이어받지 않음)"""
+    for run in runs or []:
+        if (getattr(run, 'metadata', None) or {}).get(REQUEST_ID_KEY) == metadata[REQUEST_ID_KEY]:
+            return run.id
+    return None
+
+
+def _consume_event(event, chunks, on_text_delta):
+    """스트리밍 이벤트 처리 (실행 생성 이벤트면 실행 ID 반환)"""
+    if event.event == 'thread.run.created':
+        return event.data.id
+    if event.event == 'thread.message.delta':
+        for part in event.data.delta.content or []:
+            text = getattr(part, 'text', None)
+            if text is not None and text.value:
+                chunks.append(text.value)
+                if on_text_delta:
+                    on_text_delta(text.value)
+    elif event.event in ('thread.run.failed', 'thread.run.cancelled', 'thread.run.expired',
+                         'thread.run.incomplete', 'thread.run.requires_action'):
+        raise RunFailedError(event.data.status)
+    return None
+
+
+def message_text(message):
+    """메시지 객체에서 텍스트 내용만 이어 붙여 반환"""
+    parts = []
+    for content in message.content:
+        text = getattr(content, 'text', None)
+        if text is not None:
+            parts.append(text.value)
+    return "".join(parts)
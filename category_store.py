@@ -0,0 +1,157 @@
+"""과목/학년/단원 분류 저장소 (Category 테이블)
+
+답변과 집계 테이블은 분류 문자열 대신 Category의 정수 ID를 저장하므로 통계는 작은 정수 키로 묶고
+분류 이름은 결과를 보여 줄 때만 Category에서 붙입니다. Category는 시작할 때 categories.json으로 채우고,
+목록에 없는 분류는 답변을 저장할 때 표준화 규칙(unit_mappings.json)을 적용한 이름으로 추가하므로 표기 차이가 쌓이지 않습니다.
+이전 버전의 답변(분류 문자열, 더 이전의 main_unit/sub_unit)은 청크 단위로 옮기며, 중단되면 남은 답변부터 이어서 처리합니다.
+
+    flask --app app migrate-categories
+"""
+import os
+import json
+import logging
+from sqlalchemy import select, update, insert, func, inspect, text, tuple_
+from models import Answer, AnswerRollup, AnswerBucket, Category, ItemStat
+from stats_rollup import APPLY_CHUNK_SIZE, _dialect_insert
+import stats_rollup
+import unit_normalizer
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES_PATH = 'categories.json'
+# 한 번에 옮기고 커밋할 답변 수
+CATEGORY_MIGRATE_CHUNK_SIZE = int(os.environ.get('CATEGORY_MIGRATE_CHUNK_SIZE', 1000))
+
+# 분류 이름을 문자열로 저장하던 이전 테이블 (옮길 때 비우고 다시 계산)
+_DERIVED_TABLES = (AnswerRollup, AnswerBucket, ItemStat)
+
+_rules = {'mtime': None, 'rules': []}
+
+
+def category_key(subject=None, grade=None, unit=None):
+    """분류 키 (분류가 없는 값은 빈 문자열)"""
+    return (subject or '', grade or '', unit or '')
+
+
+def mapping_rules():
+    """답변 저장 시 적용할 표준화 규칙 (매핑 파일이 바뀌면 다시 읽고, 읽을 수 없으면 규칙 없이 저장)"""
+    try:
+        mtime = os.path.getmtime(unit_normalizer.UNIT_MAPPINGS_PATH)
+    except OSError:
+        return []
+    if mtime != _rules['mtime']:
+        try:
+            rules = unit_normalizer.load_rules(unit_normalizer.UNIT_MAPPINGS_PATH)
+        except (OSError, ValueError) as e:
+            logger.error(f"표준화 규칙 로드 실패: {str(e)}")
+            rules = []
+        _rules.update(mtime=mtime, rules=rules)
+    return _rules['rules']
+
+
+def intern(session, keys):
+    """(과목, 학년, 단원) 분류를 Category에 저장(이미 있으면 재사용)하고 {분류: category_id}를 반환"""
+    keys = list(dict.fromkeys(keys))
+    dialect_insert = _dialect_insert(session)
+    ids = {}
+    for offset in range(0, len(keys), APPLY_CHUNK_SIZE):
+        chunk = keys[offset:offset + APPLY_CHUNK_SIZE]
+        values = [dict(zip(('subject', 'grade', 'unit'), key)) for key in chunk]
+        in_chunk = tuple_(Category.subject, Category.grade, Category.unit).in_(chunk)
+        if dialect_insert is not None:
+            # 다른 워커가 같은 분류를 동시에 저장해도 충돌하지 않음
+            session.execute(dialect_insert(Category).values(values).on_conflict_do_nothing(
+                index_elements=['subject', 'grade', 'unit']))
+        else:
+            existing = set(session.execute(select(Category.subject, Category.grade, Category.unit).where(in_chunk)))
+            missing = [value for value, key in zip(values, chunk) if key not in existing]
+            if missing:
+                session.execute(insert(Category), missing)
+        ids.update((tuple(row[:3]), row[3]) for row in session.execute(
+            select(Category.subject, Category.grade, Category.unit, Category.id).where(in_chunk)
+        ))
+    return ids
+
+
+def seed(session, path=CATEGORIES_PATH):
+    """categories.json의 분류를 Category에 추가하고 분류 수를 반환 (파일이 없으면 0)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            categories = json.load(f)
+    except FileNotFoundError:
+        return 0
+    keys = [category_key(item.get('subject'), item.get('grade'), item.get('unit')) for item in categories]
+    intern(session, keys)
+    return len(set(keys))
+
+
+def attach(session, rows):
+    """답변 dict 목록에 표준화한 분류의 category_id를 붙임 (분류 문자열은 비움)"""
+    rules = mapping_rules()
+    keys = [unit_normalizer.canonical_key(category_key(row.get('subject'), row.get('grade'), row.get('unit')), rules)
+            for row in rows]
+    ids = intern(session, keys)
+    return [dict(row, category_id=ids[key], subject=None, grade=None, unit=None) for row, key in zip(rows, keys)]
+
+
+def answer_criteria(subject=None, grade=None, unit=None):
+    """분류 이름 필터를 Answer 조건 목록으로 변환"""
+    conditions = [getattr(Category, name) == value
+                  for name, value in (('subject', subject), ('grade', grade), ('unit', unit)) if value]
+    if not conditions:
+        return []
+    return [Answer.category_id.in_(select(Category.id).where(*conditions))]
+
+
+def pending_count(session):
+    """아직 Category로 옮기지 않은 답변 수"""
+    return session.scalar(select(func.count(Answer.id)).where(Answer.category_id.is_(None)))
+
+
+def _legacy_key(subject, grade, unit, main_unit, sub_unit):
+    """이전 답변의 분류 (분류 문자열이 없으면 대단원/소단원을 과목/단원으로 사용, 단원별 통계와 같은 기준)"""
+    if subject or grade or unit:
+        return category_key(subject, grade, unit)
+    return category_key(main_unit, None, sub_unit)
+
+
+def migrate(session, chunk_size=CATEGORY_MIGRATE_CHUNK_SIZE):
+    """이전 답변의 분류를 Category로 옮기고 옮긴 답변 수를 반환 (청크마다 집계에 더하고 커밋)"""
+    rules = mapping_rules()
+    migrated = 0
+    while True:
+        rows = session.execute(
+            select(Answer.id, Answer.subject, Answer.grade, Answer.unit, Answer.main_unit, Answer.sub_unit)
+            .where(Answer.category_id.is_(None)).order_by(Answer.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        keys = [unit_normalizer.canonical_key(_legacy_key(*row[1:]), rules) for row in rows]
+        ids = intern(session, keys)
+        session.execute(update(Answer), [
+            {'id': row[0], 'category_id': ids[key], 'subject': None, 'grade': None, 'unit': None,
+             'main_unit': None, 'sub_unit': None}
+            for row, key in zip(rows, keys)
+        ])
+        # 분류가 없던 답변은 집계에 포함되지 않았으므로 옮긴 만큼 더함
+        stats_rollup.include_answers(session, Answer.id.in_([row[0] for row in rows]))
+        session.commit()
+        migrated += len(rows)
+        logger.info(f"분류 이전: {migrated}건")
+    return migrated
+
+
+def upgrade_schema(engine):
+    """create_all이 바꾸지 않는 기존 테이블 변경 (Answer.category_id 추가, 분류 문자열로 묶던 집계/문항 통계 삭제)
+
+    집계와 문항 통계는 migrate-categories, rebuild-item-stats 명령으로 다시 계산합니다.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        if 'category_id' not in {column['name'] for column in inspector.get_columns('answer')}:
+            connection.execute(text('ALTER TABLE answer ADD COLUMN category_id INTEGER REFERENCES category (id)'))
+            connection.execute(text('CREATE INDEX ix_answer_category_id ON answer (category_id)'))
+        for model in _DERIVED_TABLES:
+            if 'subject' in {column['name'] for column in inspector.get_columns(model.__tablename__)}:
+                model.__table__.drop(connection)
+                model.__table__.create(connection)
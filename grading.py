@@ -0,0 +1,145 @@
+import re
+
+CIRCLED_NUMBERS = '①②③④⑤⑥⑦⑧⑨⑩'
+
+# 문제 유형별 채점 정책
+#   local          : 항상 로컬에서 채점
+#   local_then_llm : 로컬에서 정답으로 판정되지 않으면 GPT가 평가
+#   llm            : 항상 GPT가 평가
+GRADING_POLICY = {
+    '객관식': 'local',
+    '단답형': 'local_then_llm',
+    '빈칸채우기': 'local_then_llm',
+}
+DEFAULT_POLICY = 'llm'
+
+# 답 전체가 보기 번호인 경우 ('③', '3', '3번', '3.')
+_bare_choice_pattern = re.compile(r'^\s*(?:([①-⑩])|(\d{1,2})\s*번?\s*[.)]?)\s*$')
+# 보기 번호 뒤에 보기 내용이 붙은 경우 ('③ 질소', '3번 질소', '3) 질소')
+_prefixed_choice_pattern = re.compile(r'^\s*(?:([①-⑩])|(\d{1,2})\s*(?:번|[.)]))\s*(.+)$')
+_ignored_chars = re.compile(r'[\s.,!?~\'"`()\[\]{}]')
+
+
+def _marker_index(match):
+    if match.group(1):
+        return CIRCLED_NUMBERS.index(match.group(1))
+    return int(match.group(2)) - 1
+
+
+def choice_index(text, options=None):
+    """'③', '3', '3번' 형태의 답에서 0부터 시작하는 보기 번호를 추출
+
+    '③ 질소'처럼 번호 뒤에 내용이 붙은 답은 그 내용이 해당 번호의 보기와 같을 때만 번호로 인정합니다.
+    ('3.5 g' 같은 숫자 보기를 3번으로 잘못 읽지 않도록)
+    """
+    if not text:
+        return None
+    match = _bare_choice_pattern.match(text)
+    if match:
+        return _marker_index(match)
+
+    match = _prefixed_choice_pattern.match(text)
+    if not match or not options:
+        return None
+    index = _marker_index(match)
+    if index < len(options) and normalize_answer(match.group(3)) == normalize_answer(strip_choice_marker(options[index])):
+        return index
+    return None
+
+
+def leading_marker_index(text):
+    """문자열 앞의 원문자 보기 번호(①~⑩) 위치 (없으면 None)"""
+    match = re.match(r'^\s*([①-⑩])', text or '')
+    return CIRCLED_NUMBERS.index(match.group(1)) if match else None
+
+
+def option_index(text, options):
+    """보기 번호를 뺀 내용이 일치하는 보기의 위치 (없으면 None)"""
+    target = normalize_answer(strip_choice_marker(text))
+    if not target:
+        return None
+    for i, option in enumerate(options or []):
+        if normalize_answer(strip_choice_marker(option)) == target:
+            return i
+    return None
+
+
+def strip_choice_marker(text):
+    return re.sub(r'^\s*[①-⑩]\s*', '', text or '')
+
+
+def normalize_answer(text):
+    """비교용 정규화 (대소문자, 공백, 문장부호 무시)"""
+    return _ignored_chars.sub('', (text or '').lower())
+
+
+class GradingEngine:
+    """저장된 정답으로 판정 가능한 답변을 GPT 호출 없이 채점"""
+
+    def __init__(self, policy=None):
+        self.policy = dict(GRADING_POLICY)
+        if policy:
+            self.policy.update(policy)
+        self.stats = {'local': 0, 'llm': 0}
+
+    def grade(self, message, quiz):
+        """채점 결과를 반환하고, 로컬에서 판정할 수 없으면 None 반환"""
+        question_type = quiz.get('question_type', '객관식')
+        policy = self.policy.get(question_type, DEFAULT_POLICY)
+        correct_answer = quiz.get('correct', '')
+
+        # 해설이 없으면 설명을 만들 수 없으므로 GPT에게 맡김
+        if policy == 'llm' or not correct_answer or not quiz.get('explanation'):
+            self.stats['llm'] += 1
+            return None
+
+        if question_type == '객관식':
+            is_correct = self._grade_choice(message, quiz)
+        else:
+            is_correct = self._grade_text(message, quiz)
+
+        if is_correct is None or (not is_correct and policy == 'local_then_llm'):
+            self.stats['llm'] += 1
+            return None
+
+        self.stats['local'] += 1
+        result = {
+            "type": "ANSWER",
+            "answer": {
+                "correct": is_correct,
+                "explanation": quiz.get('explanation', '')
+            }
+        }
+        if not is_correct:
+            result["answer"]["correct_answer"] = correct_answer
+        return result
+
+    def _grade_choice(self, message, quiz):
+        options = quiz.get('options') or []
+        correct_answer = quiz.get('correct', '')
+
+        # 보기 내용이 일치하는지 먼저 보고, 아니면 보기 번호로 판단
+        correct_index = option_index(correct_answer, options)
+        if correct_index is None:
+            correct_index = choice_index(correct_answer, options)
+
+        user_index = option_index(message, options)
+        if user_index is None:
+            user_index = choice_index(message, options)
+
+        if correct_index is not None and user_index is not None:
+            return user_index == correct_index
+
+        # 번호를 알 수 없으면 보기 내용으로 비교
+        user_text = normalize_answer(strip_choice_marker(message))
+        correct_text = normalize_answer(strip_choice_marker(correct_answer))
+        if user_text and correct_text:
+            return user_text == correct_text
+        return None
+
+    def _grade_text(self, message, quiz):
+        user_text = normalize_answer(message)
+        if not user_text:
+            return None
+        accepted = [quiz.get('correct', '')] + list(quiz.get('accepted_answers') or [])
+        return any(user_text == normalize_answer(answer) for answer in accepted if answer)
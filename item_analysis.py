@@ -0,0 +1,243 @@
+"""문항 분석 (난이도 p-value, 변별도 point-biserial)
+
+문항은 공백을 정리한 문제 내용의 해시로 구분합니다. 답변을 저장할 때 문항별 누적값
+(풀이 수, 정답 수, 학생 능력 점수의 합/제곱합/정답자 합)만 증가시키므로 답변 한 건당 O(1)이며
+지표는 누적값으로 바로 계산합니다. 학생 능력 점수는 그 답변 직전까지의 학생 전체 정답률입니다.
+
+    flask --app app rebuild-item-stats   # 기존 답변으로 문항 통계 다시 만들기
+"""
+import os
+import math
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import select, update, delete, func, and_
+from models import Answer, AnswerRollup, Category, ItemStat, Question
+from stats_rollup import APPLY_CHUNK_SIZE, _dialect_insert
+from question_store import question_hash
+
+logger = logging.getLogger(__name__)
+
+# 학생 능력 점수(정답률)를 변별도에 반영하기 위한 최소 이전 풀이 수
+ITEM_SCORE_MIN_ATTEMPTS = int(os.environ.get('ITEM_SCORE_MIN_ATTEMPTS', 5))
+# 문항 분석 화면에 보여 줄 최대 문항 수
+ITEM_PAGE_SIZE = int(os.environ.get('ITEM_PAGE_SIZE', 100))
+
+# 문항 검토 기준 (일반적인 고전검사이론 기준값)
+EASY_P_VALUE = 0.9
+HARD_P_VALUE = 0.2
+LOW_DISCRIMINATION = 0.2
+
+SORT_KEYS = ('discrimination', 'p_value', 'attempts')
+COUNTER_COLUMNS = ('attempts', 'correct', 'scored', 'scored_correct', 'score_sum', 'score_sq_sum',
+                   'score_correct_sum')
+REBUILD_BATCH_SIZE = 5000
+
+
+def item_metrics(attempts, correct, scored, scored_correct, score_sum, score_sq_sum, score_correct_sum):
+    """누적값으로 (p-value, 점이연 변별도) 계산 (계산할 수 없으면 None)"""
+    p_value = correct / attempts if attempts > 0 else None
+    discrimination = None
+    scored_incorrect = scored - scored_correct
+    if scored >= 2 and scored_correct > 0 and scored_incorrect > 0:
+        mean = score_sum / scored
+        variance = score_sq_sum / scored - mean * mean
+        if variance > 1e-12:
+            mean_correct = score_correct_sum / scored_correct
+            mean_incorrect = (score_sum - score_correct_sum) / scored_incorrect
+            p = scored_correct / scored
+            discrimination = (mean_correct - mean_incorrect) / math.sqrt(variance) * math.sqrt(p * (1 - p))
+    return p_value, discrimination
+
+
+class _Deltas:
+    """문항별 누적값 증감과 학생별 현재 풀이 수/정답 수"""
+
+    def __init__(self, totals=None, min_attempts=ITEM_SCORE_MIN_ATTEMPTS):
+        self.items = {}
+        self.totals = totals if totals is not None else {}
+        self.min_attempts = min_attempts
+
+    def add(self, user_id, key, is_correct, category_id=None, sign=1):
+        item = self.items.get(key)
+        if item is None:
+            item = self.items[key] = {'category_id': category_id, 'counters': [0] * len(COUNTER_COLUMNS)}
+        counters = item['counters']
+        correct = 1 if is_correct else 0
+        counters[0] += sign
+        counters[1] += sign * correct
+
+        total = self.totals.setdefault(user_id, [0, 0])
+        if total[0] >= self.min_attempts:
+            score = total[1] / total[0]
+            counters[2] += sign
+            counters[3] += sign * correct
+            counters[4] += sign * score
+            counters[5] += sign * score * score
+            counters[6] += sign * score * correct
+        total[0] += 1
+        total[1] += correct
+
+
+def add_answers(session, rows):
+    """새로 저장하는 답변(category_id가 있는 dict 목록)을 문항 통계에 반영
+
+    학생 능력 점수를 AnswerRollup에서 읽으므로 stats_rollup.add_answers보다 먼저, 같은 트랜잭션에서 호출합니다.
+    """
+    user_ids = {row['user_id'] for row in rows}
+    totals = {user_id: [attempts or 0, correct or 0] for user_id, attempts, correct in session.execute(
+        select(AnswerRollup.user_id, func.sum(AnswerRollup.attempts), func.sum(AnswerRollup.correct))
+        .where(AnswerRollup.user_id.in_(user_ids)).group_by(AnswerRollup.user_id)
+    )}
+    deltas = _Deltas(totals)
+    for row in rows:
+        deltas.add(row['user_id'], question_hash(row.get('question')), row.get('is_correct'), row.get('category_id'))
+    _apply(session, deltas.items)
+
+
+def remove_user_answers(session, user_id):
+    """학생의 답변을 모두 삭제하기 직전에 그 학생이 더한 누적값을 빼기
+
+    학생 능력 점수는 그 학생의 이전 답변으로만 정해지므로 답변을 ID 순서로 다시 계산하면 더했던 값과 같습니다.
+    """
+    deltas = _Deltas()
+    statement = (select(Question.content_hash, Answer.question, Answer.is_correct)
+                 .outerjoin(Question, Question.id == Answer.question_id).where(Answer.user_id == user_id)
+                 .order_by(Answer.id).execution_options(yield_per=REBUILD_BATCH_SIZE))
+    for key, question, is_correct in session.execute(statement):
+        deltas.add(user_id, key or question_hash(question), is_correct, sign=-1)
+    _apply(session, deltas.items)
+    session.execute(delete(ItemStat).where(ItemStat.attempts <= 0))
+
+
+def clear(session):
+    """모든 답변을 삭제할 때 문항 통계도 함께 비움"""
+    session.execute(delete(ItemStat))
+
+
+def rebuild(session):
+    """답변 테이블 전체를 ID 순서로 다시 읽어 문항 통계를 다시 계산하고 문항 수를 반환"""
+    session.execute(delete(ItemStat))
+    deltas = _Deltas()
+    statement = select(
+        Answer.user_id, Question.content_hash, Answer.question, Answer.is_correct, Answer.category_id
+    ).outerjoin(Question, Question.id == Answer.question_id).order_by(Answer.id).execution_options(
+        yield_per=REBUILD_BATCH_SIZE)
+    for user_id, key, question, is_correct, category_id in session.execute(statement):
+        # 아직 Question으로 옮기지 않은 답변은 내용으로 해시 계산
+        deltas.add(user_id, key or question_hash(question), is_correct, category_id)
+    _apply(session, deltas.items)
+    return len(deltas.items)
+
+
+def _apply(session, items):
+    """문항별 누적값 증감을 반영하고 바뀐 문항의 지표를 다시 계산"""
+    if not items:
+        return
+    now = datetime.utcnow()
+    entries = list(items.items())
+    dialect_insert = _dialect_insert(session)
+    for offset in range(0, len(entries), APPLY_CHUNK_SIZE):
+        chunk = entries[offset:offset + APPLY_CHUNK_SIZE]
+        values = [dict(question_hash=key, category_id=item['category_id'], updated_at=now,
+                       **dict(zip(COUNTER_COLUMNS, item['counters'])))
+                  for key, item in chunk]
+        if dialect_insert is None:
+            for value in values:
+                _update_or_insert(session, value)
+        else:
+            # 한 문장으로 추가/증가 (다른 워커가 같은 문항을 동시에 추가해도 충돌하지 않음)
+            statement = dialect_insert(ItemStat).values(values)
+            session.execute(statement.on_conflict_do_update(
+                index_elements=['question_hash'],
+                set_=dict({column: getattr(ItemStat, column) + getattr(statement.excluded, column)
+                           for column in COUNTER_COLUMNS}, updated_at=statement.excluded.updated_at)
+            ))
+        _refresh_metrics(session, [key for key, _ in chunk])
+
+
+def _update_or_insert(session, value):
+    result = session.execute(
+        update(ItemStat).where(ItemStat.question_hash == value['question_hash']).values(
+            updated_at=value['updated_at'],
+            **{column: getattr(ItemStat, column) + value[column] for column in COUNTER_COLUMNS}
+        )
+    )
+    if result.rowcount == 0:
+        session.execute(ItemStat.__table__.insert().values(**value))
+
+
+def _refresh_metrics(session, keys):
+    rows = session.execute(
+        select(ItemStat.question_hash, *(getattr(ItemStat, column) for column in COUNTER_COLUMNS))
+        .where(ItemStat.question_hash.in_(keys))
+    ).all()
+    if rows:
+        session.execute(update(ItemStat), [
+            dict(zip(('question_hash', 'p_value', 'discrimination'), (row[0],) + item_metrics(*row[1:])))
+            for row in rows
+        ])
+
+
+@dataclass
+class ItemRow:
+    """문항 분석 화면 한 행"""
+    question_hash: str
+    question: str
+    subject: str
+    grade: str
+    unit: str
+    attempts: int
+    correct: int
+    scored: int
+    p_value: float = None
+    discrimination: float = None
+
+    @property
+    def flags(self):
+        """검토가 필요한 이유"""
+        flags = []
+        if self.p_value is not None and self.p_value >= EASY_P_VALUE:
+            flags.append('너무 쉬움')
+        if self.p_value is not None and self.p_value <= HARD_P_VALUE:
+            flags.append('너무 어려움')
+        if self.discrimination is not None and self.discrimination < LOW_DISCRIMINATION:
+            flags.append('변별도 낮음')
+        return flags
+
+    def to_dict(self):
+        return {
+            'question_hash': self.question_hash,
+            'question': self.question,
+            'subject': self.subject,
+            'grade': self.grade,
+            'unit': self.unit,
+            'attempts': self.attempts,
+            'correct': self.correct,
+            'scored': self.scored,
+            'p_value': round(self.p_value, 3) if self.p_value is not None else None,
+            'discrimination': round(self.discrimination, 3) if self.discrimination is not None else None,
+            'flags': self.flags
+        }
+
+
+def item_rows(session, sort='discrimination', order='asc', subject=None, grade=None, unit=None, min_attempts=1,
+              limit=ITEM_PAGE_SIZE):
+    """정렬한 문항 목록 (지표를 계산할 수 없는 문항은 항상 뒤로, 문제 내용과 분류 이름은 보여 줄 행만 읽음)"""
+    column = getattr(ItemStat, sort if sort in SORT_KEYS else 'discrimination')
+    conditions = [ItemStat.attempts >= max(1, min_attempts)]
+    for name, value in (('subject', subject), ('grade', grade), ('unit', unit)):
+        if value:
+            conditions.append(getattr(Category, name) == value)
+    statement = select(
+        ItemStat.question_hash, func.coalesce(Question.text, ''), func.coalesce(Category.subject, ''),
+        func.coalesce(Category.grade, ''), func.coalesce(Category.unit, ''),
+        ItemStat.attempts, ItemStat.correct, ItemStat.scored, ItemStat.p_value, ItemStat.discrimination
+    ).outerjoin(Question, Question.content_hash == ItemStat.question_hash).outerjoin(
+        Category, Category.id == ItemStat.category_id
+    ).where(and_(*conditions)).order_by(
+        column.is_(None),
+        column.desc() if order == 'desc' else column.asc(),
+        ItemStat.question_hash
+    ).limit(limit)
+    return [ItemRow(*row) for row in session.execute(statement)]
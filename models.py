@@ -32,19 +32,140 @@ class Answer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
-    # 새로운 분류 체계
+    # 분류(과목/학년/단원)는 Category 참조
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=True)
+    
+    # 기존 필드 (이전 버전 호환용, Category로 옮긴 뒤에는 NULL)
     subject = db.Column(db.String(50), nullable=True)     # 과목 (예: 과학, 수학 등)
     grade = db.Column(db.String(20), nullable=True)       # 학년 (예: 중1, 중2, 중3)
     unit = db.Column(db.String(100), nullable=True)       # 단원
+    main_unit = db.Column(db.String(100), nullable=True)  # 대단원
+    sub_unit = db.Column(db.String(100), nullable=True)   # 소단원
     
-    # 기존 필드 (하위 호환성 유지)
-    main_unit = db.Column(db.String(100), nullable=True)  # 대단원 (이전 버전 호환용)
-    sub_unit = db.Column(db.String(100), nullable=True)   # 소단원 (이전 버전 호환용)
-    
-    question = db.Column(db.Text, nullable=False)
+    # 문제 내용은 Question에 한 번만 저장 (question은 옮기기 전 답변의 내용, 옮긴 뒤에는 빈 문자열)
+    question_id = db.Column(db.Integer, db.ForeignKey('question.id'), nullable=True, index=True)
+    question = db.Column(db.Text, nullable=False, default='')
     user_answer = db.Column(db.String(10), nullable=False)
     is_correct = db.Column(db.Boolean, nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
+    # 대시보드/다운로드 조회 형태별 인덱스 (기존 DB에는 schema_migrations가 추가)
+    __table_args__ = (
+        # 학생별 내보내기(기간)와 학생 답변 삭제 시 집계 차감 (분류/정답 여부까지 포함해 테이블을 읽지 않음)
+        db.Index('ix_answer_user_timestamp', 'user_id', 'timestamp', 'category_id', 'is_correct'),
+        # 과목/학년별 내보내기(기간)와 분류 표준화
+        db.Index('ix_answer_category_timestamp', 'category_id', 'timestamp'),
+        # 기간만 지정한 내보내기
+        db.Index('ix_answer_timestamp', 'timestamp'),
+    )
+
+class Category(db.Model):
+    """과목/학년/단원 분류 (categories.json으로 채우고 새 분류는 답변 저장 시 추가, category_store가 관리)"""
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(50), nullable=False, default='')    # 분류가 없으면 빈 문자열
+    grade = db.Column(db.String(20), nullable=False, default='')
+    unit = db.Column(db.String(100), nullable=False, default='')
+
+    __table_args__ = (
+        db.UniqueConstraint('subject', 'grade', 'unit', name='uq_category_key'),
+    )
+
+class Question(db.Model):
+    """문제 내용 (공백을 정리한 내용의 해시로 중복 없이 저장, question_store가 관리)"""
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False)
+    text = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class AnswerRollup(db.Model):
+    """사용자/분류별 답변 집계 (답변 저장·삭제와 같은 트랜잭션에서 stats_rollup이 갱신)"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'category_id', name='uq_answer_rollup_key'),
+        # 과목/학년 필터 (분류에서 시작해 집계를 읽음)
+        db.Index('ix_answer_rollup_category', 'category_id', 'user_id', 'attempts', 'correct'),
+    )
+
+class AnswerBucket(db.Model):
+    """일별/주별 사용자/분류별 답변 집계 (기간 필터와 추이 통계용, stats_rollup이 갱신)"""
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(10), nullable=False)        # 'day' 또는 'week'
+    bucket_start = db.Column(db.Date, nullable=False)       # 해당 날짜 또는 주의 월요일 (STATS_TIMEZONE)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('period', 'bucket_start', 'user_id', 'category_id', name='uq_answer_bucket_key'),
+        # 학생별/분류별 정답률 추이
+        db.Index('ix_answer_bucket_user', 'user_id', 'period', 'bucket_start'),
+        db.Index('ix_answer_bucket_category', 'category_id', 'period', 'bucket_start'),
+    )
+
+class StatsVersion(db.Model):
+    """답변 데이터 버전 (답변이 바뀔 때마다 증가, 통계 캐시 무효화용)"""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+class ItemStat(db.Model):
+    """문항(문제 내용 해시)별 난이도/변별도 누적 통계 (답변 저장과 같은 트랜잭션에서 item_analysis가 갱신)"""
+    question_hash = db.Column(db.String(64), primary_key=True)   # Question.content_hash
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=True)   # 처음 저장된 답변의 분류
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+    # 변별도 누적값: 답변 직전 학생 정답률(능력 점수)이 있는 답변만 합산
+    scored = db.Column(db.Integer, nullable=False, default=0)
+    scored_correct = db.Column(db.Integer, nullable=False, default=0)
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    score_sq_sum = db.Column(db.Float, nullable=False, default=0)
+    score_correct_sum = db.Column(db.Float, nullable=False, default=0)
+    # 누적값으로 계산해 둔 지표 (정렬용)
+    p_value = db.Column(db.Float, nullable=True)               # 정답률 (0~1)
+    discrimination = db.Column(db.Float, nullable=True)        # 점이연 상관계수 (-1~1)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_item_stat_p_value', 'p_value'),
+        db.Index('ix_item_stat_discrimination', 'discrimination'),
+    )
+
+class SchemaMigration(db.Model):
+    """적용한 스키마 마이그레이션 번호 (schema_migrations가 관리)"""
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class NormalizeCheckpoint(db.Model):
+    """분류 표준화 규칙별 진행 위치 (중단된 작업을 마지막으로 처리한 답변 ID 다음부터 재개)"""
+    rule_key = db.Column(db.String(64), primary_key=True)   # 규칙 내용 해시 (규칙이 바뀌면 처음부터)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class QuestionBank(db.Model):
+    """미리 생성해 둔 출제 대기 문제"""
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(50), nullable=True)
+    grade = db.Column(db.String(20), nullable=True)
+    unit = db.Column(db.String(100), nullable=True)
+    question_type = db.Column(db.String(20), nullable=False)
+    payload = db.Column(db.Text, nullable=False)           # 문제 JSON
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_question_bank_pool', 'subject', 'grade', 'question_type'),
+    )
+
+class QuestionBankClaim(db.Model):
+    """카테고리별 문제 은행 보충 작업 점유 (여러 워커가 같은 카테고리를 동시에 채우지 않도록)"""
+    category_key = db.Column(db.String(255), primary_key=True)   # 과목/학년/단원/문제 유형
+    claimed_until = db.Column(db.DateTime, nullable=False)
+
 def init_db():
     db.create_all()
\ No newline at end of file
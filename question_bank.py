@@ -0,0 +1,274 @@
+import os
+import json
+import queue
+import random
+import threading
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, delete, update
+from sqlalchemy.exc import IntegrityError
+from models import db, QuestionBank, QuestionBankClaim
+from quiz_cache import is_valid_question
+
+logger = logging.getLogger(__name__)
+
+# 카테고리 x 문제 유형별로 미리 준비해 둘 문제 수 (기본값 0: 문제 은행 비활성화)
+QUESTION_BANK_SIZE = int(os.environ.get('QUESTION_BANK_SIZE', 0))
+
+# 보충 작업 점유 유지 시간(초) - 워커가 중간에 죽어도 이 시간이 지나면 다른 워커가 이어받음
+FILL_CLAIM_TTL = 300
+
+QUESTION_TYPES = ['객관식', '단답형', '빈칸채우기']
+
+
+def split_counts(question_types, count):
+    """문제 수를 문제 유형별로 고르게 배분"""
+    counts = {question_type: 0 for question_type in question_types}
+    for i in range(count):
+        counts[question_types[i % len(question_types)]] += 1
+    return counts
+
+
+def load_categories():
+    try:
+        with open('categories.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+class QuestionBankFiller:
+    """문제 은행 조회와 백그라운드 보충을 담당"""
+
+    def __init__(self, app, generate, pool_size=QUESTION_BANK_SIZE):
+        self.app = app
+        self.generate = generate  # (subject, grade, question_type, count, unit) -> 문제 목록
+        self.pool_size = pool_size
+        self.stats = {'served': 0, 'missed': 0, 'generated': 0, 'errors': 0}
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    @property
+    def enabled(self):
+        return self.pool_size > 0
+
+    def take(self, subject, grade, question_types, count, unit=None):
+        """요청한 문제 수를 모두 채울 수 있을 때만 문제를 꺼내 반환
+
+        unit이 없으면 과목/학년 안의 모든 단원에서 꺼냅니다. 꺼낸 문제의 카테고리(또는 문제가
+        모자란 요청 카테고리)만 보충 대기열에 추가합니다.
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            ids = []
+            for statement, needed in self._candidate_statements(subject, grade, question_types, count, unit):
+                found = db.session.execute(statement).scalars().all()
+                if len(found) < needed:
+                    return self._missed(subject, grade, question_types, unit)
+                ids.extend(found)
+
+            # 다른 워커가 같은 문제를 가져가지 않도록 삭제하면서 꺼냄
+            rows = db.session.execute(self._pop_statement(ids)).all()
+            if len(rows) < len(ids):
+                db.session.rollback()
+                return self._missed(subject, grade, question_types, unit)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"문제 은행 조회 오류: {str(e)}")
+            return None
+
+        return self._served(rows)
+
+    async def take_async(self, session, subject, grade, question_types, count, unit=None):
+        """take()의 비동기 세션 버전 (ASGI 서빙 경로에서 사용)"""
+        if not self.enabled:
+            return None
+
+        try:
+            ids = []
+            for statement, needed in self._candidate_statements(subject, grade, question_types, count, unit):
+                found = (await session.execute(statement)).scalars().all()
+                if len(found) < needed:
+                    return self._missed(subject, grade, question_types, unit)
+                ids.extend(found)
+
+            rows = (await session.execute(self._pop_statement(ids))).all()
+            if len(rows) < len(ids):
+                await session.rollback()
+                return self._missed(subject, grade, question_types, unit)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"문제 은행 조회 오류: {str(e)}")
+            return None
+
+        return self._served(rows)
+
+    def _candidate_statements(self, subject, grade, question_types, count, unit=None):
+        for question_type, needed in split_counts(question_types, count).items():
+            if needed == 0:
+                continue
+            statement = select(QuestionBank.id).where(QuestionBank.question_type == question_type)
+            if subject:
+                statement = statement.where(QuestionBank.subject == subject)
+            if grade:
+                statement = statement.where(QuestionBank.grade == grade)
+            if unit:
+                statement = statement.where(QuestionBank.unit == unit)
+            yield statement.order_by(QuestionBank.id).limit(needed), needed
+
+    def _pop_statement(self, ids):
+        return delete(QuestionBank).where(QuestionBank.id.in_(ids)).returning(
+            QuestionBank.payload,
+            QuestionBank.subject,
+            QuestionBank.grade,
+            QuestionBank.unit,
+            QuestionBank.question_type
+        )
+
+    def _served(self, rows):
+        questions = [json.loads(row.payload) for row in rows]
+        random.shuffle(questions)
+        self.stats['served'] += 1
+        # 문제를 꺼낸 카테고리만 다시 채움
+        for key in {(row.subject, row.grade, row.unit, row.question_type) for row in rows}:
+            self._enqueue(key)
+        return questions
+
+    def _missed(self, subject, grade, question_types, unit):
+        self.stats['missed'] += 1
+        self.request_refill(subject, grade, question_types, unit)
+        return None
+
+    def request_refill(self, subject, grade, question_types, unit=None):
+        """해당 과목/학년(/단원)의 카테고리를 보충 대기열에 추가"""
+        if not self.enabled or not subject:
+            return
+        for category in load_categories():
+            if category.get('subject') != subject:
+                continue
+            if grade and category.get('grade') != grade:
+                continue
+            if unit and category.get('unit') != unit:
+                continue
+            for question_type in question_types:
+                self._enqueue((category.get('subject'), category.get('grade'), category.get('unit'), question_type))
+
+    def warm(self):
+        """모든 카테고리 x 문제 유형을 보충 대기열에 추가"""
+        if not self.enabled:
+            return
+        for category in load_categories():
+            for question_type in QUESTION_TYPES:
+                self._enqueue((category.get('subject'), category.get('grade'), category.get('unit'), question_type))
+
+    def pool_sizes(self):
+        """관리자 확인용 카테고리별 준비 문제 수"""
+        rows = db.session.query(
+            QuestionBank.subject,
+            QuestionBank.grade,
+            QuestionBank.unit,
+            QuestionBank.question_type,
+            func.count(QuestionBank.id).label('ready')
+        ).group_by(QuestionBank.subject, QuestionBank.grade, QuestionBank.unit, QuestionBank.question_type).all()
+        return [{
+            'subject': row.subject,
+            'grade': row.grade,
+            'unit': row.unit,
+            'question_type': row.question_type,
+            'ready': row.ready
+        } for row in rows]
+
+    def _enqueue(self, key):
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='question-bank-filler', daemon=True)
+                self._worker.start()
+        self._queue.put(key)
+
+    def _run(self):
+        while True:
+            key = self._queue.get()
+            try:
+                with self.app.app_context():
+                    self._fill(*key)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"문제 은행 보충 오류 {key}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+    def _fill(self, subject, grade, unit, question_type):
+        category_key = '/'.join(str(part or '') for part in (subject, grade, unit, question_type))
+        if not self._claim(category_key):
+            return
+        try:
+            self._fill_claimed(subject, grade, unit, question_type)
+        finally:
+            self._release(category_key)
+
+    def _fill_claimed(self, subject, grade, unit, question_type):
+        ready = db.session.query(func.count(QuestionBank.id)).filter(
+            QuestionBank.subject == subject,
+            QuestionBank.grade == grade,
+            QuestionBank.unit == unit,
+            QuestionBank.question_type == question_type
+        ).scalar()
+        deficit = self.pool_size - ready
+        if deficit <= 0:
+            return
+
+        questions = self.generate(subject, grade, question_type, deficit, unit)
+        # 캐시와 같은 기준으로 검증한 문제만 저장
+        valid_questions = [q for q in questions if is_valid_question(q)]
+        if len(valid_questions) < len(questions):
+            logger.warning(f"문제 은행 보충: 형식이 잘못된 문제 {len(questions) - len(valid_questions)}개 제외")
+        valid_questions = valid_questions[:deficit]
+        for question in valid_questions:
+            db.session.add(QuestionBank(
+                subject=subject,
+                grade=grade,
+                unit=unit,
+                question_type=question_type,
+                payload=json.dumps(question, ensure_ascii=False)
+            ))
+        db.session.commit()
+        self.stats['generated'] += len(valid_questions)
+        logger.info(f"문제 은행 보충: {subject}/{grade}/{unit}/{question_type} +{len(valid_questions)}")
+
+    def _claim(self, category_key):
+        """카테고리 보충 작업을 점유 (이미 다른 워커가 점유 중이면 False)"""
+        now = datetime.utcnow()
+        claimed_until = now + timedelta(seconds=FILL_CLAIM_TTL)
+        try:
+            db.session.add(QuestionBankClaim(category_key=category_key, claimed_until=claimed_until))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+
+        # 만료된 점유만 가져옴
+        result = db.session.execute(
+            update(QuestionBankClaim)
+            .where(QuestionBankClaim.category_key == category_key, QuestionBankClaim.claimed_until < now)
+            .values(claimed_until=claimed_until)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    def _release(self, category_key):
+        try:
+            db.session.execute(delete(QuestionBankClaim).where(QuestionBankClaim.category_key == category_key))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"문제 은행 보충 점유 해제 실패 {category_key}: {str(e)}")
@@ -0,0 +1,102 @@
+"""문제 내용 저장소 (Question 테이블)
+
+같은 문제를 여러 학생이 풀어도 문제 내용은 Question에 한 번만 저장하고 Answer는 question_id로 참조하므로
+답변 테이블이 작아지고 통계 조회가 문제 내용을 읽지 않습니다. 문제는 공백을 정리한 내용의 해시로 구분합니다.
+이전 버전의 답변(Answer.question에 내용 저장)은 청크 단위로 Question으로 옮기며, 중단되면 남은 답변부터 이어서 처리합니다.
+
+    flask --app app migrate-questions
+"""
+import os
+import hashlib
+import logging
+from sqlalchemy import select, update, insert, func, inspect, text
+from models import Answer, Question, ItemStat
+from stats_rollup import APPLY_CHUNK_SIZE, _dialect_insert
+
+logger = logging.getLogger(__name__)
+
+# 한 번에 옮기고 커밋할 답변 수
+QUESTION_MIGRATE_CHUNK_SIZE = int(os.environ.get('QUESTION_MIGRATE_CHUNK_SIZE', 1000))
+
+
+def question_hash(question):
+    """문제 내용 해시 (공백 차이는 같은 문제로 취급)"""
+    normalized = ' '.join((question or '').split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def question_text():
+    """답변의 문제 내용 식 - Question을 outer join한 쿼리에서 사용 (옮기기 전 답변은 Answer.question)"""
+    return func.coalesce(Question.text, Answer.question)
+
+
+def intern(session, questions):
+    """문제 내용을 Question에 저장(이미 있으면 재사용)하고 {해시: question_id}를 반환"""
+    texts = {}
+    for question in questions:
+        texts.setdefault(question_hash(question), question or '')
+    keys = list(texts)
+    dialect_insert = _dialect_insert(session)
+    ids = {}
+    for offset in range(0, len(keys), APPLY_CHUNK_SIZE):
+        chunk = keys[offset:offset + APPLY_CHUNK_SIZE]
+        values = [{'content_hash': key, 'text': texts[key]} for key in chunk]
+        if dialect_insert is not None:
+            # 다른 워커가 같은 문제를 동시에 저장해도 충돌하지 않음
+            session.execute(dialect_insert(Question).values(values).on_conflict_do_nothing(
+                index_elements=['content_hash']))
+        else:
+            existing = set(session.scalars(select(Question.content_hash).where(Question.content_hash.in_(chunk))))
+            missing = [value for value in values if value['content_hash'] not in existing]
+            if missing:
+                session.execute(insert(Question), missing)
+        ids.update(session.execute(
+            select(Question.content_hash, Question.id).where(Question.content_hash.in_(chunk))
+        ).all())
+    return ids
+
+
+def attach(session, rows):
+    """답변 dict 목록을 Answer INSERT용으로 변환 (문제 내용은 Question에 저장하고 question_id로 참조)"""
+    ids = intern(session, [row.get('question') for row in rows])
+    return [dict(row, question='', question_id=ids[question_hash(row.get('question'))]) for row in rows]
+
+
+def pending_count(session):
+    """아직 Question으로 옮기지 않은 답변 수"""
+    return session.scalar(select(func.count(Answer.id)).where(Answer.question_id.is_(None)))
+
+
+def migrate(session, chunk_size=QUESTION_MIGRATE_CHUNK_SIZE):
+    """이전 답변의 문제 내용을 Question으로 옮기고 옮긴 답변 수를 반환 (청크마다 커밋)"""
+    migrated = 0
+    while True:
+        rows = session.execute(
+            select(Answer.id, Answer.question).where(Answer.question_id.is_(None)).order_by(Answer.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        ids = intern(session, [question for _, question in rows])
+        session.execute(update(Answer), [
+            {'id': answer_id, 'question_id': ids[question_hash(question)], 'question': ''}
+            for answer_id, question in rows
+        ])
+        session.commit()
+        migrated += len(rows)
+        logger.info(f"문제 내용 이전: {migrated}건")
+    return migrated
+
+
+def upgrade_schema(engine):
+    """create_all이 바꾸지 않는 기존 테이블 변경 (Answer.question_id 추가, 문제 내용을 갖던 이전 문항 통계 삭제)
+
+    문항 통계는 rebuild-item-stats 명령으로 다시 계산합니다.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        if 'question_id' not in {column['name'] for column in inspector.get_columns('answer')}:
+            connection.execute(text('ALTER TABLE answer ADD COLUMN question_id INTEGER REFERENCES question (id)'))
+            connection.execute(text('CREATE INDEX ix_answer_question_id ON answer (question_id)'))
+        if 'question' in {column['name'] for column in inspector.get_columns('item_stat')}:
+            ItemStat.__table__.drop(connection)
+            ItemStat.__table__.create(connection)
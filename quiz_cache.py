@@ -0,0 +1,148 @@
+import os
+import copy
+import json
+import time
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+from grading import CIRCLED_NUMBERS, choice_index, leading_marker_index, option_index, strip_choice_marker
+
+QUIZ_CACHE_SIZE = int(os.environ.get('QUIZ_CACHE_SIZE', 256))
+QUIZ_CACHE_TTL = int(os.environ.get('QUIZ_CACHE_TTL', 600))
+
+
+def make_cache_key(subject, grade, question_types, question_count, unit=None):
+    """정규화한 프롬프트 구성 요소의 해시"""
+    parts = {
+        'subject': (subject or '').strip(),
+        'grade': (grade or '').strip(),
+        'unit': (unit or '').strip(),
+        'question_types': sorted({t.strip() for t in question_types or []}),
+        'question_count': int(question_count)
+    }
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def is_valid_question(question):
+    if not isinstance(question, dict) or not question.get('question') or not question.get('correct'):
+        return False
+    if question.get('question_type', '객관식') == '객관식':
+        options = question.get('options')
+        if not isinstance(options, list) or len(options) < 2:
+            return False
+        return _correct_position(question) is not None
+    return True
+
+
+def _correct_position(question):
+    """정답 보기의 위치 (보기 내용 우선, 번호와 내용이 서로 다른 보기를 가리키면 None)"""
+    options = question.get('options') or []
+    correct = question.get('correct', '')
+    index = option_index(correct, options)
+    if index is not None:
+        marker = leading_marker_index(correct)
+        if marker is not None and marker != index:
+            return None
+        return index
+    index = choice_index(correct, options)
+    if index is not None and index < len(options):
+        return index
+    return None
+
+
+def shuffle_choices(question, rng=random):
+    """보기 순서를 섞고 정답과 해설의 보기 번호를 함께 바꿈"""
+    options = question.get('options')
+    if question.get('question_type', '객관식') != '객관식' or not options:
+        return question
+    correct_position = _correct_position(question)
+    if correct_position is None or len(options) > len(CIRCLED_NUMBERS):
+        return question
+
+    order = list(range(len(options)))
+    rng.shuffle(order)
+    new_position = {old: new for new, old in enumerate(order)}
+
+    question['options'] = [
+        f"{CIRCLED_NUMBERS[new]} {strip_choice_marker(options[old])}"
+        for new, old in enumerate(order)
+    ]
+    question['correct'] = question['options'][new_position[correct_position]]
+
+    # 해설에 등장하는 보기 번호(①~⑤)도 새 번호로 변경
+    renumber = {ord(CIRCLED_NUMBERS[old]): CIRCLED_NUMBERS[new] for old, new in new_position.items()}
+    if question.get('explanation'):
+        question['explanation'] = question['explanation'].translate(renumber)
+    return question
+
+
+class QuizCache:
+    """생성된 퀴즈를 프롬프트 해시로 저장하는 크기/TTL 제한 캐시"""
+
+    def __init__(self, max_entries=QUIZ_CACHE_SIZE, ttl=QUIZ_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.repeats = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (저장 시각, 문제 목록, 이미 받은 학생/스레드)
+        self._lock = threading.Lock()
+
+    def get(self, key, viewer=None):
+        """학생마다 보기 순서를 섞은 문제 목록의 복사본을 반환
+
+        viewer(사용자 또는 스레드)가 이미 받은 문제 목록이면 같은 문제를 다시 내지 않도록 None을 반환합니다.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            if viewer is not None and viewer in entry[2]:
+                self.repeats += 1
+                self.misses += 1
+                return None
+            if viewer is not None:
+                entry[2].add(viewer)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            questions = copy.deepcopy(entry[1])
+
+        for question in questions:
+            shuffle_choices(question)
+        random.shuffle(questions)
+        return questions
+
+    def put(self, key, questions, viewer=None):
+        """검증을 통과한 문제 목록만 저장 (viewer는 이 문제를 이미 받은 것으로 기록)"""
+        if self.max_entries <= 0 or not questions:
+            return False
+        if not all(is_valid_question(q) for q in questions):
+            return False
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(questions), {viewer} if viewer is not None else set())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'repeats': self.repeats,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / total, 3) if total else 0
+        }
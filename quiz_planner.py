@@ -0,0 +1,233 @@
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from assistant_runner import RUN_TIMEOUT_SECONDS
+from grading import normalize_answer
+
+logger = logging.getLogger(__name__)
+
+# 한 번의 Assistant 실행에서 생성할 최대 문제 수 (0이면 나누지 않음)
+QUIZ_BATCH_SIZE = int(os.environ.get('QUIZ_BATCH_SIZE', 3))
+# 한 출제 요청에서 동시에 진행할 문제 생성 실행 수
+QUIZ_FANOUT_CONCURRENCY = int(os.environ.get('QUIZ_FANOUT_CONCURRENCY', 4))
+
+
+def plan_batches(count, batch_size):
+    """문제 수를 batch_size 이하의 배치로 고르게 나눔 (예: 10문제, 3 -> [3, 3, 2, 2])"""
+    if batch_size <= 0 or count <= batch_size:
+        return [count]
+    batches = -(-count // batch_size)
+    return [count // batches + (1 if i < count % batches else 0) for i in range(batches)]
+
+
+def question_key(question):
+    """중복 판별용 문제 키 (공백/문장부호를 무시한 문제 본문)"""
+    return normalize_answer(question.get('question', '')) if isinstance(question, dict) else ''
+
+
+class FanOut:
+    """한 출제 요청의 배치 결과를 모으는 상태 (중복 제거, 첫 배치 완료/전체 완료 판단)"""
+
+    def __init__(self, count, batches, on_more=None, on_complete=None, on_total=None):
+        self.count = count
+        self.questions = []
+        self.remaining = batches
+        self.expected = count     # 실패/중복으로 줄어든 예상 문제 수
+        self.duplicates = 0
+        self.errors = []
+        self.delivered = False    # 첫 결과를 반환한 뒤에 추가된 문제는 on_more로 전달
+        self.cancelled = False    # 첫 결과 없이 끝낸 요청은 이후 배치 결과를 버림
+        self.on_more = on_more
+        self.on_complete = on_complete
+        self.on_total = on_total
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def add(self, questions, limit):
+        """배치 결과를 합치고, 모든 배치가 끝났으면 True 반환"""
+        added = []
+        with self._lock:
+            for question in (questions or [])[:limit]:
+                key = question_key(question)
+                if not key or key in self._seen:
+                    self.duplicates += 1
+                    continue
+                if len(self.questions) >= self.count:
+                    break
+                self._seen.add(key)
+                self.questions.append(question)
+                added.append(question)
+            self.remaining -= 1
+            self.expected -= limit - len(added)
+            finished = self.remaining == 0
+            if self.cancelled:
+                return finished
+            deliver_more = self.delivered and added
+            lower_total = self.delivered and len(added) < limit
+            total = max(self.expected, len(self.questions))
+
+        if deliver_more and self.on_more:
+            try:
+                self.on_more(added)
+            except Exception as e:
+                logger.warning(f"문제 분할 생성 추가 전달 오류: {str(e)}")
+
+        if lower_total and self.on_total:
+            try:
+                self.on_total(total)
+            except Exception as e:
+                logger.warning(f"문제 분할 생성 문제 수 갱신 오류: {str(e)}")
+
+        if finished and self.on_complete and self.questions:
+            try:
+                self.on_complete(self.questions)
+            except Exception as e:
+                logger.warning(f"문제 분할 생성 완료 처리 오류: {str(e)}")
+        return finished
+
+    def fail(self, error, limit):
+        self.errors.append(error)
+        return self.add([], limit)
+
+    @property
+    def ready(self):
+        return bool(self.questions) or self.remaining == 0
+
+    def deliver(self, on_first=None):
+        """지금까지 모은 문제를 반환 (on_first는 이후 배치의 on_more보다 먼저 실행됨)
+
+        아직 문제가 없으면 요청을 취소하므로, 호출한 쪽이 다른 방법으로 출제한 뒤에 도착한 배치는 버립니다.
+        """
+        with self._lock:
+            questions = list(self.questions)
+            if not questions:
+                self.cancelled = True
+                return questions
+            self.delivered = True
+            if on_first:
+                on_first(questions, max(self.expected, len(questions)))
+        return questions
+
+
+class FanOutPlanner:
+    """큰 출제 요청을 여러 Assistant 실행으로 나누어 동시에 생성"""
+
+    def __init__(self, generate, batch_size=QUIZ_BATCH_SIZE, concurrency=QUIZ_FANOUT_CONCURRENCY, timeout=None):
+        self.generate = generate  # (subject, grade, question_types, count, unit) -> 문제 목록
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout or RUN_TIMEOUT_SECONDS
+        self.stats = {'requests': 0, 'batches': 0, 'failed_batches': 0, 'duplicates': 0}
+        self._stats_lock = threading.Lock()
+        self._background = set()
+
+    def should_split(self, count):
+        return len(plan_batches(count, self.batch_size)) > 1
+
+    def generate_first(self, subject, grade, question_types, count, unit=None,
+                       on_first=None, on_more=None, on_complete=None, on_total=None):
+        """첫 배치가 완성되면 문제 목록을 바로 반환
+
+        반환 직전에 on_first(문제 목록, 예상 문제 수)를 호출하고, 나머지 배치는 백그라운드에서 끝나는 대로
+        on_more(추가된 문제 목록)로 전달합니다. 배치가 실패하거나 중복이 빠져 예상 문제 수가 줄면
+        on_total(예상 문제 수)을, 모두 끝나면 on_complete(전체 문제 목록)를 호출합니다.
+        """
+        plan = plan_batches(count, self.batch_size)
+        fan_out = self._start(count, plan, on_more, on_complete, on_total)
+        first_ready = threading.Event()
+
+        def collect(future, limit):
+            if future.cancelled():
+                finished = fan_out.add([], limit)
+            else:
+                try:
+                    finished = fan_out.add(future.result(), limit)
+                except Exception as e:
+                    logger.warning(f"문제 분할 생성 실패: {str(e)}")
+                    self._count('failed_batches')
+                    finished = fan_out.fail(e, limit)
+            self._finish(fan_out, finished)
+            if fan_out.ready:
+                first_ready.set()
+
+        # 요청마다 스레드 풀을 따로 만들어 다른 학생의 배치 뒤에서 기다리지 않음
+        executor = ThreadPoolExecutor(max_workers=min(self.concurrency, len(plan)), thread_name_prefix='quiz-fanout')
+        futures = []
+        for batch_count in plan:
+            future = executor.submit(self.generate, subject, grade, question_types, batch_count, unit)
+            future.add_done_callback(lambda f, limit=batch_count: collect(f, limit))
+            futures.append(future)
+        executor.shutdown(wait=False)
+
+        first_ready.wait(self.timeout)
+        try:
+            return self._first_result(fan_out, on_first)
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+    async def generate_first_async(self, generate_async, subject, grade, question_types, count, unit=None,
+                                   on_first=None, on_more=None, on_complete=None, on_total=None):
+        """generate_first()의 비동기 버전 (generate_async는 코루틴 함수)"""
+        plan = plan_batches(count, self.batch_size)
+        fan_out = self._start(count, plan, on_more, on_complete, on_total)
+        first_ready = asyncio.Event()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_batch(batch_count):
+            async with semaphore:
+                try:
+                    finished = fan_out.add(
+                        await generate_async(subject, grade, question_types, batch_count, unit), batch_count
+                    )
+                except Exception as e:
+                    logger.warning(f"문제 분할 생성 실패: {str(e)}")
+                    self._count('failed_batches')
+                    finished = fan_out.fail(e, batch_count)
+            self._finish(fan_out, finished)
+            if fan_out.ready:
+                first_ready.set()
+
+        tasks = []
+        for batch_count in plan:
+            # 첫 배치 반환 후에도 나머지 배치가 계속 진행되도록 참조 유지
+            task = asyncio.create_task(run_batch(batch_count))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+            tasks.append(task)
+
+        try:
+            await asyncio.wait_for(first_ready.wait(), self.timeout)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            return self._first_result(fan_out, on_first)
+        except Exception:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    def _start(self, count, plan, on_more, on_complete, on_total):
+        self._count('requests')
+        self._count('batches', len(plan))
+        logger.info(f"문제 분할 생성: {count}문제 -> {plan}")
+        return FanOut(count, len(plan), on_more, on_complete, on_total)
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def _finish(self, fan_out, finished):
+        if finished:
+            self._count('duplicates', fan_out.duplicates)
+
+    def _first_result(self, fan_out, on_first):
+        questions = fan_out.deliver(on_first)
+        if not questions:
+            if fan_out.errors:
+                raise fan_out.errors[0]
+            raise TimeoutError("문제 생성 시간 초과")
+        return questions
@@ -0,0 +1,176 @@
+"""다음 문제 세트 미리 생성
+
+출제 조건과 미리 생성한 문제 세트는 세션 저장소(current_quiz_store)에 저장하므로, 출제한 워커와 채점하는 워커,
+다음 세트를 요청받은 워커가 달라도 같은 세트를 사용합니다.
+
+    prefetch:thread:<thread_id>   출제 조건과 사용자 (이 세트에서 미리 생성을 시작했는지)
+    prefetch:viewer:<viewer>      사용자별로 생성 중(pending)이거나 생성된(ready) 다음 세트
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+from assistant_runner import RUN_TIMEOUT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# 진행률이 이 값 이상이 되면 다음 문제 세트를 미리 생성 (0이면 비활성화)
+PREFETCH_THRESHOLD = float(os.environ.get('QUIZ_PREFETCH_THRESHOLD', 0.6))
+# 미리 생성한 문제 세트 유지 시간(초)
+PREFETCH_TTL = int(os.environ.get('QUIZ_PREFETCH_TTL', 900))
+# 다른 워커가 생성 중인 세트를 기다릴 때 저장소를 확인하는 간격(초)
+PREFETCH_POLL_INTERVAL = 0.2
+
+THREAD_PREFIX = 'prefetch:thread:'
+VIEWER_PREFIX = 'prefetch:viewer:'
+
+PENDING = 'pending'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class QuizPrefetcher:
+    """학생이 문제를 푸는 동안 같은 조건의 다음 문제 세트를 백그라운드에서 생성"""
+
+    def __init__(self, generate, store, threshold=PREFETCH_THRESHOLD, ttl=PREFETCH_TTL, wait_timeout=None):
+        self.generate = generate  # (subject, grade, question_types, count, unit) -> 문제 목록
+        self.store = store        # 워커끼리 공유하는 세션 저장소
+        self.threshold = threshold
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout or RUN_TIMEOUT_SECONDS
+        self.stats = {'started': 0, 'used': 0, 'wasted': 0, 'failed': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.threshold > 0
+
+    def register(self, thread_id, quiz_request):
+        """출제된 세션의 조건을 기억 (진행률에 따라 같은 조건으로 미리 생성, 한 문제 출제는 제외)"""
+        if not self.enabled or quiz_request.get('viewer') is None:
+            return
+        if quiz_request['question_count'] <= 1:
+            self.store.delete(THREAD_PREFIX + thread_id)
+            return
+        self.store.set(THREAD_PREFIX + thread_id, {
+            'viewer': quiz_request['viewer'],
+            'started': False,
+            'request': {
+                'subject': quiz_request['subject'],
+                'grade': quiz_request['grade'],
+                'unit': quiz_request['unit'],
+                'question_types': quiz_request['question_types'],
+                'question_count': quiz_request['question_count'],
+                'cache_key': quiz_request['cache_key']
+            }
+        })
+
+    def on_progress(self, thread_id, current, total):
+        """답변 채점 후 호출 - 진행률이 기준을 넘으면 다음 세트 생성 시작"""
+        if not self.enabled or not total or current / total < self.threshold:
+            return False
+        claimed = []
+
+        def claim(session):
+            # 같은 세트의 다른 답변(다른 워커 포함)이 이미 시작했으면 건너뜀
+            if not session['started']:
+                session['started'] = True
+                claimed.append(session)
+        self.store.update(THREAD_PREFIX + thread_id, claim)
+        if not claimed:
+            return False
+
+        viewer, request = claimed[0]['viewer'], claimed[0]['request']
+        existing = self.store.get(VIEWER_PREFIX + str(viewer))
+        if (existing is not None and existing['key'] == request['cache_key'] and existing['status'] != FAILED
+                and not self._expired(existing)):
+            return False
+        if existing is not None:
+            self._count('wasted')
+        prefetch = {'id': uuid.uuid4().hex, 'key': request['cache_key'], 'status': PENDING,
+                    'expires_at': time.time() + self.ttl}
+        self.store.set(VIEWER_PREFIX + str(viewer), prefetch)
+        self._count('started')
+
+        threading.Thread(target=self._run, args=(viewer, prefetch['id'], request),
+                         name='quiz-prefetch', daemon=True).start()
+        return True
+
+    def take(self, viewer, cache_key, wait=True):
+        """같은 조건으로 미리 생성한 문제 세트가 있으면 꺼내서 반환
+
+        생성 중이면 wait=True일 때 완료될 때까지 기다립니다 (새로 생성하는 것보다 빠름).
+        """
+        if not self.enabled or viewer is None:
+            return None
+        name = VIEWER_PREFIX + str(viewer)
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            prefetch = self.store.get(name)
+            if prefetch is None:
+                return None
+            if self._expired(prefetch) or prefetch['key'] != cache_key:
+                # 다른 조건으로 출제를 요청했거나 유효 시간이 지남
+                self.store.delete(name)
+                self._count('wasted')
+                return None
+            if prefetch['status'] != PENDING:
+                break
+            if not wait or time.monotonic() >= deadline:
+                return None
+            time.sleep(PREFETCH_POLL_INTERVAL)
+
+        taken = []
+
+        def take_once(entry):
+            # 같은 사용자의 동시 요청(다른 워커 포함) 중 하나만 사용
+            if entry.get('id') == prefetch['id'] and not entry.get('taken'):
+                entry['taken'] = True
+                taken.append(entry.get('prefetched'))
+        self.store.update(name, take_once)
+        self.store.delete(name)
+        if not taken or not taken[0]:
+            return None
+        self._count('used')
+        return taken[0]
+
+    def _run(self, viewer, prefetch_id, request):
+        try:
+            questions = self.generate(
+                request['subject'], request['grade'], request['question_types'],
+                request['question_count'], request['unit']
+            )
+            result = {'status': READY, 'prefetched': questions}
+        except Exception as e:
+            self._count('failed')
+            logger.warning(f"다음 문제 세트 미리 생성 실패: {str(e)}")
+            result = {'status': FAILED}
+
+        def finish(entry):
+            # 그동안 다른 조건으로 다시 시작했으면 그대로 둠
+            if entry.get('id') == prefetch_id:
+                entry.update(result)
+        self.store.update(VIEWER_PREFIX + str(viewer), finish)
+
+    def _expired(self, prefetch):
+        return time.time() > prefetch['expires_at']
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def snapshot(self):
+        prefetches = [self.store.get(key) for key in self.store.keys() if key.startswith(VIEWER_PREFIX)]
+        prefetches = [p for p in prefetches if p is not None and not self._expired(p)]
+        pending = sum(1 for p in prefetches if p['status'] == PENDING)
+        ready = sum(1 for p in prefetches if p['status'] == READY and p.get('prefetched'))
+        with self._lock:
+            stats = dict(self.stats)
+        used, wasted = stats['used'], stats['wasted']
+        return dict(stats,
+                    threshold=self.threshold,
+                    ttl=self.ttl,
+                    pending=pending,
+                    ready=ready,
+                    use_ratio=round(used / (used + wasted), 3) if used + wasted else 0)
@@ -0,0 +1,118 @@
+import re
+import json
+
+_questions_key = re.compile(r'"questions"\s*:\s*\[')
+_partial_escape = re.compile(r'(?:\\u[0-9a-fA-F]{0,3}|(?<!\\)(?:\\\\)*\\)$')
+
+
+def sse_event(event, data):
+    """Server-Sent Events 형식의 메시지 한 건"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class QuestionStreamParser:
+    """스트리밍 중인 퀴즈 JSON에서 완성된 문제 객체를 차례로 추출
+
+    "questions" 배열 안의 객체가 닫히는 즉시 반환하므로 전체 응답이 끝나기 전에 첫 문제를 보낼 수 있습니다.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.count = 0
+        self._position = None     # 다음에 검사할 위치 ("questions" 배열을 찾기 전에는 None)
+        self._depth = 0
+        self._object_start = None
+        self._in_string = False
+        self._escaped = False
+        self._done = False
+
+    def feed(self, text):
+        """텍스트 조각을 추가하고 새로 완성된 문제 목록을 반환"""
+        self.buffer += text
+        if self._position is None:
+            match = _questions_key.search(self.buffer)
+            if not match:
+                return []
+            self._position = match.end()
+
+        found = []
+        buffer = self.buffer
+        while self._position < len(buffer) and not self._done:
+            char = buffer[self._position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                if self._depth == 0:
+                    self._object_start = self._position
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        found.append(json.loads(buffer[self._object_start:self._position + 1]))
+                    except ValueError:
+                        pass
+            elif char == ']' and self._depth == 0:
+                self._done = True
+            self._position += 1
+
+        self.count += len(found)
+        return found
+
+
+class FieldStreamParser:
+    """스트리밍 중인 JSON에서 지정한 문자열 필드(예: explanation)의 값을 생성되는 대로 추출"""
+
+    def __init__(self, field):
+        self.buffer = ''
+        self.emitted = ''
+        self._key = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._start = None
+        self._closed = False
+
+    def feed(self, text):
+        """텍스트 조각을 추가하고 필드 값 중 새로 생성된 부분을 반환"""
+        self.buffer += text
+        if self._closed:
+            return ''
+        if self._start is None:
+            match = self._key.search(self.buffer)
+            if not match:
+                return ''
+            self._start = match.end()
+
+        raw = self.buffer[self._start:]
+        end = _closing_quote(raw)
+        if end is not None:
+            raw = raw[:end]
+            self._closed = True
+        else:
+            # 이스케이프 시퀀스가 잘린 경우 다음 조각까지 기다림
+            raw = _partial_escape.sub('', raw)
+
+        try:
+            value = json.loads(f'"{raw}"')
+        except ValueError:
+            return ''
+        new_text = value[len(self.emitted):]
+        self.emitted = value
+        return new_text
+
+
+def _closing_quote(raw):
+    escaped = False
+    for i, char in enumerate(raw):
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == '"':
+            return i
+    return None
@@ -0,0 +1,148 @@
+"""통계 보고서 백그라운드 생성 작업
+
+보고서 요청은 작업 ID만 받고 바로 반환하며, 작업 스레드가 보고서를 temp 디렉터리에 파일로 저장합니다.
+작업 ID는 (보고서 종류, 필터, 데이터 버전)으로 정해지므로 데이터가 바뀌지 않았으면 같은 파일을 재사용합니다.
+작업 상태도 같은 디렉터리의 JSON 파일에 저장해 같은 서버의 다른 워커에서도 조회·다운로드할 수 있습니다.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# 동시에 생성할 보고서 수
+REPORT_JOB_WORKERS = int(os.environ.get('REPORT_JOB_WORKERS', 2))
+# 보관할 최대 보고서 파일 수와 보관 시간(초)
+REPORT_ARTIFACT_MAX = int(os.environ.get('REPORT_ARTIFACT_MAX', 50))
+REPORT_ARTIFACT_TTL = int(os.environ.get('REPORT_ARTIFACT_TTL', 86400))
+# 이 시간(초)이 지나도 끝나지 않은 작업은 워커가 종료된 것으로 보고 다시 실행
+REPORT_JOB_TIMEOUT = int(os.environ.get('REPORT_JOB_TIMEOUT', 600))
+
+REPORT_TYPES = ('complete', 'student', 'unit', 'subject', 'grade')
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class ReportJobs:
+    """보고서 작업 실행/상태 관리
+
+    render(report_type, params, out)는 보고서를 파일 객체 out에 쓰고 다운로드 파일명을 반환합니다.
+    """
+
+    def __init__(self, directory, render, max_workers=REPORT_JOB_WORKERS, max_artifacts=REPORT_ARTIFACT_MAX,
+                 ttl=REPORT_ARTIFACT_TTL, job_timeout=REPORT_JOB_TIMEOUT):
+        self.directory = directory
+        self.render = render
+        self.max_artifacts = max_artifacts
+        self.ttl = ttl
+        self.job_timeout = job_timeout
+        self.stats = {'submitted': 0, 'reused': 0, 'completed': 0, 'failed': 0, 'evicted': 0}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='report-job')
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_job_id(report_type, params, version):
+        raw = json.dumps([report_type, params, version], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+    def submit(self, report_type, params, version):
+        """작업을 시작하고 상태를 반환 (같은 데이터 버전의 완료된 보고서나 진행 중인 작업이 있으면 그대로 반환)"""
+        job_id = self.make_job_id(report_type, params, version)
+        with self._lock:
+            status = self.status(job_id)
+            if status and status['status'] == 'done' and os.path.exists(self.artifact_path(job_id)):
+                self.stats['reused'] += 1
+                return status
+            if status and status['status'] == 'running' and time.time() - status['started_at'] < self.job_timeout:
+                return status
+
+            status = {
+                'job_id': job_id,
+                'report_type': report_type,
+                'params': params,
+                'data_version': version,
+                'status': 'running',
+                'started_at': time.time()
+            }
+            self._write_status(status)
+            self.stats['submitted'] += 1
+        self._executor.submit(self._run, status)
+        return status
+
+    def status(self, job_id):
+        """작업 상태 (없거나 잘못된 작업 ID면 None)"""
+        if not JOB_ID_PATTERN.match(job_id or ''):
+            return None
+        try:
+            with open(self._status_path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def artifact_path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.html")
+
+    def _status_path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _write_status(self, status):
+        # 다른 워커가 쓰는 중인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+        path = self._status_path(status['job_id'])
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(status, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def _run(self, status):
+        job_id = status['job_id']
+        artifact_path = self.artifact_path(job_id)
+        temp_path = f"{artifact_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        started = time.perf_counter()
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as out:
+                filename = self.render(status['report_type'], status['params'], out)
+            os.replace(temp_path, artifact_path)
+            status.update(status='done', filename=filename, size=os.path.getsize(artifact_path))
+            self._count('completed')
+        except Exception as e:
+            logger.error(f"보고서 생성 실패 ({status['report_type']}): {str(e)}")
+            status.update(status='failed', error=str(e))
+            self._count('failed')
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        status.update(finished_at=time.time(), elapsed_ms=round((time.perf_counter() - started) * 1000, 2))
+        self._write_status(status)
+        self.evict()
+
+    def evict(self):
+        """보관 시간이 지났거나 최대 개수를 넘은 오래된 보고서 삭제"""
+        now = time.time()
+        finished = []
+        for name in os.listdir(self.directory):
+            job_id, ext = os.path.splitext(name)
+            if ext != '.json':
+                continue
+            status = self.status(job_id)
+            if status and status.get('finished_at'):
+                finished.append((status['finished_at'], job_id))
+        finished.sort(reverse=True)
+        for index, (finished_at, job_id) in enumerate(finished):
+            if index >= self.max_artifacts or now - finished_at > self.ttl:
+                for path in (self.artifact_path(job_id), self._status_path(job_id)):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass   # 다른 작업이 먼저 삭제
+                self._count('evicted')
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def snapshot(self):
+        return dict(self.stats, directory=self.directory, max_artifacts=self.max_artifacts, ttl=self.ttl)
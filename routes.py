@@ -6,10 +6,10 @@ from datetime import datetime
 from database import Base, db
 from sqlalchemy import func, case, distinct
 import os
-import time
 import logging
 from flask_login import login_required
 from models import User, Answer
+from assistant_runner import AssistantRunner
 
 app = Flask(__name__)
 client = OpenAI(
@@ -21,6 +21,7 @@ class ScienceQuizBot:
         self.assistant_id = os.getenv('ASSISTANT_ID')
         if not self.assistant_id:
             raise ValueError("Assistant ID not found in environment variables")
+        self.runner = AssistantRunner(client, self.assistant_id)
 
     def get_quiz(self):
         try:
@@ -50,29 +51,8 @@ class ScienceQuizBot:
 
     def get_explanation(self, thread_id, question):
         try:
-            message = client.beta.threads.messages.create(
-                thread_id=thread_id,
-                role="user",
-                content=question
-            )
-            
-            run = client.beta.threads.runs.create(
-                thread_id=thread_id,
-                assistant_id=self.assistant_id
-            )
-            
-            while True:
-                run = client.beta.threads.runs.retrieve(
-                    thread_id=thread_id,
-                    run_id=run.id
-                )
-                if run.status == 'completed':
-                    break
-                time.sleep(0.5)
-            
-            # GPT 응답 처리
-            response = client.beta.threads.messages.list(thread_id=thread_id)
-            response_text = response.data[0].content[0].text.value
+            # 메시지 추가 및 실행 완료 대기
+            response_text = self.runner.run(thread_id, question)
             
             print("\n=== GPT 답변 ===")
             print(response_text)
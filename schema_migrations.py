@@ -0,0 +1,108 @@
+"""DB 스키마 마이그레이션
+
+db.create_all()은 없는 테이블만 만들고 기존 테이블의 열과 인덱스는 바꾸지 않으므로, 기존 DB의 스키마 변경은
+번호를 붙인 마이그레이션으로 MIGRATIONS 끝에 추가합니다. 적용한 번호는 schema_migration 테이블에 기록하고
+서버 시작 시(create_all 다음) 적용하지 않은 마이그레이션만 번호 순서대로 실행합니다.
+
+마이그레이션은 engine을 받는 함수이며, 새 DB(create_all이 이미 최신 스키마로 만든 경우)에서도 안전하도록
+현재 스키마를 확인하고 필요한 변경만 합니다. 여러 워커가 동시에 시작하면 schema_migration의 잠금 행(번호 0)을
+먼저 추가한 워커만 실행하고 나머지는 끝날 때까지 기다립니다.
+
+    flask --app app db-status    # 마이그레이션별 적용 여부
+    flask --app app db-upgrade   # 적용하지 않은 마이그레이션 실행
+"""
+import os
+import time
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+from sqlalchemy import select, insert, delete, inspect, text
+from sqlalchemy.exc import IntegrityError
+from models import Answer, AnswerRollup, AnswerBucket, SchemaMigration
+import question_store
+import category_store
+
+logger = logging.getLogger(__name__)
+
+# 이 시간(초)보다 오래된 잠금은 비정상 종료한 워커의 것으로 보고 해제
+SCHEMA_MIGRATION_LOCK_TIMEOUT = int(os.environ.get('SCHEMA_MIGRATION_LOCK_TIMEOUT', 600))
+LOCK_VERSION = 0
+LOCK_POLL_INTERVAL = 0.5
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable
+
+
+def add_stats_indexes(engine):
+    """대시보드/다운로드 조회용 복합 인덱스 추가 (Answer.category_id 단일 인덱스는 복합 인덱스로 대체)"""
+    with engine.begin() as connection:
+        if 'ix_answer_category_id' in {index['name'] for index in inspect(connection).get_indexes('answer')}:
+            connection.execute(text('DROP INDEX ix_answer_category_id'))
+        for model in (Answer, AnswerRollup, AnswerBucket):
+            for index in model.__table__.indexes:
+                index.create(connection, checkfirst=True)
+
+
+MIGRATIONS = (
+    Migration(1, '문제 내용을 Question으로 분리 (Answer.question_id)', question_store.upgrade_schema),
+    Migration(2, '분류를 Category로 분리 (Answer.category_id)', category_store.upgrade_schema),
+    Migration(3, '통계/다운로드 조회용 복합 인덱스', add_stats_indexes),
+)
+
+
+def applied_versions(engine):
+    """적용한 마이그레이션 번호 집합"""
+    SchemaMigration.__table__.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        return set(connection.scalars(select(SchemaMigration.version).where(SchemaMigration.version != LOCK_VERSION)))
+
+
+def pending(engine):
+    """적용하지 않은 마이그레이션 목록 (번호 순서)"""
+    applied = applied_versions(engine)
+    return [migration for migration in MIGRATIONS if migration.version not in applied]
+
+
+@contextmanager
+def migration_lock(engine, timeout=SCHEMA_MIGRATION_LOCK_TIMEOUT):
+    """잠금 행을 추가할 수 있을 때까지 기다렸다가 마이그레이션 구간을 한 워커만 실행"""
+    while True:
+        try:
+            with engine.begin() as connection:
+                connection.execute(insert(SchemaMigration).values(
+                    version=LOCK_VERSION, name='lock', applied_at=datetime.utcnow()))
+            break
+        except IntegrityError:
+            with engine.begin() as connection:
+                connection.execute(delete(SchemaMigration).where(
+                    SchemaMigration.version == LOCK_VERSION,
+                    SchemaMigration.applied_at < datetime.utcnow() - timedelta(seconds=timeout)))
+            time.sleep(LOCK_POLL_INTERVAL)
+    try:
+        yield
+    finally:
+        with engine.begin() as connection:
+            connection.execute(delete(SchemaMigration).where(SchemaMigration.version == LOCK_VERSION))
+
+
+def upgrade(engine):
+    """적용하지 않은 마이그레이션을 번호 순서대로 실행하고 실행한 번호 목록을 반환"""
+    if not pending(engine):
+        return []
+    done = []
+    with migration_lock(engine):
+        # 기다리는 동안 다른 워커가 적용한 마이그레이션은 건너뜀
+        for migration in pending(engine):
+            logger.info(f"스키마 마이그레이션 {migration.version}: {migration.name}")
+            migration.apply(engine)
+            with engine.begin() as connection:
+                connection.execute(insert(SchemaMigration).values(
+                    version=migration.version, name=migration.name, applied_at=datetime.utcnow()))
+            done.append(migration.version)
+    return done
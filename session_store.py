@@ -0,0 +1,401 @@
+"""스레드별 퀴즈 진행 정보(current_quiz_store) 저장소
+
+gunicorn 워커가 여러 개여도 출제한 워커와 채점하는 워커가 같은 정보를 보도록 프로세스 밖 저장소를 지원합니다.
+
+    QUIZ_SESSION_STORE=memory                       # 프로세스 내부 (워커 1개일 때)
+    QUIZ_SESSION_STORE=sqlite:///temp/sessions.db   # 같은 서버의 워커끼리 공유 (WAL)
+    QUIZ_SESSION_STORE=redis://localhost:6379/0     # 여러 서버에서 공유 (redis 패키지 필요)
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import threading
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# 마지막 저장 후 이 시간(초)이 지나면 세션 정보 삭제
+SESSION_TTL = int(os.environ.get('QUIZ_SESSION_TTL', 6 * 3600))
+
+# 프로세스 내부 저장소 한도 (오래 실행되는 워커의 메모리가 계속 늘지 않도록)
+SESSION_MAX_ENTRIES = int(os.environ.get('QUIZ_SESSION_MAX_ENTRIES', 5000))
+SESSION_MAX_BYTES = int(os.environ.get('QUIZ_SESSION_MAX_MB', 64)) * 1024 * 1024
+
+# 이 크기(바이트) 이상이면 압축해서 저장
+COMPRESS_MIN_BYTES = 512
+_COMPRESSED = b'z'
+_PLAIN = b'j'
+
+
+def _dumps(value):
+    raw = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        return _COMPRESSED + zlib.compress(raw)
+    return _PLAIN + raw
+
+
+def _loads(data):
+    raw = zlib.decompress(data[1:]) if data[:1] == _COMPRESSED else data[1:]
+    return json.loads(raw.decode('utf-8'))
+
+
+def pack(entry):
+    """세션 정보를 간결한 바이트열로 직렬화
+
+    'quiz'가 questions[current_index]와 같으면 중복 저장하지 않고 불러올 때 복원합니다.
+    """
+    entry = dict(entry)
+    questions = entry.get('questions')
+    if questions and entry.get('quiz') == questions[entry.get('current_index', 0)]:
+        del entry['quiz']
+    return _dumps(entry)
+
+
+def unpack(data):
+    entry = _loads(data)
+    if 'quiz' not in entry and entry.get('questions'):
+        entry['quiz'] = entry['questions'][entry.get('current_index', 0)]
+    return entry
+
+
+class SessionStore(ABC):
+    """dict처럼 쓸 수 있는 세션 저장소 기본 클래스 (저장소마다 get/set/delete/update/keys 구현)
+
+    저장된 정보를 바꿀 때는 꺼낸 dict를 직접 수정하지 말고 다시 저장하거나 update()를 사용합니다.
+    """
+    name = 'base'
+
+    def __init__(self, ttl=SESSION_TTL):
+        self.ttl = ttl
+
+    @abstractmethod
+    def get(self, key, default=None):
+        """저장된 정보 (없거나 만료됐으면 default)"""
+
+    @abstractmethod
+    def set(self, key, entry):
+        """정보를 저장하고 유지 시간을 다시 시작"""
+
+    @abstractmethod
+    def delete(self, key):
+        """정보 삭제 (없으면 무시)"""
+
+    @abstractmethod
+    def update(self, key, fn):
+        """저장된 정보를 원자적으로 변경 (fn이 dict를 수정하거나 새 dict를 반환, 정보가 없으면 None 반환)"""
+
+    @abstractmethod
+    def keys(self):
+        """만료되지 않은 키 목록"""
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __getitem__(self, key):
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def __setitem__(self, key, entry):
+        self.set(key, entry)
+
+    def __delitem__(self, key):
+        self.delete(key)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def pop(self, key, default=None):
+        entry = self.get(key)
+        if entry is None:
+            return default
+        self.delete(key)
+        return entry
+
+    def stats(self):
+        return {'backend': self.name, 'ttl': self.ttl}
+
+
+class QuizSession:
+    """프로세스 내부 저장소의 간결한 세션 레코드 (문제 목록은 압축 직렬화, 진행 정보는 정수로 보관)"""
+    __slots__ = ('questions', 'single', 'current_index', 'current', 'total', 'extra', 'expires_at')
+
+    def __init__(self, entry, expires_at):
+        self.single = 'questions' not in entry
+        if self.single:
+            questions = [entry['quiz']] if entry.get('quiz') else []
+        else:
+            questions = entry['questions']
+        progress = entry.get('progress')
+        compact = isinstance(progress, dict) and set(progress) == {'current', 'total'}
+        self.questions = _dumps(questions)
+        self.current_index = entry.get('current_index')
+        self.current = progress['current'] if compact else None
+        self.total = progress['total'] if compact else None
+        # 진행 정보가 다른 형식이면 그대로 extra에 보관
+        skip = {'questions', 'quiz', 'current_index', 'progress'} if compact else {'questions', 'quiz', 'current_index'}
+        if questions and not self.single and entry.get('quiz') != questions[min(self.current_index or 0, len(questions) - 1)]:
+            skip.discard('quiz')
+        self.extra = {key: value for key, value in entry.items() if key not in skip} or None
+        self.expires_at = expires_at
+
+    def to_entry(self):
+        questions = _loads(self.questions)
+        entry = {}
+        if self.current is not None or self.total is not None:
+            entry['progress'] = {'current': self.current, 'total': self.total}
+        if self.current_index is not None:
+            entry['current_index'] = self.current_index
+        if self.single:
+            if questions:
+                entry['quiz'] = questions[0]
+        else:
+            entry['questions'] = questions
+            if questions and not (self.extra and 'quiz' in self.extra):
+                entry['quiz'] = questions[min(self.current_index or 0, len(questions) - 1)]
+        if self.extra:
+            entry.update(self.extra)
+        return entry
+
+    @property
+    def nbytes(self):
+        """대략적인 메모리 사용량"""
+        size = sys.getsizeof(self) + sys.getsizeof(self.questions)
+        if self.extra:
+            size += sys.getsizeof(self.extra)
+        return size
+
+
+class InProcessSessionStore(SessionStore):
+    """프로세스 메모리에 저장 (워커가 하나일 때, 테스트용)
+
+    항목 수와 메모리 한도를 넘으면 가장 오래 쓰지 않은 세션부터 제거합니다 (LRU + TTL).
+    """
+    name = 'memory'
+    SWEEP_EVERY = 256
+
+    def __init__(self, ttl=SESSION_TTL, max_entries=SESSION_MAX_ENTRIES, max_bytes=SESSION_MAX_BYTES):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+        self._sessions = OrderedDict()  # key -> QuizSession
+        self._writes = 0
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None and time.monotonic() > session.expires_at:
+                self._remove(key)
+                self.counters['expirations'] += 1
+                session = None
+            if session is None:
+                self.counters['misses'] += 1
+                return default
+            self._sessions.move_to_end(key)
+            self.counters['hits'] += 1
+            return session.to_entry()
+
+    def set(self, key, entry):
+        session = QuizSession(entry, time.monotonic() + self.ttl)
+        with self._lock:
+            self._remove(key)
+            self._sessions[key] = session
+            self.nbytes += session.nbytes
+            self._writes += 1
+            if self._writes % self.SWEEP_EVERY == 0:
+                self._sweep_expired()
+            while self._sessions and (len(self._sessions) > self.max_entries or self.nbytes > self.max_bytes):
+                oldest = next(iter(self._sessions))
+                self._remove(oldest)
+                self.counters['evictions'] += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def update(self, key, fn):
+        with self._lock:
+            entry = self.get(key)
+            if entry is None:
+                return None
+            result = fn(entry)
+            entry = entry if result is None else result
+            self.set(key, entry)
+            return entry
+
+    def keys(self):
+        now = time.monotonic()
+        with self._lock:
+            return [key for key, session in self._sessions.items() if session.expires_at >= now]
+
+    def _remove(self, key):
+        session = self._sessions.pop(key, None)
+        if session is not None:
+            self.nbytes -= session.nbytes
+
+    def _sweep_expired(self):
+        now = time.monotonic()
+        for key in [key for key, session in self._sessions.items() if session.expires_at < now]:
+            self._remove(key)
+            self.counters['expirations'] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(super().stats(),
+                        entries=len(self._sessions),
+                        max_entries=self.max_entries,
+                        bytes=self.nbytes,
+                        max_bytes=self.max_bytes,
+                        **self.counters)
+
+
+class SQLiteSessionStore(SessionStore):
+    """같은 서버의 여러 워커가 공유하는 SQLite(WAL) 저장소"""
+    name = 'sqlite'
+    PURGE_EVERY = 200
+
+    def __init__(self, path, ttl=SESSION_TTL):
+        super().__init__(ttl)
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS quiz_sessions ('
+            'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)'
+        )
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # isolation_level=None: 자동 커밋, update()에서만 직접 트랜잭션 사용
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key, default=None):
+        row = self._connection().execute(
+            'SELECT value FROM quiz_sessions WHERE key = ? AND expires_at >= ?', (key, time.time())
+        ).fetchone()
+        return unpack(row[0]) if row else default
+
+    def set(self, key, entry):
+        self._write(self._connection(), key, entry)
+        self._purge_expired()
+
+    def _write(self, connection, key, entry):
+        connection.execute(
+            'INSERT INTO quiz_sessions (key, value, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at',
+            (key, pack(entry), time.time() + self.ttl)
+        )
+
+    def delete(self, key):
+        self._connection().execute('DELETE FROM quiz_sessions WHERE key = ?', (key,))
+
+    def update(self, key, fn):
+        connection = self._connection()
+        # 쓰기 잠금을 먼저 잡아 다른 워커의 동시 변경이 사라지지 않도록 함
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                'SELECT value FROM quiz_sessions WHERE key = ? AND expires_at >= ?', (key, time.time())
+            ).fetchone()
+            if row is None:
+                connection.execute('ROLLBACK')
+                return None
+            entry = unpack(row[0])
+            result = fn(entry)
+            entry = entry if result is None else result
+            self._write(connection, key, entry)
+            connection.execute('COMMIT')
+            return entry
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+    def keys(self):
+        rows = self._connection().execute(
+            'SELECT key FROM quiz_sessions WHERE expires_at >= ?', (time.time(),)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def _purge_expired(self):
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self._connection().execute('DELETE FROM quiz_sessions WHERE expires_at < ?', (time.time(),))
+
+    def stats(self):
+        return dict(super().stats(), path=self.path, entries=len(self))
+
+
+class RedisSessionStore(SessionStore):
+    """Redis 프로토콜 저장소 (여러 서버 공유, redis 패키지 필요)"""
+    name = 'redis'
+    PREFIX = 'quiz_session:'
+
+    def __init__(self, url, ttl=SESSION_TTL):
+        super().__init__(ttl)
+        import redis
+        self._redis = redis
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key, default=None):
+        data = self.client.get(self.PREFIX + key)
+        return unpack(data) if data is not None else default
+
+    def set(self, key, entry):
+        self.client.set(self.PREFIX + key, pack(entry), ex=self.ttl)
+
+    def delete(self, key):
+        self.client.delete(self.PREFIX + key)
+
+    def update(self, key, fn):
+        name = self.PREFIX + key
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    # 다른 워커가 중간에 변경하면 처음부터 다시 시도
+                    pipe.watch(name)
+                    data = pipe.get(name)
+                    if data is None:
+                        pipe.unwatch()
+                        return None
+                    entry = unpack(data)
+                    result = fn(entry)
+                    entry = entry if result is None else result
+                    pipe.multi()
+                    pipe.set(name, pack(entry), ex=self.ttl)
+                    pipe.execute()
+                    return entry
+                except self._redis.WatchError:
+                    continue
+
+    def keys(self):
+        return [key.decode('utf-8')[len(self.PREFIX):] for key in self.client.scan_iter(self.PREFIX + '*')]
+
+
+def create_session_store(url=None, default_path=None, ttl=SESSION_TTL):
+    """QUIZ_SESSION_STORE 설정에 맞는 저장소 생성"""
+    url = url or os.environ.get('QUIZ_SESSION_STORE') or 'sqlite'
+    if url == 'memory':
+        return InProcessSessionStore(ttl)
+    if url.startswith('redis://') or url.startswith('rediss://'):
+        return RedisSessionStore(url, ttl)
+    if url == 'sqlite':
+        return SQLiteSessionStore(default_path or 'quiz_sessions.db', ttl)
+    if url.startswith('sqlite:///'):
+        return SQLiteSessionStore(url[len('sqlite:///'):], ttl)
+    raise ValueError(f"지원하지 않는 세션 저장소: {url}")
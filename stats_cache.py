@@ -0,0 +1,66 @@
+"""관리자 통계 결과 캐시
+
+(학생, 과목, 학년) 필터별 계산 결과를 데이터 버전과 함께 공유 저장소에 보관합니다.
+답변이 바뀌면 같은 트랜잭션에서 데이터 버전이 올라가므로(stats_rollup.bump_version)
+모든 워커의 이전 결과가 한 번에 무효화됩니다.
+"""
+import os
+import threading
+import logging
+import stats_rollup
+from stats_engine import compute_stats, StatsResult
+
+logger = logging.getLogger(__name__)
+
+# 계산 결과 유지 시간(초) - 데이터가 바뀌면 버전으로 무효화되므로 오래된 버전 정리용
+STATS_CACHE_TTL = int(os.environ.get('STATS_CACHE_TTL', 3600))
+
+
+class StatsCache:
+    """데이터 버전이 키에 포함된 통계 결과 캐시 (store는 session_store의 저장소)"""
+
+    def __init__(self, store):
+        self.store = store
+        self.stats = {'hits': 0, 'misses': 0, 'errors': 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(version, student_id=None, subject=None, grade=None, start=None, end=None):
+        return (f"stats:{version}:{student_id or ''}:{subject or ''}:{grade or ''}:"
+                f"{start.isoformat() if start else ''}:{end.isoformat() if end else ''}")
+
+    def load(self, session, student_id=None, subject=None, grade=None, start=None, end=None):
+        """필터 조건의 통계를 캐시에서 꺼내거나 계산해서 저장"""
+        key = self.make_key(stats_rollup.data_version(session), student_id, subject, grade, start, end)
+        try:
+            cached = self.store.get(key)
+        except Exception as e:
+            logger.warning(f"통계 캐시 조회 오류: {str(e)}")
+            cached = None
+            self._count('errors')
+        if cached is not None:
+            self._count('hits')
+            return StatsResult.from_dict(cached)
+
+        self._count('misses')
+        result = compute_stats(session, student_id, subject, grade, start, end)
+        try:
+            self.store.set(key, result.to_dict())
+        except Exception as e:
+            logger.warning(f"통계 캐시 저장 오류: {str(e)}")
+            self._count('errors')
+        return result
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def snapshot(self, session=None):
+        hits, misses = self.stats['hits'], self.stats['misses']
+        data = dict(self.stats,
+                    backend=self.store.name,
+                    ttl=self.store.ttl,
+                    hit_ratio=round(hits / (hits + misses), 3) if hits + misses else 0)
+        if session is not None:
+            data['data_version'] = stats_rollup.data_version(session)
+        return data
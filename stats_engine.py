@@ -0,0 +1,298 @@
+"""관리자 대시보드/통계 보고서 공통 집계
+
+집계 테이블(AnswerRollup, 기간이 있으면 일별 AnswerBucket)을 한 번만 읽어
+전체 합계와 단원/과목/학년/학생별 통계를 함께 계산합니다.
+PostgreSQL에서는 GROUPING SETS 한 문장으로, 그 밖의 DB에서는 행을 한 번 순회하며 계산합니다.
+"""
+from dataclasses import dataclass, field, asdict
+from sqlalchemy import select, func, case, and_, true, tuple_
+from models import User, AnswerBucket, Category
+from stats_rollup import answer_counts, bucket_start
+
+# 평균 학습 진도율 계산 기준 문제 수
+PROGRESS_TARGET = 100
+# 기간을 지정하지 않았을 때 대시보드에 보여 줄 주별 추이 기간
+TREND_DEFAULT_WEEKS = 12
+
+
+@dataclass
+class GroupStats:
+    """한 그룹(단원/과목/학년)의 통계"""
+    subject: str = ''
+    grade: str = ''
+    unit: str = ''
+    attempts: int = 0
+    correct: int = 0
+    unique_students: int = 0
+
+    @property
+    def total_questions(self):
+        return self.attempts
+
+    @property
+    def correct_answers(self):
+        return self.correct
+
+    @property
+    def incorrect_answers(self):
+        return self.attempts - self.correct
+
+    @property
+    def accuracy_rate(self):
+        return round(self.correct * 100.0 / self.attempts, 1) if self.attempts else 0
+
+    @property
+    def name(self):
+        return f"{self.subject} - {self.grade} - {self.unit}"
+
+
+@dataclass
+class TrendPoint:
+    """기간 버킷 하나의 통계 (bucket_start는 YYYY-MM-DD)"""
+    bucket_start: str
+    attempts: int = 0
+    correct: int = 0
+
+    @property
+    def accuracy_rate(self):
+        return round(self.correct * 100.0 / self.attempts, 1) if self.attempts else 0
+
+    def to_dict(self):
+        return dict(asdict(self), accuracy_rate=self.accuracy_rate)
+
+
+@dataclass
+class StudentRef:
+    """학생별 통계에 표시할 학생 정보 (캐시에 저장할 수 있도록 ORM 객체 대신 사용)"""
+    id: int
+    username: str
+
+
+@dataclass
+class StatsResult:
+    """필터 조건 하나에 대한 대시보드/보고서 통계"""
+    student_id: int = None
+    subject: str = None
+    grade: str = None
+    total_answers: int = 0
+    total_correct: int = 0
+    by_unit: list = field(default_factory=list)      # GroupStats (과목, 학년, 단원)
+    by_subject: list = field(default_factory=list)   # GroupStats (과목)
+    by_grade: list = field(default_factory=list)     # GroupStats (학년)
+    progress: dict = field(default_factory=dict)     # 학생 ID -> 풀이 수 (학생 필터 제외)
+    subjects: list = field(default_factory=list)     # 필터 선택 목록용 전체 과목
+    grades: list = field(default_factory=list)       # 필터 선택 목록용 전체 학년
+
+    @property
+    def accuracy_rate(self):
+        return (self.total_correct / self.total_answers * 100) if self.total_answers > 0 else 0
+
+    @property
+    def average_progress(self):
+        """학생별 진도율(PROGRESS_TARGET 문제 기준) 평균"""
+        if not self.progress:
+            return 0
+        return sum(min(total / PROGRESS_TARGET * 100, 100) for total in self.progress.values()) / len(self.progress)
+
+    def to_dict(self):
+        data = asdict(self)
+        # JSON으로 저장하면 dict 키가 문자열이 되므로 목록으로 변환
+        data['progress'] = list(self.progress.items())
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        data['by_unit'] = [GroupStats(**row) for row in data['by_unit']]
+        data['by_subject'] = [GroupStats(**row) for row in data['by_subject']]
+        data['by_grade'] = [GroupStats(**row) for row in data['by_grade']]
+        data.pop('by_student', None)   # 이전 버전 캐시 항목
+        data['progress'] = {user_id: attempts for user_id, attempts in data['progress']}
+        return cls(**data)
+
+
+class _Accumulator:
+    """한 그룹의 풀이 수/정답 수/학생 수 누적"""
+    __slots__ = ('attempts', 'correct', 'students')
+
+    def __init__(self):
+        self.attempts = 0
+        self.correct = 0
+        self.students = set()
+
+    def add(self, user_id, attempts, correct):
+        self.attempts += attempts
+        self.correct += correct
+        self.students.add(user_id)
+
+
+def compute_stats(session, student_id=None, subject=None, grade=None, start=None, end=None):
+    """필터 조건(학생, 과목, 학년, 기간)에 맞는 모든 통계를 한 번의 조회로 계산"""
+    admin_ids = set(session.scalars(select(User.id).where(User.username == 'admin')))
+    source = answer_counts(start, end)
+    if session.get_bind().dialect.name == 'postgresql':
+        result = _compute_grouping_sets(session, source, student_id, subject, grade, admin_ids)
+    else:
+        result = _compute_single_pass(session, source, student_id, subject, grade, admin_ids)
+    return result
+
+
+def _compute_single_pass(session, source, student_id, subject, grade, admin_ids):
+    rows = session.execute(select(
+        source.c.user_id, source.c.subject, source.c.grade, source.c.unit, source.c.attempts, source.c.correct
+    ))
+
+    result = StatsResult(student_id, subject, grade)
+    units, subjects, grades = {}, {}, {}
+    all_subjects, all_grades = set(), set()
+    for user_id, row_subject, row_grade, unit, attempts, correct in rows:
+        all_subjects.add(row_subject)
+        all_grades.add(row_grade)
+        if (subject and row_subject != subject) or (grade and row_grade != grade):
+            continue
+        if user_id not in admin_ids:
+            result.progress[user_id] = result.progress.get(user_id, 0) + attempts
+        if student_id and user_id != student_id:
+            continue
+
+        result.total_answers += attempts
+        result.total_correct += correct
+        for groups, key in ((units, (row_subject, row_grade, unit)), (subjects, row_subject), (grades, row_grade)):
+            groups.setdefault(key, _Accumulator()).add(user_id, attempts, correct)
+
+    result.by_unit = [_unit_stats(key, acc.attempts, acc.correct, len(acc.students)) for key, acc in units.items()]
+    result.by_subject = [GroupStats(subject=key, attempts=acc.attempts, correct=acc.correct,
+                                    unique_students=len(acc.students)) for key, acc in subjects.items()]
+    result.by_grade = [GroupStats(grade=key, attempts=acc.attempts, correct=acc.correct,
+                                  unique_students=len(acc.students)) for key, acc in grades.items()]
+    result.subjects = sorted(value for value in all_subjects if value)
+    result.grades = sorted(value for value in all_grades if value)
+    return result
+
+
+def grouping_sets_query(student_id=None, subject=None, grade=None, source=None):
+    """PostgreSQL GROUPING SETS 집계 문장
+
+    필터는 WHERE 대신 조건부 합계로 적용해 필터 선택 목록(전체 과목/학년)과
+    학생 필터를 뺀 진도율 합계도 같은 문장에서 계산합니다.
+    """
+    rollup = (source if source is not None else answer_counts()).c
+    in_category = and_(
+        rollup.subject == subject if subject else true(),
+        rollup.grade == grade if grade else true()
+    )
+    selected = and_(in_category, rollup.user_id == student_id if student_id else true())
+    return select(
+        func.grouping(rollup.user_id).label('no_user'),
+        func.grouping(rollup.subject).label('no_subject'),
+        func.grouping(rollup.grade).label('no_grade'),
+        func.grouping(rollup.unit).label('no_unit'),
+        rollup.user_id, rollup.subject, rollup.grade, rollup.unit,
+        func.sum(case((in_category, rollup.attempts), else_=0)).label('category_attempts'),
+        func.sum(case((selected, rollup.attempts), else_=0)).label('attempts'),
+        func.sum(case((selected, rollup.correct), else_=0)).label('correct'),
+        func.count(func.distinct(case((selected, rollup.user_id)))).label('unique_students')
+    ).group_by(func.grouping_sets(
+        tuple_(rollup.user_id),
+        tuple_(rollup.subject, rollup.grade, rollup.unit),
+        tuple_(rollup.subject),
+        tuple_(rollup.grade),
+        tuple_()
+    ))
+
+
+def _compute_grouping_sets(session, source, student_id, subject, grade, admin_ids):
+    result = StatsResult(student_id, subject, grade)
+    for row in session.execute(grouping_sets_query(student_id, subject, grade, source)):
+        if not row.no_user:
+            if row.user_id in admin_ids:
+                continue
+            if row.category_attempts:
+                result.progress[row.user_id] = row.category_attempts
+        elif not row.no_unit:
+            if row.attempts:
+                result.by_unit.append(_unit_stats((row.subject, row.grade, row.unit), row.attempts, row.correct,
+                                                  row.unique_students))
+        elif not row.no_subject:
+            if row.subject:
+                result.subjects.append(row.subject)
+            if row.attempts:
+                result.by_subject.append(GroupStats(subject=row.subject, attempts=row.attempts, correct=row.correct,
+                                                    unique_students=row.unique_students))
+        elif not row.no_grade:
+            if row.grade:
+                result.grades.append(row.grade)
+            if row.attempts:
+                result.by_grade.append(GroupStats(grade=row.grade, attempts=row.attempts, correct=row.correct,
+                                                  unique_students=row.unique_students))
+        else:
+            result.total_answers = row.attempts or 0
+            result.total_correct = row.correct or 0
+    result.subjects.sort()
+    result.grades.sort()
+    return result
+
+
+def iter_student_stats(session, student_id=None, subject=None, grade=None, start=None, end=None, batch_size=500):
+    """학생별 (StudentRef, 풀이 수, 정답 수)를 이름 순으로 조금씩 읽어 반환 (보고서 스트리밍용)"""
+    source = answer_counts(start, end)
+    statement = select(
+        User.id, User.username, func.sum(source.c.attempts), func.sum(source.c.correct)
+    ).join(source, User.id == source.c.user_id).where(User.username != 'admin')
+    if student_id:
+        statement = statement.where(User.id == student_id)
+    if subject:
+        statement = statement.where(source.c.subject == subject)
+    if grade:
+        statement = statement.where(source.c.grade == grade)
+    statement = statement.group_by(User.id, User.username).order_by(User.username, User.id)
+    for user_id, username, attempts, correct in session.execute(statement.execution_options(yield_per=batch_size)):
+        yield StudentRef(user_id, username), attempts, correct
+
+
+def student_summary(session, student_id=None, subject=None, grade=None, start=None, end=None):
+    """iter_student_stats 합계 (보고서 합계 행용) - 학생 목록을 만들지 않고 집계 한 번으로 계산"""
+    source = answer_counts(start, end)
+    statement = select(
+        func.count(func.distinct(source.c.user_id)), func.sum(source.c.attempts), func.sum(source.c.correct)
+    ).join(User, User.id == source.c.user_id).where(User.username != 'admin', source.c.attempts > 0)
+    if student_id:
+        statement = statement.where(source.c.user_id == student_id)
+    if subject:
+        statement = statement.where(source.c.subject == subject)
+    if grade:
+        statement = statement.where(source.c.grade == grade)
+    students, total, correct = session.execute(statement).one()
+    return {'students': students, 'total': total or 0, 'correct': correct or 0}
+
+
+def accuracy_trend(session, period='week', start=None, end=None, student_id=None, subject=None, grade=None,
+                   unit=None):
+    """기간 버킷(day/week)별 풀이 수와 정답률 - 필터에 맞는 버킷만 합산하므로 기간 수만큼만 반환"""
+    statement = trend_query(period, start, end, student_id, subject, grade, unit)
+    return [TrendPoint(day.isoformat(), attempts, correct or 0) for day, attempts, correct in session.execute(statement)]
+
+
+def trend_query(period='week', start=None, end=None, student_id=None, subject=None, grade=None, unit=None):
+    """정답률 추이 집계 문장"""
+    statement = select(
+        AnswerBucket.bucket_start, func.sum(AnswerBucket.attempts), func.sum(AnswerBucket.correct)
+    ).join(User, User.id == AnswerBucket.user_id).where(AnswerBucket.period == period, User.username != 'admin')
+    if subject or grade or unit:
+        statement = statement.join(Category, Category.id == AnswerBucket.category_id)
+    for column, value in ((AnswerBucket.user_id, student_id), (Category.subject, subject),
+                          (Category.grade, grade), (Category.unit, unit)):
+        if value:
+            statement = statement.where(column == value)
+    if start:
+        # 시작일이 속한 주도 포함
+        statement = statement.where(AnswerBucket.bucket_start >= bucket_start(start, period))
+    if end:
+        statement = statement.where(AnswerBucket.bucket_start <= end)
+    return statement.group_by(AnswerBucket.bucket_start).order_by(AnswerBucket.bucket_start)
+
+
+def _unit_stats(key, attempts, correct, unique_students):
+    subject, grade, unit = key
+    return GroupStats(subject=subject or '미분류', grade=grade, unit=unit, attempts=attempts, correct=correct,
+                      unique_students=unique_students)
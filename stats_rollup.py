@@ -0,0 +1,264 @@
+"""답변 통계 집계 테이블(AnswerRollup, AnswerBucket) 관리
+
+사용자/분류(Category ID)별 풀이 수와 정답 수를 답변 저장·삭제와 같은 트랜잭션에서 갱신하므로
+관리자 대시보드와 통계 보고서는 답변 수가 아니라 카테고리 수만큼만 읽고, 정수 키로 묶은 뒤 분류 이름을 붙입니다.
+AnswerBucket은 같은 집계를 일별/주별로 나눠 보관해 기간 필터와 추이 통계에 사용합니다.
+답변 시각은 UTC로 저장하고, 버킷 날짜와 기간 필터의 날짜는 STATS_TIMEZONE 기준입니다.
+
+    flask --app app rebuild-rollups   # 기존 답변으로 집계 테이블 다시 만들기
+"""
+import os
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import func, case, select, insert, update, delete, and_
+from models import Answer, AnswerRollup, AnswerBucket, Category, StatsVersion
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = ('user_id', 'category_id')
+BUCKET_KEY_COLUMNS = ('period', 'bucket_start') + KEY_COLUMNS
+BUCKET_PERIODS = ('day', 'week')
+VERSION_ID = 1
+REWRITE_VERSION_ID = 2
+
+# 한 문장으로 추가/증가할 최대 집계 행 수 (SQLite 바인드 변수 한도 이내)
+APPLY_CHUNK_SIZE = 500
+
+# 일별/주별 버킷과 기간 필터의 날짜 기준 시간대
+STATS_TIMEZONE = os.environ.get('STATS_TIMEZONE', 'Asia/Seoul')
+STATS_TZ = ZoneInfo(STATS_TIMEZONE)
+
+
+def rollup_key(user_id, category_id):
+    return (user_id, category_id)
+
+
+def local_date(timestamp):
+    """UTC로 저장한 답변 시각(naive datetime)의 STATS_TIMEZONE 날짜"""
+    return timestamp.replace(tzinfo=timezone.utc).astimezone(STATS_TZ).date()
+
+
+def today():
+    """STATS_TIMEZONE 기준 오늘 날짜"""
+    return datetime.now(STATS_TZ).date()
+
+
+def day_start_utc(day):
+    """STATS_TIMEZONE 기준 날짜가 시작하는 시각 (답변 시각과 비교하는 naive UTC datetime)"""
+    return datetime.combine(day, datetime.min.time(), STATS_TZ).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def bucket_start(day, period):
+    """날짜가 속한 버킷의 시작일 (주별 버킷은 월요일)"""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def add_answers(session, rows):
+    """새로 저장하는 답변(category_id가 있는 dict 목록)만큼 집계 증가 - 답변 INSERT와 같은 트랜잭션에서 호출"""
+    day_rows = []
+    for row in rows:
+        day = local_date(row.get('timestamp') or datetime.utcnow())
+        day_rows.append((row['user_id'], row['category_id'], day, 1, 1 if row.get('is_correct') else 0))
+    _apply_day_rows(session, day_rows)
+    bump_version(session)
+
+
+def remove_answers(session, *criteria):
+    """criteria에 해당하는 답변만큼 집계 감소 - 답변 DELETE 직전에 같은 트랜잭션에서 호출"""
+    _apply_existing(session, criteria, -1)
+    session.execute(delete(AnswerRollup).where(AnswerRollup.attempts <= 0))
+    session.execute(delete(AnswerBucket).where(AnswerBucket.attempts <= 0))
+    bump_version(session, rewrite=True)
+
+
+def include_answers(session, *criteria):
+    """criteria에 해당하는 (이미 저장된) 답변만큼 집계 증가
+
+    답변 분류를 UPDATE할 때 remove_answers → UPDATE → include_answers 순서로 같은 트랜잭션에서 호출합니다.
+    """
+    _apply_existing(session, criteria, 1)
+    bump_version(session, rewrite=True)
+
+
+def clear(session):
+    """모든 답변을 삭제할 때 집계도 함께 비움"""
+    session.execute(delete(AnswerRollup))
+    session.execute(delete(AnswerBucket))
+    bump_version(session, rewrite=True)
+
+
+def rebuild(session):
+    """답변 테이블 전체로 집계를 다시 계산 (집계 테이블 도입 전 데이터 반영, 불일치 복구용)
+
+    분류를 Category로 옮기지 않은 이전 답변은 category_store.migrate가 옮기면서 집계에 더합니다.
+    """
+    session.execute(delete(AnswerRollup))
+    session.execute(insert(AnswerRollup).from_select(
+        ['user_id', 'category_id', 'attempts', 'correct'],
+        select(
+            Answer.user_id, Answer.category_id,
+            func.count(Answer.id),
+            func.sum(case((Answer.is_correct == True, 1), else_=0))
+        ).where(Answer.category_id.is_not(None)).group_by(Answer.user_id, Answer.category_id)
+    ))
+
+    # 일별 합계를 한 번 읽어 일별/주별 버킷을 함께 채움
+    session.execute(delete(AnswerBucket))
+    deltas = defaultdict(lambda: [0, 0])
+    for user_id, category_id, day, attempts, correct in session.execute(_day_counts(session)):
+        _add_bucket_deltas(deltas, rollup_key(user_id, category_id), _as_date(day), attempts, correct or 0)
+    _apply(session, AnswerBucket, BUCKET_KEY_COLUMNS, deltas)
+
+    bump_version(session, rewrite=True)
+    return session.scalar(select(func.count()).select_from(AnswerRollup))
+
+
+def answer_counts(start=None, end=None):
+    """(user_id, category_id, subject, grade, unit, attempts, correct) 집계 원본 서브쿼리
+
+    기간이 없으면 AnswerRollup을, 있으면 기간 안의 일별 버킷을 (user_id, category_id) 정수 키로 합산한 뒤
+    Category를 붙여 분류 이름을 함께 반환합니다. start/end는 date이며 종료일을 포함합니다.
+    """
+    if start is None and end is None:
+        counts = AnswerRollup.__table__
+    else:
+        statement = select(
+            AnswerBucket.user_id, AnswerBucket.category_id,
+            func.sum(AnswerBucket.attempts).label('attempts'),
+            func.sum(AnswerBucket.correct).label('correct')
+        ).where(AnswerBucket.period == 'day')
+        if start:
+            statement = statement.where(AnswerBucket.bucket_start >= start)
+        if end:
+            statement = statement.where(AnswerBucket.bucket_start <= end)
+        counts = statement.group_by(AnswerBucket.user_id, AnswerBucket.category_id).subquery('day_counts')
+    return select(
+        counts.c.user_id, counts.c.category_id, Category.subject, Category.grade, Category.unit,
+        counts.c.attempts, counts.c.correct
+    ).join(Category, Category.id == counts.c.category_id).subquery('answer_counts')
+
+
+def _local_day(session):
+    """답변 시각의 STATS_TIMEZONE 날짜 SQL 식 (add_answers의 local_date와 같은 기준)"""
+    if session.get_bind().dialect.name == 'postgresql':
+        return func.date(func.timezone(STATS_TIMEZONE, func.timezone('UTC', Answer.timestamp)))
+    # SQLite에는 시간대 정보가 없으므로 현재 UTC 오프셋 적용 (Asia/Seoul처럼 일광 절약 시간이 없는 시간대는 정확)
+    offset = int(datetime.now(STATS_TZ).utcoffset().total_seconds())
+    return func.date(Answer.timestamp, f'{offset:+d} seconds')
+
+
+def _day_counts(session):
+    """답변의 사용자/분류/날짜별 풀이 수와 정답 수"""
+    day = _local_day(session)
+    return select(
+        Answer.user_id, Answer.category_id, day,
+        func.count(Answer.id),
+        func.sum(case((Answer.is_correct == True, 1), else_=0))
+    ).where(Answer.category_id.is_not(None)).group_by(Answer.user_id, Answer.category_id, day)
+
+
+def _apply_existing(session, criteria, sign):
+    rows = session.execute(_day_counts(session).where(*criteria)).all()
+    _apply_day_rows(session, [(user_id, category_id, _as_date(day), sign * attempts, sign * (correct or 0))
+                              for user_id, category_id, day, attempts, correct in rows])
+
+
+def _as_date(value):
+    # SQLite의 date()는 문자열을 반환
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def _add_bucket_deltas(deltas, key, day, attempts, correct):
+    for period in BUCKET_PERIODS:
+        delta = deltas[(period, bucket_start(day, period)) + key]
+        delta[0] += attempts
+        delta[1] += correct
+
+
+def _apply_day_rows(session, day_rows):
+    """(user_id, category_id, 날짜, 풀이 수 증감, 정답 수 증감)을 전체/일별/주별 집계에 반영"""
+    rollup_deltas = defaultdict(lambda: [0, 0])
+    bucket_deltas = defaultdict(lambda: [0, 0])
+    for user_id, category_id, day, attempts, correct in day_rows:
+        key = rollup_key(user_id, category_id)
+        delta = rollup_deltas[key]
+        delta[0] += attempts
+        delta[1] += correct
+        _add_bucket_deltas(bucket_deltas, key, day, attempts, correct)
+    _apply(session, AnswerRollup, KEY_COLUMNS, rollup_deltas)
+    _apply(session, AnswerBucket, BUCKET_KEY_COLUMNS, bucket_deltas)
+
+
+def data_version(session):
+    """현재 답변 데이터 버전 (통계 캐시 키에 사용)"""
+    return session.scalar(select(StatsVersion.version).where(StatsVersion.id == VERSION_ID)) or 0
+
+
+def rewrite_version(session):
+    """답변 추가 외의 변경(삭제/분류 수정/재집계) 버전 - 추가분만 읽는 스냅샷이 전체를 다시 읽을 시점"""
+    return session.scalar(select(StatsVersion.version).where(StatsVersion.id == REWRITE_VERSION_ID)) or 0
+
+
+def bump_version(session, rewrite=False):
+    """답변이 바뀐 트랜잭션 안에서 데이터 버전 증가 (모든 워커의 통계 캐시가 함께 무효화됨)"""
+    for version_id in (VERSION_ID, REWRITE_VERSION_ID) if rewrite else (VERSION_ID,):
+        result = session.execute(
+            update(StatsVersion).where(StatsVersion.id == version_id).values(version=StatsVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            session.execute(insert(StatsVersion).values(id=version_id, version=1))
+
+
+def _apply(session, model, key_columns, deltas):
+    if not deltas:
+        return
+    dialect_insert = _dialect_insert(session)
+    if dialect_insert is None:
+        for key, (attempts, correct) in deltas.items():
+            _update_or_insert(session, model, key_columns, key, attempts, correct)
+        return
+
+    # 한 문장으로 추가/증가 (다른 워커가 같은 키를 동시에 추가해도 충돌하지 않음)
+    items = list(deltas.items())
+    for offset in range(0, len(items), APPLY_CHUNK_SIZE):
+        statement = dialect_insert(model).values([
+            dict(zip(key_columns, key), attempts=attempts, correct=correct)
+            for key, (attempts, correct) in items[offset:offset + APPLY_CHUNK_SIZE]
+        ])
+        session.execute(statement.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={
+                'attempts': model.attempts + statement.excluded.attempts,
+                'correct': model.correct + statement.excluded.correct
+            }
+        ))
+
+
+def _update_or_insert(session, model, key_columns, key, attempts, correct):
+    matches = and_(*(getattr(model, column) == value for column, value in zip(key_columns, key)))
+    result = session.execute(
+        update(model).where(matches).values(
+            attempts=model.attempts + attempts,
+            correct=model.correct + correct
+        )
+    )
+    if result.rowcount == 0:
+        session.execute(insert(model).values(**dict(zip(key_columns, key)), attempts=attempts, correct=correct))
+
+
+def _dialect_insert(session):
+    """ON CONFLICT를 지원하는 DB의 insert (그 밖의 DB는 None)"""
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        return dialect_insert
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        return dialect_insert
+    return None
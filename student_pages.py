@@ -0,0 +1,157 @@
+"""학생 목록 키셋(seek) 페이지네이션
+
+OFFSET 대신 마지막으로 보여 준 행의 (정렬 값, ID)를 커서로 넘겨 다음 페이지를 찾으므로
+학생 수가 많아도 뒤쪽 페이지를 읽는 비용이 앞쪽 페이지와 같습니다.
+"""
+import os
+import json
+import base64
+from dataclasses import dataclass, field
+from sqlalchemy import select, func, case, cast, and_, or_, Float
+from models import User
+from stats_rollup import answer_counts
+
+# 한 페이지에 보여 줄 학생 수
+STUDENT_PAGE_SIZE = int(os.environ.get('STUDENT_PAGE_SIZE', 50))
+STUDENT_PAGE_MAX = 200
+
+SORT_KEYS = ('name', 'answers', 'accuracy')
+
+
+@dataclass
+class StudentRow:
+    """학생 목록 한 행 (필터 조건의 풀이 수/정답 수 포함)"""
+    id: int
+    username: str
+    created_at: object = None
+    total: int = 0
+    correct: int = 0
+
+    @property
+    def incorrect(self):
+        return self.total - self.correct
+
+    @property
+    def accuracy_rate(self):
+        return (self.correct / self.total * 100) if self.total > 0 else 0
+
+    @property
+    def progress_rate(self):
+        return min(self.total / 100 * 100, 100)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'username': self.username,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None,
+            'total': self.total,
+            'correct': self.correct,
+            'incorrect': self.incorrect,
+            'accuracy_rate': round(self.accuracy_rate, 1),
+            'progress_rate': round(self.progress_rate, 1)
+        }
+
+
+@dataclass
+class StudentPage:
+    rows: list = field(default_factory=list)
+    next_cursor: str = None
+    sort: str = 'name'
+    order: str = 'asc'
+
+    def to_dict(self):
+        return {
+            'students': [row.to_dict() for row in self.rows],
+            'next_cursor': self.next_cursor,
+            'sort': self.sort,
+            'order': self.order
+        }
+
+
+def encode_cursor(sort_value, user_id):
+    raw = json.dumps([sort_value, user_id], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """커서를 (정렬 값, 학생 ID)로 변환 (형식이 틀리면 ValueError)"""
+    try:
+        sort_value, user_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return sort_value, int(user_id)
+    except Exception:
+        raise ValueError("잘못된 페이지 커서입니다")
+
+
+def student_page(session, sort='name', order='asc', cursor=None, limit=STUDENT_PAGE_SIZE,
+                 student_id=None, subject=None, grade=None, start=None, end=None, active_only=False):
+    """정렬 기준(name/answers/accuracy)과 방향(asc/desc)에 따른 학생 목록 한 페이지
+
+    active_only=True이면 필터 조건에서 답변이 있는 학생만 포함합니다 (대시보드 통계 표).
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"지원하지 않는 정렬 기준: {sort}")
+    descending = order == 'desc'
+    limit = max(1, min(limit, STUDENT_PAGE_MAX))
+
+    source = answer_counts(start, end)
+    totals = select(
+        source.c.user_id,
+        func.sum(source.c.attempts).label('total'),
+        func.sum(source.c.correct).label('correct')
+    )
+    if student_id:
+        # 학생 한 명이면 집계도 그 학생만 읽음
+        totals = totals.where(source.c.user_id == student_id)
+    if subject:
+        totals = totals.where(source.c.subject == subject)
+    if grade:
+        totals = totals.where(source.c.grade == grade)
+    totals = totals.group_by(source.c.user_id).subquery()
+
+    total = func.coalesce(totals.c.total, 0)
+    correct = func.coalesce(totals.c.correct, 0)
+    accuracy = case((total > 0, cast(correct, Float) / total), else_=0.0)
+    sort_column = {'name': User.username, 'answers': total, 'accuracy': accuracy}[sort]
+
+    statement = select(User.id, User.username, User.created_at, total, correct, sort_column)
+    if active_only:
+        statement = statement.join(totals, totals.c.user_id == User.id).where(totals.c.total > 0)
+    else:
+        statement = statement.outerjoin(totals, totals.c.user_id == User.id)
+    statement = statement.where(User.username != 'admin')
+    if student_id:
+        statement = statement.where(User.id == student_id)
+
+    if cursor:
+        last_value, last_id = decode_cursor(cursor)
+        if descending:
+            after = or_(sort_column < last_value, and_(sort_column == last_value, User.id < last_id))
+        else:
+            after = or_(sort_column > last_value, and_(sort_column == last_value, User.id > last_id))
+        statement = statement.where(after)
+
+    if descending:
+        statement = statement.order_by(sort_column.desc(), User.id.desc())
+    else:
+        statement = statement.order_by(sort_column.asc(), User.id.asc())
+
+    results = session.execute(statement.limit(limit + 1)).all()
+    page = StudentPage(sort=sort, order='desc' if descending else 'asc')
+    for user_id, username, created_at, row_total, row_correct, _ in results[:limit]:
+        page.rows.append(StudentRow(user_id, username, created_at, row_total or 0, row_correct or 0))
+    if len(results) > limit:
+        last = results[limit - 1]
+        page.next_cursor = encode_cursor(last[-1], last[0])
+    return page
+
+
+def student_options(session, limit=STUDENT_PAGE_MAX):
+    """학생 선택 목록 - 이름 순 첫 페이지 (통계 없이 User만 읽음)"""
+    statement = select(User.id, User.username, User.created_at).where(User.username != 'admin').order_by(
+        User.username, User.id).limit(limit)
+    return [StudentRow(user_id, username, created_at) for user_id, username, created_at in session.execute(statement)]
+
+
+def student_count(session):
+    """관리자를 제외한 학생 수"""
+    return session.scalar(select(func.count(User.id)).where(User.username != 'admin'))
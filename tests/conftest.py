@@ -0,0 +1,64 @@
+import os
+import sys
+import logging
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# app.py 임포트 전에 테스트 환경 설정 (로그 파일/DB가 저장소에 생기지 않도록)
+logging.getLogger().addHandler(logging.NullHandler())
+os.environ['OPENAI_API_KEY'] = 'sk-test-0000000000'
+os.environ['ASSISTANT_ID'] = 'asst_test'
+TEST_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TEST_DIR, 'quiz.db')
+os.environ['QUIZ_SESSION_STORE'] = 'sqlite:///' + os.path.join(TEST_DIR, 'sessions.db')
+os.environ['STATS_CACHE_STORE'] = 'sqlite:///' + os.path.join(TEST_DIR, 'stats_cache.db')
+os.environ['REPORT_ARTIFACT_DIR'] = os.path.join(TEST_DIR, 'reports')
+os.environ['QUESTION_BANK_SIZE'] = '0'
+os.chdir(ROOT)
+
+import fake_openai  # noqa: E402
+fake_openai.install()
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    import app as app_module
+    app_module.app.config['TESTING'] = True
+    return app_module
+
+
+@pytest.fixture
+def fake_client():
+    fake_openai.FakeOpenAI.reset()
+    return fake_openai.FakeOpenAI
+
+
+def _login(app_module, username, password='pw'):
+    from models import User
+    with app_module.app.app_context():
+        if not User.query.filter_by(username=username).first():
+            user = User(username=username)
+            user.set_password(password)
+            app_module.db.session.add(user)
+            app_module.db.session.commit()
+    client = app_module.app.test_client()
+    if username == 'admin':
+        client.post('/admin/login', data={'username': 'admin', 'password': 'admin123'})
+    else:
+        client.post('/login', data={'username': username, 'password': password})
+    return client
+
+
+@pytest.fixture
+def student(app_module, fake_client):
+    return _login(app_module, 'student1')
+
+
+@pytest.fixture
+def admin(app_module, fake_client):
+    return _login(app_module, 'admin')
@@ -0,0 +1,222 @@
+"""테스트용 OpenAI 클라이언트 대역 (Assistant 스레드/실행/메시지 API의 최소 구현)"""
+import re
+import json
+import time
+import itertools
+from types import SimpleNamespace as NS
+
+_ids = itertools.count(1)
+
+
+def make_quiz(prompt):
+    count = re.search(r'(\d+)개의 문제', prompt)
+    subject = re.search(r'과목: (\S+)', prompt)
+    grade = re.search(r'학년: (\S+)', prompt)
+    unit = re.search(r'단원: (.+)', prompt)
+    types = re.search(r'문제 유형: (.+)', prompt)
+    question_type = types.group(1).split(',')[0].split(' 및 ')[0].strip() if types else '객관식'
+
+    questions = []
+    for _ in range(int(count.group(1)) if count else 1):
+        number = next(_ids)
+        question = {
+            "question": f"문제 {number}: 물의 끓는점은?",
+            "question_type": question_type,
+            "subject": subject.group(1) if subject else '과학',
+            "grade": grade.group(1) if grade else '중1',
+            "unit": unit.group(1).strip() if unit else '물질의 상태 변화',
+            "explanation": "물은 ② 100도에서 끓습니다."
+        }
+        if question_type == '객관식':
+            question["options"] = ["① 50도", "② 100도", "③ 150도", "④ 0도", "⑤ 200도"]
+            question["correct"] = "② 100도"
+        else:
+            question["correct"] = "100도"
+        questions.append(question)
+    return json.dumps({"type": "QUIZ", "questions": questions}, ensure_ascii=False)
+
+
+def respond(prompt):
+    if '문제를 출제' in prompt:
+        return "```json\n" + make_quiz(prompt) + "\n```"
+    if '사용자 답변' in prompt:
+        answer = prompt.split('사용자 답변:')[1].split('\n')[0]
+        return json.dumps({
+            "type": "ANSWER",
+            "answer": {"correct": '100' in answer, "explanation": "LLM 채점"}
+        }, ensure_ascii=False)
+    return "일반 답변입니다."
+
+
+class FakeRuns:
+    def __init__(self, client):
+        self.client = client
+
+    def _execute(self, thread_id, additional_messages, metadata=None):
+        messages = self.client.threads_store.setdefault(thread_id, [])
+        prompt = additional_messages[0]['content'] if additional_messages else messages[-1][1]
+        text = self.client.responder(prompt)
+        run_id = f"run_{next(_ids)}"
+        messages.append(('assistant', text, run_id))
+        status = self.client.run_status
+        self.client.runs_store[run_id] = NS(id=run_id, status=status, thread_id=thread_id,
+                                            created_at=int(time.time()), metadata=metadata or {})
+        return run_id, text
+
+    def create(self, thread_id, assistant_id, additional_messages=None, metadata=None, **kwargs):
+        self.client.calls.append('runs.create')
+        run_id, _ = self._execute(thread_id, additional_messages, metadata)
+        return NS(id=run_id, status='queued')
+
+    def retrieve(self, thread_id, run_id):
+        self.client.calls.append('runs.retrieve')
+        return self.client.runs_store[run_id]
+
+    def list(self, thread_id, order='desc', limit=20, **kwargs):
+        self.client.calls.append('runs.list')
+        runs = [r for r in self.client.runs_store.values() if r.thread_id == thread_id]
+        return NS(data=list(reversed(runs))[:limit])
+
+    def cancel(self, thread_id, run_id):
+        self.client.calls.append('runs.cancel')
+        self.client.runs_store[run_id].status = 'cancelled'
+
+    def __getattr__(self, name):
+        if name == 'stream' and self.client.streaming:
+            return self._stream
+        raise AttributeError(name)
+
+    def _stream(self, thread_id, assistant_id, additional_messages=None, timeout=None, metadata=None, **kwargs):
+        self.client.calls.append('runs.stream')
+        if self.client.stream_error == 'before_run':
+            # 실행이 생성되기 전에 연결이 끊긴 상황
+            raise ConnectionError("stream disconnected")
+        run_id, text = self._execute(thread_id, additional_messages, metadata)
+        if self.client.stream_error:
+            # 실행은 생성됐지만 생성 이벤트를 받기 전에 연결이 끊긴 상황
+            raise ConnectionError("stream disconnected")
+        events = [NS(event='thread.run.created', data=NS(id=run_id))]
+        if self.client.run_status == 'requires_action':
+            events.append(NS(event='thread.run.requires_action', data=NS(id=run_id, status='requires_action')))
+        for i in range(0, len(text), 7):
+            delta = NS(content=[NS(text=NS(value=text[i:i + 7]))])
+            events.append(NS(event='thread.message.delta', data=NS(delta=delta)))
+        events.append(NS(event='thread.run.completed', data=NS(id=run_id, status='completed')))
+
+        class Manager:
+            def __enter__(self):
+                return iter(events)
+
+            def __exit__(self, *args):
+                return False
+
+        return Manager()
+
+
+class FakeMessages:
+    def __init__(self, client):
+        self.client = client
+
+    def create(self, thread_id, role, content):
+        self.client.calls.append('messages.create')
+        self.client.threads_store.setdefault(thread_id, []).append((role, content, None))
+
+    def list(self, thread_id, order='desc', limit=20, run_id=None, **kwargs):
+        self.client.calls.append('messages.list')
+        items = [m for m in self.client.threads_store.get(thread_id, [])
+                 if m[0] == 'assistant' and (run_id is None or m[2] == run_id)]
+        items = list(reversed(items))[:limit]
+        return NS(data=[NS(content=[NS(text=NS(value=m[1]))]) for m in items])
+
+
+class FakeThreads:
+    def __init__(self, client):
+        self.client = client
+        self.runs = FakeRuns(client)
+        self.messages = FakeMessages(client)
+
+    def create(self, **kwargs):
+        self.client.calls.append('threads.create')
+        thread_id = f"thread_{next(_ids)}"
+        self.client.threads_store[thread_id] = []
+        return NS(id=thread_id)
+
+    def delete(self, thread_id):
+        self.client.calls.append('threads.delete')
+        self.client.threads_store.pop(thread_id, None)
+
+
+class FakeOpenAI:
+    """모든 인스턴스가 같은 상태를 공유 (동기/비동기 클라이언트가 같은 스레드를 보도록)"""
+    threads_store = {}
+    runs_store = {}
+    calls = []
+    streaming = True
+    stream_error = False
+    run_status = 'completed'
+    responder = staticmethod(respond)
+
+    def __init__(self, *args, **kwargs):
+        self.beta = NS(threads=FakeThreads(self))
+
+    @classmethod
+    def reset(cls):
+        cls.calls.clear()
+        cls.streaming = True
+        cls.stream_error = False
+        cls.run_status = 'completed'
+        cls.responder = staticmethod(respond)
+
+
+class _AsyncProxy:
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name == 'stream':
+            return lambda *args, **kwargs: _AsyncStreamManager(attr(*args, **kwargs))
+        if callable(attr):
+            async def call(*args, **kwargs):
+                return attr(*args, **kwargs)
+            return call
+        return _AsyncProxy(attr)
+
+
+class _AsyncStreamManager:
+    def __init__(self, manager):
+        self.manager = manager
+
+    async def __aenter__(self):
+        return _AsyncIterator(self.manager.__enter__())
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class _AsyncIterator:
+    def __init__(self, iterator):
+        self.iterator = iterator
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeAsyncOpenAI:
+    def __init__(self, *args, **kwargs):
+        self.beta = NS(threads=_AsyncProxy(FakeOpenAI().beta.threads))
+
+    async def close(self):
+        pass
+
+
+def install():
+    import openai
+    openai.OpenAI = FakeOpenAI
+    openai.AsyncOpenAI = FakeAsyncOpenAI
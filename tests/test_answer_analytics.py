@@ -0,0 +1,106 @@
+from datetime import datetime
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import category_store  # noqa: E402
+import stats_rollup  # noqa: E402
+from answer_analytics import AnswerAnalytics  # noqa: E402
+from models import db, Answer  # noqa: E402
+from stats_engine import compute_stats  # noqa: E402
+from test_stats_rollup import make_user, answer_row  # noqa: E402
+
+SUBJECT = '분석과학'
+
+
+def seed(app_module):
+    strong = make_user(app_module, 'analytics-strong')
+    weak = make_user(app_module, 'analytics-weak')
+    with app_module.app.app_context():
+        if Answer.query.filter(*category_store.answer_criteria(SUBJECT)).count():
+            return strong, weak
+    recorder = app_module.answer_recorder
+    for user_id, results in ((strong, [True, True, True, False]), (weak, [False, False, True, False])):
+        for index, is_correct in enumerate(results):
+            row = answer_row(user_id, subject=SUBJECT, unit='전기' if index % 2 else '자기', is_correct=is_correct)
+            recorder.record(user_id, {'question': '문제'}, '①', is_correct, row)
+    recorder.flush()
+    return strong, weak
+
+
+def test_snapshot_matches_sql_aggregates(app_module):
+    strong, weak = seed(app_module)
+    analytics = AnswerAnalytics(batch_size=3)
+    with app_module.app.app_context():
+        assert analytics.refresh(db.session) == Answer.query.count()
+        assert analytics.codes['subject'].dtype == np.uint8 and analytics.user_id.dtype == np.int32
+
+        stats = compute_stats(db.session, subject=SUBJECT)
+        selected = analytics.mask(subject=SUBJECT)
+        summary = analytics.summary(selected)
+        assert (summary['attempts'], summary['correct'], summary['students']) == (8, 4, 2)
+        assert summary['attempts'] == stats.total_answers
+
+        units = {(group['unit'], group['attempts'], group['correct'])
+                 for group in analytics.group_by(('subject', 'grade', 'unit'), selected)}
+        assert units == {(stat.unit, stat.attempts, stat.correct) for stat in stats.by_unit}
+
+        by_user = {group['user_id']: group['accuracy_rate'] for group in analytics.group_by(('user_id',), selected)}
+        assert by_user == {strong: 75.0, weak: 25.0}
+        assert analytics.mask(subject='없는과목').sum() == 0
+        assert analytics.mask(subject=SUBJECT, start=datetime(2999, 1, 1)).sum() == 0
+
+
+def test_distribution_percentiles_and_cohorts(app_module):
+    strong, weak = seed(app_module)
+    analytics = AnswerAnalytics()
+    with app_module.app.app_context():
+        analytics.refresh(db.session)
+    selected = analytics.mask(subject=SUBJECT)
+
+    distribution = analytics.accuracy_distribution(selected, bins=4)
+    assert [bucket['students'] for bucket in distribution] == [0, 1, 0, 1]
+
+    percentiles = {row['unit']: row for row in analytics.unit_percentiles(selected)}
+    # 자기: strong 2/2, weak 1/2 / 전기: strong 1/2, weak 0/2
+    assert (percentiles['자기']['p50'], percentiles['전기']['p50']) == (75.0, 25.0)
+    assert percentiles['자기']['p75'] == 87.5 and percentiles['자기']['students'] == 2
+
+    cohorts = analytics.compare_cohorts({'strong': [strong], 'weak': [weak]}, selected)
+    assert (cohorts['strong']['accuracy_rate'], cohorts['weak']['accuracy_rate']) == (75.0, 25.0)
+
+
+def test_refresh_reads_only_new_rows_until_rewrite(app_module):
+    user_id = make_user(app_module, 'analytics-refresh')
+    analytics = AnswerAnalytics()
+    with app_module.app.app_context():
+        analytics.refresh(db.session)
+        loaded = len(analytics)
+
+        app_module.answer_recorder.record(user_id, {'question': '문제'}, '①', True, {'subject': '새과목'})
+        app_module.answer_recorder.flush()
+        assert analytics.refresh(db.session) == 1
+        assert len(analytics) == loaded + 1 and analytics.stats['full_loads'] == 1
+        assert '새과목' in analytics.values['subject']
+
+        stats_rollup.remove_answers(db.session, Answer.user_id == user_id)
+        Answer.query.filter_by(user_id=user_id).delete()
+        db.session.commit()
+        analytics.refresh(db.session)
+        assert len(analytics) == loaded and analytics.stats['full_loads'] == 2
+
+
+def test_analytics_endpoint(app_module, admin, student):
+    strong, weak = seed(app_module)
+    data = admin.get(f'/api/admin/analytics?kind=groups&by=unit&subject={SUBJECT}').get_json()
+    assert {group['unit'] for group in data['result']} == {'전기', '자기'}
+    assert data['snapshot']['rows'] >= 8
+
+    data = admin.get(f'/api/admin/analytics?kind=cohorts&subject={SUBJECT}'
+                     f'&cohort=strong:{strong}&cohort=weak:{weak}').get_json()
+    assert data['result']['weak']['attempts'] == 4
+
+    assert admin.get('/api/admin/analytics?kind=groups&by=question').status_code == 400
+    assert admin.get('/api/admin/analytics?kind=unknown').status_code == 400
+    assert student.get('/api/admin/analytics').status_code == 403
@@ -0,0 +1,48 @@
+import csv
+import gzip
+import io
+import json
+
+import answer_export
+from models import User
+
+
+def seed(app_module):
+    with app_module.app.app_context():
+        user_id = User.query.filter_by(username='student1').first().id
+    for unit, is_correct in (('수출1', True), ('수출2', False), ('수출3', True)):
+        app_module.answer_recorder.record(user_id, {'question': f'{unit}, "따옴표"'}, '①', is_correct,
+                                          {'subject': '수출과학', 'grade': '중3', 'unit': unit})
+    app_module.answer_recorder.flush()
+
+
+def test_csv_export_streams_filtered_rows(app_module, student, admin):
+    seed(app_module)
+    assert student.get('/api/admin/answers/export').status_code == 403
+
+    response = admin.get('/api/admin/answers/export?subject=수출과학', buffered=False)
+    assert response.mimetype == 'text/csv'
+    assert not response.is_sequence
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['unit'] for row in rows[-3:]] == ['수출1', '수출2', '수출3']
+    assert rows[-1]['question'] == '수출3, "따옴표"' and rows[-1]['username'] == 'student1'
+
+
+def test_ndjson_gzip_and_date_range(app_module, admin):
+    seed(app_module)
+    response = admin.get('/api/admin/answers/export?format=ndjson&gzip=1&subject=수출과학&start=2000-01-01')
+    assert response.mimetype == 'application/gzip'
+    lines = gzip.decompress(response.get_data()).decode('utf-8').splitlines()
+    assert json.loads(lines[-1])['unit'] == '수출3'
+
+    empty = admin.get('/api/admin/answers/export?subject=수출과학&end=2000-01-01').get_data(as_text=True)
+    assert empty.strip() == ','.join(answer_export.EXPORT_COLUMNS)
+    assert admin.get('/api/admin/answers/export?start=2024/01/01').status_code == 400
+
+
+def test_batches_are_bounded(app_module):
+    seed(app_module)
+    from models import db
+    with app_module.app.app_context():
+        batches = list(answer_export.iter_answer_batches(db.session, [], batch_size=2))
+    assert batches and all(len(batch) <= 2 for batch in batches)
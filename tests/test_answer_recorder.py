@@ -0,0 +1,99 @@
+from sqlalchemy.exc import OperationalError
+
+import category_store
+from answer_recorder import AnswerRecorder
+from models import Answer, User
+from test_stats_rollup import answer_category
+
+
+def student_id(app_module):
+    with app_module.app.app_context():
+        return User.query.filter_by(username='student1').first().id
+
+
+def test_recorder_flushes_in_batches(app_module, student):
+    recorder = AnswerRecorder(app_module.app, flush_size=1000, flush_interval=60)
+    user_id = student_id(app_module)
+    with app_module.app.app_context():
+        before = Answer.query.count()
+
+    for i in range(5):
+        recorder.record(user_id, {'question': f'문제 {i}'}, '① 아주 긴 답변 내용', i % 2 == 0,
+                        {'subject': '과학', 'grade': '중1', 'unit': '물질의 구성'})
+    assert recorder.queue_depth == 5
+    assert recorder.flush() == 5
+    recorder.close()
+
+    with app_module.app.app_context():
+        assert Answer.query.count() == before + 5
+        answer = Answer.query.order_by(Answer.id.desc()).first()
+        assert answer_category(answer)[2] == '물질의 구성' and len(answer.user_answer) <= 10
+    snapshot = recorder.snapshot()
+    assert snapshot['batches'] == 1 and snapshot['queue_depth'] == 0
+    assert snapshot['last_flush_ms'] > 0
+
+
+def test_failed_flush_skips_only_rejected_answers(app_module, student):
+    recorder = AnswerRecorder(app_module.app, flush_size=1000, flush_interval=60)
+    user_id = student_id(app_module)
+    with app_module.app.app_context():
+        before = Answer.query.count()
+    for i in range(4):
+        # 두 번째 답변은 user_id 누락으로 NOT NULL 제약 위반
+        recorder.record(None if i == 1 else user_id, {'question': f'제외 문제 {i}'}, '①', True)
+    assert recorder.flush() == 3
+    snapshot = recorder.snapshot()
+    assert snapshot['failed_batches'] == 1 and snapshot['rejected'] == 1
+    assert snapshot['queue_depth'] == 0
+
+    # 제외한 답변 때문에 다음 저장이 막히지 않음
+    recorder.record(user_id, {'question': '다음 문제'}, '①', True)
+    assert recorder.flush() == 1
+    recorder.close()
+    with app_module.app.app_context():
+        assert Answer.query.count() == before + 4
+
+
+def test_database_outage_keeps_answers_for_retry(app_module, monkeypatch):
+    recorder = AnswerRecorder(app_module.app, flush_size=1000, flush_interval=60, max_queue=3)
+    for i in range(4):
+        recorder.record(1, {'question': f'문제 {i}'}, '①', True)
+
+    def unavailable(session, rows):
+        raise OperationalError('SELECT 1', {}, Exception('database is unavailable'))
+
+    monkeypatch.setattr(category_store, 'attach', unavailable)
+    assert recorder.flush() == 0
+    snapshot = recorder.snapshot()
+    assert snapshot['failed_batches'] == 1 and snapshot['rejected'] == 0
+    assert snapshot['queue_depth'] == 3 and snapshot['dropped'] == 1
+    recorder._queue.clear()
+    recorder.close()
+
+
+def test_graded_answers_are_recorded(app_module, student, admin, fake_client):
+    with app_module.app.app_context():
+        before = Answer.query.count()
+    quiz = student.post('/api/chat', json={
+        'message': '1문제 출제', 'subject': '과학', 'grade': '중2', 'unit': '전기와 자기'
+    }).get_json()
+    student.post('/api/chat', json={
+        'message': quiz['questions'][0]['correct'], 'thread_id': quiz['thread_id'], 'is_quiz_answer': True
+    })
+    app_module.answer_recorder.flush()
+
+    with app_module.app.app_context():
+        assert Answer.query.count() == before + 1
+        answer = Answer.query.order_by(Answer.id.desc()).first()
+        assert (*answer_category(answer), answer.is_correct) == ('과학', '중2', '전기와 자기', True)
+        assert (answer.subject, answer.grade, answer.unit) == (None, None, None)
+    assert admin.get('/api/admin/answer-recorder').get_json()['flushed'] >= 1
+
+
+def test_deleting_stats_includes_queued_answers(app_module, admin, student):
+    user_id = student_id(app_module)
+    app_module.answer_recorder.record(user_id, {'question': '삭제 전 문제'}, '①', True)
+    assert admin.post(f'/admin/stats/delete/{user_id}').get_json()['success'] is True
+    app_module.answer_recorder.flush()
+    with app_module.app.app_context():
+        assert Answer.query.filter_by(user_id=user_id).count() == 0
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+
+import httpx
+
+
+def test_async_chat_serves_quiz_and_grades(app_module, student, fake_client):
+    import asgi
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            response = await client.post('/api/chat', json={'message': '1문제 출제'})
+            assert response.status_code == 401
+
+            login = await client.post('/login', data={'username': 'student1', 'password': 'pw'})
+            assert login.status_code in (200, 302)
+
+            quiz = (await client.post('/api/chat', json={
+                'message': '1문제 출제', 'subject': '과학', 'grade': '중1'
+            })).json()
+            assert quiz['type'] == 'QUIZ'
+            assert len(quiz['questions']) == 1
+
+            answer = (await client.post('/api/chat', json={
+                'message': quiz['questions'][0]['correct'],
+                'thread_id': quiz['thread_id'],
+                'is_quiz_answer': True
+            })).json()
+            assert answer['type'] == 'ANSWER'
+            assert answer['answer']['correct'] is True
+        await asgi.async_engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_session_store_is_not_used_on_event_loop(app_module, student, fake_client, monkeypatch):
+    import asgi
+
+    store = app_module.current_quiz_store
+    callers = set()
+    for name in ('get', 'set', 'update'):
+        original = getattr(store, name)
+
+        def wrapped(*args, _original=original, **kwargs):
+            callers.add(threading.get_ident())
+            return _original(*args, **kwargs)
+        monkeypatch.setattr(store, name, wrapped)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=asgi.application)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            await client.post('/login', data={'username': 'student1', 'password': 'pw'})
+            quiz = (await client.post('/api/chat', json={
+                'message': '2문제 출제', 'subject': '과학', 'grade': '중2'
+            })).json()
+            answer = (await client.post('/api/chat', json={
+                'message': quiz['questions'][0]['correct'], 'thread_id': quiz['thread_id'], 'is_quiz_answer': True
+            })).json()
+            assert answer['type'] == 'ANSWER'
+        await asgi.async_engine.dispose()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert callers and loop_thread not in callers
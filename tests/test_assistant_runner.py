@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from assistant_runner import AssistantRunner, AsyncAssistantRunner, RunFailedError
+from fake_openai import FakeOpenAI, FakeAsyncOpenAI
+
+
+@pytest.fixture
+def client(fake_client):
+    return FakeOpenAI()
+
+
+def test_streaming_returns_text(client):
+    thread_id = client.beta.threads.create().id
+    chunks = []
+    text = AssistantRunner(client, 'asst').run(thread_id, '안녕', on_text_delta=chunks.append)
+    assert text == '일반 답변입니다.'
+    assert ''.join(chunks) == text
+
+
+def test_polling_fallback(client, fake_client):
+    fake_client.streaming = False
+    thread_id = client.beta.threads.create().id
+    assert AssistantRunner(client, 'asst').run(thread_id, '안녕') == '일반 답변입니다.'
+    assert 'runs.create' in fake_client.calls
+
+
+def test_stream_disconnect_reuses_existing_run(client, fake_client):
+    fake_client.stream_error = True
+    thread_id = client.beta.threads.create().id
+    assert AssistantRunner(client, 'asst').run(thread_id, '안녕') == '일반 답변입니다.'
+    # 이미 생성된 실행을 찾아 이어받고 새 실행은 만들지 않음
+    assert 'runs.list' in fake_client.calls
+    assert 'runs.create' not in fake_client.calls
+    assert len([r for r in fake_client.runs_store.values() if r.thread_id == thread_id]) == 1
+
+
+def test_stream_disconnect_does_not_adopt_previous_run(client, fake_client):
+    thread_id = client.beta.threads.create().id
+    runner = AssistantRunner(client, 'asst')
+    runner.run(thread_id, '안녕')
+    fake_client.stream_error = 'before_run'
+    assert runner.run(thread_id, '안녕') == '일반 답변입니다.'
+    # 방금 끝난 이전 요청의 실행 대신 새 실행을 만듦
+    assert 'runs.create' in fake_client.calls
+    assert len([r for r in fake_client.runs_store.values() if r.thread_id == thread_id]) == 2
+
+
+@pytest.mark.parametrize('streaming', [True, False])
+def test_requires_action_run_is_cancelled(client, fake_client, streaming):
+    fake_client.streaming = streaming
+    fake_client.run_status = 'requires_action'
+    thread_id = client.beta.threads.create().id
+    with pytest.raises(RunFailedError):
+        AssistantRunner(client, 'asst').run(thread_id, '안녕')
+    assert 'runs.cancel' in fake_client.calls
+
+
+def test_async_stream_disconnect_reuses_existing_run(fake_client):
+    fake_client.stream_error = True
+    client = FakeAsyncOpenAI()
+
+    async def scenario():
+        thread = await client.beta.threads.create()
+        return thread.id, await AsyncAssistantRunner(client, 'asst').run(thread.id, '안녕')
+
+    thread_id, text = asyncio.run(scenario())
+    assert text == '일반 답변입니다.'
+    assert 'runs.create' not in fake_client.calls
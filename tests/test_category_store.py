@@ -0,0 +1,104 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import create_engine, inspect, insert, text
+
+import category_store
+from models import db, Answer, AnswerRollup, Category
+from test_stats_rollup import make_user, answer_row, answer_category, rollup_rows
+
+SUBJECT = '분류과학'
+
+
+def test_seed_adds_categories_once(app_module, tmp_path):
+    path = tmp_path / 'categories.json'
+    path.write_text(json.dumps([{'subject': SUBJECT, 'grade': '중1', 'unit': '물질'},
+                                {'subject': SUBJECT, 'grade': '중1', 'unit': '물질'},
+                                {'subject': SUBJECT, 'grade': '중2', 'unit': '전기'}], ensure_ascii=False),
+                    encoding='utf-8')
+    with app_module.app.app_context():
+        assert category_store.seed(db.session, str(path)) == 2
+        category_store.seed(db.session, str(path))
+        db.session.commit()
+        assert Category.query.filter_by(subject=SUBJECT).count() == 2
+        assert category_store.seed(db.session, str(tmp_path / 'missing.json')) == 0
+
+
+def test_recorded_answers_share_one_category(app_module):
+    users = [make_user(app_module, f'category-{i}') for i in range(2)]
+    recorder = app_module.answer_recorder
+    for user_id in users:
+        for subject in (SUBJECT, SUBJECT):
+            row = answer_row(user_id, subject=subject, grade='중3', unit='운동')
+            recorder.record(user_id, {'question': '문제'}, '①', True, row)
+    recorder.flush()
+
+    with app_module.app.app_context():
+        answers = Answer.query.filter(Answer.user_id.in_(users)).all()
+        assert len({answer.category_id for answer in answers}) == 1
+        assert answer_category(answers[0]) == (SUBJECT, '중3', '운동')
+        rollup = AnswerRollup.query.filter_by(user_id=users[0]).one()
+        assert (rollup.category_id, rollup.attempts) == (answers[0].category_id, 2)
+
+
+def test_legacy_answers_are_migrated_into_rollups(app_module, admin):
+    user_id = make_user(app_module, 'category-legacy')
+    now = datetime.utcnow()
+    rows = [
+        {'user_id': user_id, 'subject': SUBJECT, 'grade': '중1', 'unit': '이전', 'is_correct': True},
+        {'user_id': user_id, 'subject': SUBJECT, 'grade': '중1', 'unit': '이전', 'is_correct': False},
+        # 분류 문자열이 없던 더 이전 답변은 대단원/소단원 사용
+        {'user_id': user_id, 'main_unit': SUBJECT, 'sub_unit': '소단원', 'is_correct': True},
+    ]
+    with app_module.app.app_context():
+        db.session.execute(insert(Answer), [dict(row, question='문제', user_answer='①', timestamp=now)
+                                            for row in rows])
+        db.session.commit()
+        assert rollup_rows(user_id) == []
+        assert category_store.pending_count(db.session) >= 3
+
+        assert category_store.migrate(db.session, chunk_size=2) >= 3
+        assert category_store.pending_count(db.session) == 0
+        answers = Answer.query.filter_by(user_id=user_id).order_by(Answer.id).all()
+        assert [answer_category(answer) for answer in answers] == [
+            (SUBJECT, '중1', '이전'), (SUBJECT, '중1', '이전'), (SUBJECT, '', '소단원')]
+        assert {(answer.subject, answer.main_unit) for answer in answers} == {(None, None)}
+        assert rollup_rows(user_id) == [(SUBJECT, '', '소단원', 1, 1), (SUBJECT, '중1', '이전', 2, 1)]
+
+    exported = admin.get(f'/api/admin/answers/export?format=ndjson&student_id={user_id}').get_data(as_text=True)
+    assert [json.loads(line)['unit'] for line in exported.splitlines()] == ['이전', '이전', '소단원']
+
+
+def test_upgrade_schema_adds_category_id_and_resets_string_keyed_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text('CREATE TABLE answer (id INTEGER PRIMARY KEY, subject VARCHAR(50))'))
+        connection.execute(text('CREATE TABLE answer_rollup (id INTEGER PRIMARY KEY, user_id INTEGER, '
+                                'subject VARCHAR(50), attempts INTEGER, correct INTEGER)'))
+        connection.execute(text("INSERT INTO answer (subject) VALUES ('과학')"))
+        connection.execute(text("INSERT INTO answer_rollup (user_id, subject, attempts, correct) "
+                                "VALUES (1, '과학', 1, 1)"))
+    for table in ('user', 'category', 'answer_bucket', 'item_stat'):
+        db.metadata.tables[table].create(engine)
+
+    category_store.upgrade_schema(engine)
+    category_store.upgrade_schema(engine)   # 두 번 실행해도 안전
+
+    inspector = inspect(engine)
+    assert 'category_id' in {column['name'] for column in inspector.get_columns('answer')}
+    assert 'ix_answer_category_id' in {index['name'] for index in inspector.get_indexes('answer')}
+    assert 'subject' not in {column['name'] for column in inspector.get_columns('answer_rollup')}
+    with engine.connect() as connection:
+        assert connection.execute(text('SELECT subject, category_id FROM answer')).one() == ('과학', None)
+        assert connection.execute(text('SELECT COUNT(*) FROM answer_rollup')).scalar() == 0
+
+
+def test_startup_reports_pending_data_commands_instead_of_migrating(app_module):
+    user_id = make_user(app_module, 'category-pending')
+    with app_module.app.app_context():
+        db.session.execute(insert(Answer), [{'user_id': user_id, 'subject': SUBJECT, 'question': '문제',
+                                             'user_answer': '①', 'is_correct': True, 'timestamp': datetime.utcnow()}])
+        db.session.commit()
+        assert 'migrate-categories' in app_module.pending_data_commands(db.session)
+        category_store.migrate(db.session)
+        assert 'migrate-categories' not in app_module.pending_data_commands(db.session)
@@ -0,0 +1,62 @@
+import pytest
+
+from grading import GradingEngine, choice_index
+
+
+MASS_QUIZ = {
+    'question': '가장 무거운 물체는?',
+    'question_type': '객관식',
+    'options': ['① 2.7 g', '② 1.5 g', '③ 3.5 g'],
+    'correct': '③ 3.5 g',
+    'explanation': '3.5 g이 가장 무겁습니다.'
+}
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('③', 2),
+    ('3', 2),
+    ('3번', 2),
+    (' 3. ', 2),
+    ('3.5 g', None),
+    ('2.7', None),
+    ('10 cm', None),
+])
+def test_choice_index_reads_only_bare_markers(text, expected):
+    assert choice_index(text) == expected
+
+
+def test_choice_index_accepts_marker_with_matching_option_text():
+    options = MASS_QUIZ['options']
+    assert choice_index('③ 3.5 g', options) == 2
+    assert choice_index('3번 3.5 g', options) == 2
+    assert choice_index('① 3.5 g', options) is None
+
+
+@pytest.mark.parametrize('answer, correct', [
+    ('3.5 g', True),
+    ('③', True),
+    ('3', True),
+    ('3번', True),
+    ('2.7 g', False),
+    ('1.5 g', False),
+    ('①', False),
+])
+def test_numeric_option_texts(answer, correct):
+    result = GradingEngine().grade(answer, MASS_QUIZ)
+    assert result['answer']['correct'] is correct
+
+
+def test_numeric_correct_without_marker():
+    quiz = dict(MASS_QUIZ, options=['2.7 g', '1.5 g', '3.5 g'], correct='1.5 g')
+    engine = GradingEngine()
+    assert engine.grade('1.5 g', quiz)['answer']['correct'] is True
+    assert engine.grade('2', quiz)['answer']['correct'] is True
+    assert engine.grade('1', quiz)['answer']['correct'] is False
+
+
+def test_short_answer_falls_back_to_llm_when_wrong():
+    quiz = {'question_type': '단답형', 'correct': '질소', 'accepted_answers': ['N2'], 'explanation': '...'}
+    engine = GradingEngine()
+    assert engine.grade('n2', quiz)['answer']['correct'] is True
+    assert engine.grade('산소', quiz) is None
+    assert engine.stats == {'local': 1, 'llm': 1}
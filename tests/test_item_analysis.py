@@ -0,0 +1,120 @@
+import statistics
+
+import pytest
+
+import item_analysis
+import unit_normalizer
+from models import db, Category, ItemStat
+from test_stats_rollup import make_user, answer_row
+
+SUBJECT = '문항과학'
+STRONG_QUESTION = '변별도가 높은 문제'
+REVERSED_QUESTION = '변별도가 거꾸로인 문제'
+
+
+def record(app_module, user_id, question, is_correct):
+    row = answer_row(user_id, subject=SUBJECT, grade='문항학년', unit='문항단원', is_correct=is_correct)
+    app_module.answer_recorder.record(user_id, {'question': question}, '①', is_correct, row)
+
+
+def seed(app_module):
+    """이전 정답률이 1.0, 0.8, 0.2, 0.0인 학생 네 명이 두 문항을 풀이"""
+    users = [make_user(app_module, f'item-{name}') for name in 'abcd']
+    with app_module.app.app_context():
+        if db.session.get(ItemStat, item_analysis.question_hash(STRONG_QUESTION)):
+            return users
+    for user_id, warmup_correct in zip(users, (5, 4, 1, 0)):
+        for i in range(item_analysis.ITEM_SCORE_MIN_ATTEMPTS):
+            record(app_module, user_id, f'{user_id}번 학생 준비 문제 {i}', i < warmup_correct)
+    app_module.answer_recorder.flush()
+    # 같은 배치 안에서도 앞선 답변이 학생 능력 점수에 반영됨
+    for user_id, is_correct in zip(users, (True, True, False, False)):
+        record(app_module, user_id, STRONG_QUESTION, is_correct)
+    for user_id, is_correct in zip(users, (False, False, True, True)):
+        record(app_module, user_id, REVERSED_QUESTION, is_correct)
+    app_module.answer_recorder.flush()
+    return users
+
+
+def counters(question):
+    item = db.session.get(ItemStat, item_analysis.question_hash(question))
+    return tuple(round(getattr(item, column), 9) for column in item_analysis.COUNTER_COLUMNS)
+
+
+def test_question_hash_ignores_whitespace():
+    assert item_analysis.question_hash(' 물의  끓는점은?\n') == item_analysis.question_hash('물의 끓는점은?')
+    assert item_analysis.question_hash('물의 끓는점은?') != item_analysis.question_hash('물의 어는점은?')
+
+
+def test_item_metrics_match_pearson_correlation():
+    scores = [1.0, 0.8, 0.6, 0.4, 0.2, 0.0]
+    correct = [1, 1, 0, 1, 0, 0]
+    p_value, discrimination = item_analysis.item_metrics(
+        len(correct), sum(correct), len(correct), sum(correct), sum(scores), sum(s * s for s in scores),
+        sum(s * c for s, c in zip(scores, correct))
+    )
+    assert p_value == 0.5
+    assert discrimination == pytest.approx(statistics.correlation(scores, correct))
+    # 모두 맞혔거나 능력 점수가 모두 같으면 변별도를 계산할 수 없음
+    assert item_analysis.item_metrics(3, 3, 3, 3, 1.5, 0.75, 1.5)[1] is None
+    assert item_analysis.item_metrics(2, 1, 2, 1, 1.0, 0.5, 0.5)[1] is None
+
+
+def test_online_stats_match_rebuild(app_module):
+    seed(app_module)
+    with app_module.app.app_context():
+        strong = db.session.get(ItemStat, item_analysis.question_hash(STRONG_QUESTION))
+        assert (strong.attempts, strong.correct, strong.scored, strong.p_value) == (4, 2, 4, 0.5)
+        assert strong.discrimination == pytest.approx(statistics.correlation([1.0, 0.8, 0.2, 0.0], [1, 1, 0, 0]))
+        reversed_item = db.session.get(ItemStat, item_analysis.question_hash(REVERSED_QUESTION))
+        # 앞 문항을 푼 뒤의 정답률 6/6, 5/6, 1/6, 0/6
+        assert reversed_item.discrimination == pytest.approx(
+            statistics.correlation([1.0, 5 / 6, 1 / 6, 0.0], [0, 0, 1, 1]))
+
+        online = counters(STRONG_QUESTION), counters(REVERSED_QUESTION)
+        item_analysis.rebuild(db.session)
+        db.session.commit()
+        assert (counters(STRONG_QUESTION), counters(REVERSED_QUESTION)) == online
+
+
+def test_deleting_student_answers_subtracts_their_contribution(app_module, admin):
+    seed(app_module)
+    deleted = make_user(app_module, 'item-e')
+    for i in range(item_analysis.ITEM_SCORE_MIN_ATTEMPTS):
+        record(app_module, deleted, f'{deleted}번 학생 준비 문제 {i}', True)
+    record(app_module, deleted, STRONG_QUESTION, False)
+    app_module.answer_recorder.flush()
+
+    with app_module.app.app_context():
+        assert db.session.get(ItemStat, item_analysis.question_hash(STRONG_QUESTION)).attempts == 5
+    assert admin.post(f'/admin/stats/delete/{deleted}').get_json()['success'] is True
+
+    with app_module.app.app_context():
+        strong = db.session.get(ItemStat, item_analysis.question_hash(STRONG_QUESTION))
+        assert (strong.attempts, strong.correct, strong.scored) == (4, 2, 4)
+        assert strong.discrimination == pytest.approx(statistics.correlation([1.0, 0.8, 0.2, 0.0], [1, 1, 0, 0]))
+        assert db.session.get(ItemStat, item_analysis.question_hash(f'{deleted}번 학생 준비 문제 0')) is None
+
+
+def test_item_page_sorts_by_metrics(app_module, admin, student):
+    seed(app_module)
+    data = admin.get(f'/api/admin/items?subject={SUBJECT}&min_attempts=2').get_json()
+    assert [item['question'] for item in data['items']] == [REVERSED_QUESTION, STRONG_QUESTION]
+    assert '변별도 낮음' in data['items'][0]['flags'] and data['items'][1]['flags'] == []
+
+    data = admin.get(f'/api/admin/items?subject={SUBJECT}&min_attempts=2&sort=discrimination&order=desc').get_json()
+    assert data['items'][0]['question'] == STRONG_QUESTION
+
+    html = admin.get(f'/admin/items?subject={SUBJECT}').get_data(as_text=True)
+    assert STRONG_QUESTION in html and '변별도 낮음' in html
+    assert student.get('/api/admin/items').status_code == 403
+
+
+def test_standardize_units_relabels_items(app_module, tmp_path):
+    seed(app_module)
+    path = tmp_path / 'mappings.json'
+    path.write_text('{"rules": [{"column": "unit", "from": ["문항단원"], "to": "표준 문항단원"}]}', encoding='utf-8')
+    with app_module.app.app_context():
+        unit_normalizer.run(db.session, unit_normalizer.load_rules(str(path)))
+        item = db.session.get(ItemStat, item_analysis.question_hash(STRONG_QUESTION))
+        assert db.session.get(Category, item.category_id).unit == '표준 문항단원'
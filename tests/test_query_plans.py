@@ -0,0 +1,79 @@
+"""대시보드/다운로드 경로의 조회가 큰 테이블을 전체 스캔하지 않는지 SQLite 실행 계획으로 확인"""
+import re
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from models import db
+from test_stats_rollup import make_user, answer_row
+
+SUBJECT = '계획과학'
+# 답변/기간마다 커지는 테이블
+HOT_TABLES = ('answer', 'answer_bucket', 'answer_rollup')
+FULL_SCAN = re.compile(r'SCAN ({})\b'.format('|'.join(HOT_TABLES)))
+
+
+@contextmanager
+def captured_selects(app_module):
+    statements = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    with app_module.app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+
+
+def full_scans(app_module, statements):
+    """(문장, 전체 스캔 단계) 목록"""
+    scans = []
+    with app_module.app.app_context():
+        with db.engine.connect() as connection:
+            for statement, parameters in statements:
+                plan = [row[3] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+                scans.extend((' '.join(statement.split())[:200], step) for step in plan if FULL_SCAN.match(step))
+    return scans
+
+
+@pytest.fixture
+def student_id(app_module):
+    user_id = make_user(app_module, 'plan-student')
+    for i in range(3):
+        row = answer_row(user_id, subject=SUBJECT, grade='중1', unit=f'계획단원{i}', is_correct=i % 2 == 0)
+        app_module.answer_recorder.record(user_id, {'question': f'계획 문제 {i}'}, '①', row['is_correct'], row)
+    app_module.answer_recorder.flush()
+    return user_id
+
+
+@pytest.mark.parametrize('url', [
+    '/admin?student_id={id}&subject={subject}&grade=중1',
+    '/admin?student_id={id}&start=2026-01-01&end=2026-12-31',
+    '/api/admin/answers/export?student_id={id}&start=2026-01-01',
+    '/api/admin/answers/export?subject={subject}&grade=중1&start=2026-01-01',
+    '/api/admin/answers/export?start=2026-01-01&end=2026-12-31',
+    '/api/admin/statistics/download?student_id={id}&subject={subject}',
+    '/api/admin/stats/trend?period=day&student_id={id}',
+    '/api/admin/stats/trend?subject={subject}&grade=중1',
+])
+def test_filtered_stats_queries_use_indexes(app_module, admin, student_id, url):
+    url = url.format(id=student_id, subject=SUBJECT)
+    # 통계 캐시를 먼저 채움 (캐시가 비었을 때는 필터 선택 목록을 위해 집계 테이블 전체를 한 번 읽음)
+    admin.get(url).get_data()
+    with captured_selects(app_module) as statements:
+        response = admin.get(url)
+        response.get_data()
+    assert response.status_code == 200 and statements
+    assert full_scans(app_module, statements) == []
+
+
+def test_deleting_student_stats_uses_indexes(app_module, admin, student_id):
+    with captured_selects(app_module) as statements:
+        assert admin.post(f'/admin/stats/delete/{student_id}').get_json()['success'] is True
+    assert statements and full_scans(app_module, statements) == []
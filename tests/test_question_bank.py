@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+import question_bank as question_bank_module
+from question_bank import QuestionBankFiller
+from models import db, QuestionBank, QuestionBankClaim
+
+
+def multiple_choice(text='물의 끓는점은?'):
+    return {
+        'question': text,
+        'question_type': '객관식',
+        'options': ['① 50도', '② 100도', '③ 150도'],
+        'correct': '② 100도',
+        'explanation': '물은 100도에서 끓습니다.'
+    }
+
+
+@pytest.fixture
+def filler(app_module):
+    generated = []
+
+    def generate(subject, grade, question_type, count, unit):
+        generated.append((subject, grade, unit, question_type, count))
+        return [multiple_choice(f'{unit} 문제 {i}') for i in range(count)]
+
+    filler = QuestionBankFiller(app_module.app, generate, pool_size=2)
+    filler.generated = generated
+    filler.enqueued = []
+    filler._enqueue = filler.enqueued.append
+    with app_module.app.app_context():
+        QuestionBank.query.delete()
+        QuestionBankClaim.query.delete()
+        db.session.commit()
+        yield filler
+        QuestionBank.query.delete()
+        db.session.commit()
+
+
+def test_disabled_by_default():
+    assert question_bank_module.QUESTION_BANK_SIZE == 0
+    assert QuestionBankFiller(None, None).take('과학', '중1', ['객관식'], 1) is None
+
+
+def test_take_filters_by_unit_and_refills_only_drained(filler):
+    filler._fill('과학', '중1', '기체의 성질', '객관식')
+    filler._fill('과학', '중1', '태양계', '객관식')
+
+    questions = filler.take('과학', '중1', ['객관식'], 2, unit='태양계')
+    assert [q['question'] for q in sorted(questions, key=lambda q: q['question'])] == ['태양계 문제 0', '태양계 문제 1']
+    assert filler.enqueued == [('과학', '중1', '태양계', '객관식')]
+    assert QuestionBank.query.filter_by(unit='기체의 성질').count() == 2
+
+
+def test_miss_refills_requested_unit_only(filler):
+    assert filler.take('과학', '중1', ['객관식'], 1, unit='태양계') is None
+    assert filler.enqueued == [('과학', '중1', '태양계', '객관식')]
+
+
+def test_fill_skips_invalid_questions(filler):
+    filler.generate = lambda *args: [multiple_choice(), {'question': '정답 없음', 'question_type': '객관식'}]
+    filler._fill('과학', '중1', '태양계', '객관식')
+    rows = QuestionBank.query.all()
+    assert len(rows) == 1
+    assert json.loads(rows[0].payload)['correct'] == '② 100도'
+
+
+def test_fill_is_skipped_while_another_worker_holds_the_claim(filler):
+    assert filler._claim('과학/중1/태양계/객관식')
+    filler._fill('과학', '중1', '태양계', '객관식')
+    assert filler.generated == []
+
+    filler._release('과학/중1/태양계/객관식')
+    filler._fill('과학', '중1', '태양계', '객관식')
+    assert len(filler.generated) == 1
+    assert QuestionBankClaim.query.count() == 0
@@ -0,0 +1,77 @@
+import csv
+import io
+from datetime import datetime
+
+from sqlalchemy import create_engine, inspect, insert, text
+
+import category_store
+import question_store
+from models import db, Answer, Question
+from test_stats_rollup import make_user
+
+SUBJECT = '문제저장과학'
+
+
+def test_recorder_stores_each_question_once(app_module):
+    users = [make_user(app_module, f'question-{i}') for i in range(3)]
+    for user_id in users:
+        app_module.answer_recorder.record(user_id, {'question': '물의  끓는점은 몇 도인가?'}, '①', True,
+                                          {'subject': SUBJECT})
+    app_module.answer_recorder.record(users[0], {'question': '물의 끓는점은 몇 도인가?\n'}, '②', False,
+                                      {'subject': SUBJECT})
+    app_module.answer_recorder.flush()
+
+    with app_module.app.app_context():
+        answers = Answer.query.filter(*category_store.answer_criteria(SUBJECT)).all()
+        assert len(answers) == 4 and len({answer.question_id for answer in answers}) == 1
+        assert {answer.question for answer in answers} == {''}
+        question = db.session.get(Question, answers[0].question_id)
+        assert question.text == '물의  끓는점은 몇 도인가?'
+        assert question.content_hash == question_store.question_hash('물의 끓는점은 몇 도인가?')
+
+
+def test_legacy_answers_are_migrated_in_chunks(app_module, admin):
+    user_id = make_user(app_module, 'question-legacy')
+    rows = [{'user_id': user_id, 'subject': SUBJECT, 'grade': '중2', 'unit': '이전', 'question': question,
+             'user_answer': '①', 'is_correct': True, 'timestamp': datetime.utcnow()}
+            for question in ('이전 문제 A', '이전 문제 B', '이전 문제 A', '이전 문제 A')]
+    with app_module.app.app_context():
+        db.session.execute(insert(Answer), category_store.attach(db.session, rows))
+        db.session.commit()
+
+    # 옮기기 전에도 내보내기는 답변에 저장된 문제 내용을 사용
+    exported = admin.get(f'/api/admin/answers/export?subject={SUBJECT}').get_data(as_text=True)
+    assert [row['question'] for row in csv.DictReader(io.StringIO(exported)) if row['unit'] == '이전'] == \
+        ['이전 문제 A', '이전 문제 B', '이전 문제 A', '이전 문제 A']
+
+    with app_module.app.app_context():
+        assert question_store.pending_count(db.session) >= 4
+        assert question_store.migrate(db.session, chunk_size=3) >= 4
+        assert question_store.pending_count(db.session) == 0
+        answers = Answer.query.filter_by(user_id=user_id).order_by(Answer.id).all()
+        assert {answer.question for answer in answers} == {''}
+        assert len({answer.question_id for answer in answers}) == 2
+        assert Question.query.filter(Question.text.like('이전 문제 %')).count() == 2
+
+    exported = admin.get(f'/api/admin/answers/export?subject={SUBJECT}').get_data(as_text=True)
+    assert [row['question'] for row in csv.DictReader(io.StringIO(exported)) if row['unit'] == '이전'] == \
+        ['이전 문제 A', '이전 문제 B', '이전 문제 A', '이전 문제 A']
+
+
+def test_upgrade_schema_adds_question_id_to_existing_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text('CREATE TABLE answer (id INTEGER PRIMARY KEY, question TEXT NOT NULL)'))
+        connection.execute(text('CREATE TABLE item_stat (question_hash VARCHAR(64) PRIMARY KEY, question TEXT)'))
+        connection.execute(text("INSERT INTO answer (question) VALUES ('이전 문제')"))
+    Question.__table__.create(engine)
+
+    question_store.upgrade_schema(engine)
+    question_store.upgrade_schema(engine)   # 두 번 실행해도 안전
+
+    inspector = inspect(engine)
+    assert 'question_id' in {column['name'] for column in inspector.get_columns('answer')}
+    assert 'ix_answer_question_id' in {index['name'] for index in inspector.get_indexes('answer')}
+    assert 'question' not in {column['name'] for column in inspector.get_columns('item_stat')}
+    with engine.connect() as connection:
+        assert connection.execute(text('SELECT question, question_id FROM answer')).one() == ('이전 문제', None)
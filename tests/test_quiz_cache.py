@@ -0,0 +1,57 @@
+import random
+
+from quiz_cache import QuizCache, is_valid_question, make_cache_key, shuffle_choices
+
+
+def numeric_question(**overrides):
+    question = {
+        'question': '가장 가벼운 물체는?',
+        'question_type': '객관식',
+        'options': ['2.7 g', '1.5 g', '3.5 g'],
+        'correct': '1.5 g',
+        'explanation': '1.5 g이 가장 가볍습니다.'
+    }
+    question.update(overrides)
+    return question
+
+
+def test_shuffle_keeps_numeric_answer_key():
+    for seed in range(20):
+        question = shuffle_choices(numeric_question(), random.Random(seed))
+        assert question['correct'].endswith('1.5 g')
+        assert question['correct'] in question['options']
+
+
+def test_shuffle_renumbers_explanation():
+    question = numeric_question(
+        options=['① 2.7 g', '② 1.5 g', '③ 3.5 g'],
+        correct='② 1.5 g',
+        explanation='정답은 ②입니다.'
+    )
+    shuffled = shuffle_choices(question, random.Random(1))
+    marker = shuffled['correct'][0]
+    assert shuffled['explanation'] == f'정답은 {marker}입니다.'
+
+
+def test_marker_and_text_disagreement_is_rejected():
+    assert is_valid_question(numeric_question(options=['① 2.7 g', '② 1.5 g', '③ 3.5 g'], correct='② 1.5 g'))
+    assert not is_valid_question(numeric_question(options=['① 2.7 g', '② 1.5 g', '③ 3.5 g'], correct='① 1.5 g'))
+    assert is_valid_question(numeric_question(correct='2'))
+    assert not is_valid_question(numeric_question(correct='5.0 g'))
+
+
+def test_cache_does_not_repeat_questions_for_same_viewer():
+    cache = QuizCache(max_entries=4, ttl=60)
+    key = make_cache_key('과학', '중1', ['객관식'], 1)
+    assert cache.put(key, [numeric_question()], viewer=1)
+
+    assert cache.get(key, viewer=1) is None
+    assert cache.get(key, viewer=2)[0]['correct'].endswith('1.5 g')
+    assert cache.get(key, viewer=2) is None
+    assert cache.stats()['repeats'] == 2
+    assert cache.stats()['hits'] == 1
+
+
+def test_cache_key_normalizes_question_types():
+    assert make_cache_key('과학', '중1', ['단답형', '객관식'], 2) == make_cache_key(' 과학', '중1 ', ['객관식', '단답형'], 2)
+    assert make_cache_key('과학', '중1', ['객관식'], 2) != make_cache_key('과학', '중1', ['객관식'], 2, '태양계')
@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+
+from quiz_planner import FanOutPlanner, plan_batches
+
+
+@pytest.mark.parametrize('count, batch_size, expected', [
+    (1, 3, [1]),
+    (3, 3, [3]),
+    (5, 3, [3, 2]),
+    (10, 3, [3, 3, 2, 2]),
+    (10, 0, [10]),
+])
+def test_plan_batches(count, batch_size, expected):
+    assert plan_batches(count, batch_size) == expected
+
+
+def make_question(text):
+    return {'question': text, 'question_type': '단답형', 'correct': '답'}
+
+
+def test_returns_first_batch_and_merges_rest_in_background():
+    release = threading.Event()
+    calls = []
+
+    def generate(subject, grade, question_types, count, unit):
+        index = len(calls)
+        calls.append(count)
+        if index > 0:
+            release.wait(5)
+        # 두 번째 배치는 첫 배치와 같은 문제를 하나 포함
+        return [make_question(f'문제 {index}-{i}' if (index, i) != (1, 0) else '문제 0-0') for i in range(count)]
+
+    first, more, completed = [], [], []
+    planner = FanOutPlanner(generate, batch_size=2, concurrency=3, timeout=5)
+    questions = planner.generate_first('과학', '중1', ['단답형'], 5,
+                                       on_first=lambda q, total: first.append(q), on_more=more.extend, on_complete=completed.append)
+    assert len(questions) == 2
+    assert first == [questions]
+
+    release.set()
+    for _ in range(100):
+        if completed:
+            break
+        time.sleep(0.01)
+    texts = [q['question'] for q in completed[0]]
+    assert len(texts) == len(set(texts)) == 4
+    assert completed[0] == questions + more
+    assert planner.stats['duplicates'] == 1
+
+
+def test_raises_when_every_batch_fails():
+    def generate(*args):
+        raise ValueError('생성 실패')
+
+    planner = FanOutPlanner(generate, batch_size=1, concurrency=2, timeout=5)
+    with pytest.raises(ValueError):
+        planner.generate_first('과학', '중1', ['객관식'], 2)
+
+
+def wait_until(condition):
+    for _ in range(200):
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_timed_out_request_drops_late_batches():
+    release = threading.Event()
+
+    def generate(subject, grade, question_types, count, unit):
+        release.wait(5)
+        return [make_question(f'늦은 문제 {i}') for i in range(count)]
+
+    first, more, completed = [], [], []
+    planner = FanOutPlanner(generate, batch_size=1, concurrency=2, timeout=0.05)
+    with pytest.raises(TimeoutError):
+        planner.generate_first('과학', '중1', ['단답형'], 2, on_first=lambda q, total: first.append(q),
+                               on_more=more.extend, on_complete=completed.append)
+    release.set()
+    time.sleep(0.1)
+    # 한 번에 생성하는 출제로 넘어간 뒤 도착한 배치는 문제 목록에 추가하지 않음
+    assert first == more == completed == []
+
+
+def test_failed_batch_lowers_expected_total():
+    calls = []
+    release = threading.Event()
+
+    def generate(subject, grade, question_types, count, unit):
+        calls.append(count)
+        if len(calls) == 1:
+            return [make_question(f'문제 {i}') for i in range(count)]
+        release.wait(5)
+        raise ValueError('생성 실패')
+
+    totals = []
+    planner = FanOutPlanner(generate, batch_size=2, concurrency=1, timeout=5)
+    questions = planner.generate_first('과학', '중1', ['단답형'], 4, on_first=lambda q, total: totals.append(total),
+                                       on_total=totals.append)
+    assert len(questions) == 2
+    release.set()
+    assert wait_until(lambda: len(totals) == 2)
+    assert totals == [4, 2] and planner.stats['failed_batches'] == 1
+
+
+def test_requests_do_not_wait_behind_other_requests():
+    blocked = threading.Event()
+
+    def generate(subject, grade, question_types, count, unit):
+        if subject == '느린과목':
+            blocked.wait(5)
+        return [make_question(f'{subject} {i}') for i in range(count)]
+
+    planner = FanOutPlanner(generate, batch_size=1, concurrency=1, timeout=1)
+    slow = threading.Thread(target=lambda: planner.generate_first('느린과목', '중1', ['단답형'], 3))
+    slow.start()
+    try:
+        assert len(planner.generate_first('과학', '중1', ['단답형'], 2)) >= 1
+    finally:
+        blocked.set()
+        slow.join()
+
+
+def test_chat_fans_out_large_requests(app_module, student, fake_client):
+    result = student.post('/api/chat', json={'message': '5문제 출제', 'subject': '과학', 'grade': '중1'}).get_json()
+    assert result['type'] == 'QUIZ'
+
+    for _ in range(100):
+        store = app_module.current_quiz_store[result['thread_id']]
+        if len(store['questions']) == 5:
+            break
+        time.sleep(0.01)
+    assert len(store['questions']) == 5
+    assert store['progress'] == {'current': 1, 'total': 5}
+    # 대화 스레드 외에 배치마다 새 스레드에서 생성
+    assert fake_client.calls.count('threads.create') >= 2 + 1
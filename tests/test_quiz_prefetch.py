@@ -0,0 +1,87 @@
+import time
+import threading
+
+from quiz_prefetch import QuizPrefetcher
+from session_store import InProcessSessionStore
+
+
+def quiz_request(viewer=7, cache_key='key-a', count=2):
+    return {
+        'subject': '과학', 'grade': '중1', 'unit': None, 'question_types': ['객관식'],
+        'question_count': count, 'cache_key': cache_key, 'viewer': viewer
+    }
+
+
+def test_prefetch_starts_at_threshold_and_is_used_once():
+    generated = threading.Event()
+
+    def generate(subject, grade, question_types, count, unit):
+        generated.set()
+        return [{'question': f'미리 {i}'} for i in range(count)]
+
+    prefetcher = QuizPrefetcher(generate, InProcessSessionStore(), threshold=0.5, ttl=60, wait_timeout=5)
+    prefetcher.register('thread-1', quiz_request())
+
+    assert not prefetcher.on_progress('thread-1', 1, 4)
+    assert prefetcher.on_progress('thread-1', 2, 4)
+    assert not prefetcher.on_progress('thread-1', 3, 4)  # 이미 생성 중
+
+    questions = prefetcher.take(7, 'key-a')
+    assert [q['question'] for q in questions] == ['미리 0', '미리 1']
+    assert prefetcher.take(7, 'key-a') is None
+    assert prefetcher.snapshot()['used'] == 1
+
+
+def test_prefetch_for_other_conditions_is_counted_as_wasted():
+    prefetcher = QuizPrefetcher(lambda *args: [{'question': 'q'}], InProcessSessionStore(), threshold=0.5, ttl=60, wait_timeout=5)
+    prefetcher.register('thread-1', quiz_request())
+    prefetcher.on_progress('thread-1', 1, 1)
+
+    assert prefetcher.take(7, 'key-b') is None
+    snapshot = prefetcher.snapshot()
+    assert snapshot['wasted'] == 1 and snapshot['used'] == 0
+
+
+def test_prefetch_is_shared_between_workers():
+    store = InProcessSessionStore()
+    calls = []
+
+    def generate(subject, grade, question_types, count, unit):
+        calls.append(count)
+        return [{'question': f'공유 {i}'} for i in range(count)]
+
+    # 출제/채점/다음 세트 요청을 서로 다른 워커가 처리
+    workers = [QuizPrefetcher(generate, store, threshold=0.5, ttl=60, wait_timeout=5) for _ in range(3)]
+    workers[0].register('thread-1', quiz_request())
+    assert workers[1].on_progress('thread-1', 2, 2)
+    assert not workers[0].on_progress('thread-1', 2, 2)
+    assert [q['question'] for q in workers[2].take(7, 'key-a')] == ['공유 0', '공유 1']
+    assert workers[0].take(7, 'key-a') is None and calls == [2]
+
+
+def test_single_question_quizzes_are_not_prefetched():
+    prefetcher = QuizPrefetcher(lambda *args: [{'question': 'q'}], InProcessSessionStore(), threshold=0.5, ttl=60)
+    prefetcher.register('thread-1', quiz_request(count=1))
+    assert not prefetcher.on_progress('thread-1', 1, 1)
+    assert prefetcher.snapshot()['started'] == 0
+
+
+def test_next_request_is_served_from_prefetch(app_module, student, fake_client):
+    quiz = student.post('/api/chat', json={'message': '2문제 출제', 'subject': '과학', 'grade': '중3'}).get_json()
+    for question in quiz['questions']:
+        student.post('/api/chat', json={
+            'message': question['correct'], 'thread_id': quiz['thread_id'], 'is_quiz_answer': True
+        })
+    # 백그라운드 생성이 끝난 뒤의 실행 수와 비교
+    for _ in range(200):
+        if app_module.quiz_prefetcher.snapshot()['ready']:
+            break
+        time.sleep(0.01)
+    used = app_module.quiz_prefetcher.stats['used']
+    runs_before = fake_client.calls.count('runs.stream')
+
+    student.post('/api/chat', json={
+        'message': '2문제 출제', 'subject': '과학', 'grade': '중3', 'thread_id': quiz['thread_id']
+    })
+    assert app_module.quiz_prefetcher.stats['used'] == used + 1
+    assert fake_client.calls.count('runs.stream') == runs_before
@@ -0,0 +1,59 @@
+import json
+
+from quiz_stream import QuestionStreamParser, FieldStreamParser
+
+
+def chunks(text, size=5):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def parse_sse(body):
+    events = []
+    for frame in body.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in frame.split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+def test_question_parser_emits_each_question_when_closed():
+    questions = [{'question': '괄호 {} 와 "따옴표"', 'options': ['①', '②']}, {'question': '둘째'}]
+    text = '```json\n' + json.dumps({'type': 'QUIZ', 'questions': questions}, ensure_ascii=False) + '\n```'
+
+    parser = QuestionStreamParser()
+    emitted = []
+    for chunk in chunks(text):
+        found = parser.feed(chunk)
+        if found and not emitted:
+            # 첫 문제는 두 번째 문제가 생성되기 전에 나옴
+            assert '둘째' not in parser.buffer
+        emitted.extend(found)
+    assert emitted == questions
+
+
+def test_field_parser_streams_decoded_value():
+    text = json.dumps({'type': 'ANSWER', 'answer': {'correct': True, 'explanation': '물은 "100℃"\n에서 끓어요'}},
+                      ensure_ascii=True)
+    parser = FieldStreamParser('explanation')
+    pieces = [parser.feed(chunk) for chunk in chunks(text, 3)]
+    assert ''.join(pieces) == '물은 "100℃"\n에서 끓어요'
+    assert sum(1 for piece in pieces if piece) > 1
+
+
+def test_stream_endpoint_sends_first_question_before_result(student, fake_client):
+    response = student.post('/api/chat/stream', json={'message': '3문제 출제', 'subject': '과학', 'grade': '중2'})
+    assert response.mimetype == 'text/event-stream'
+    events = parse_sse(response.get_data(as_text=True))
+
+    names = [name for name, _ in events]
+    assert names == ['question', 'question', 'question', 'result']
+    assert events[0][1]['progress'] == {'current': 1, 'total': 3}
+    result = events[-1][1]
+    assert result['type'] == 'QUIZ' and len(result['questions']) == 3
+
+    answer = student.post('/api/chat/stream', json={
+        'message': '오답', 'thread_id': result['thread_id'], 'is_quiz_answer': True
+    })
+    events = parse_sse(answer.get_data(as_text=True))
+    assert events[-1][0] == 'result'
+    assert events[-1][1]['answer']['correct'] is False
+    assert events[-1][1]['next_question']['progress']['current'] == 2
@@ -0,0 +1,74 @@
+import os
+import time
+
+from report_jobs import ReportJobs
+from test_stats_rollup import make_user
+
+SUBJECT = '작업과학'
+
+
+def seed(app_module):
+    for i in range(3):
+        user_id = make_user(app_module, f'job-{i}')
+        app_module.answer_recorder.record(user_id, {'question': '문제'}, '①', True,
+                                          {'subject': SUBJECT, 'grade': '중1', 'unit': '생물'})
+    app_module.answer_recorder.flush()
+
+
+def wait_for(client, job):
+    for _ in range(100):
+        if job['status'] != 'running':
+            return job
+        time.sleep(0.05)
+        job = client.get(job['status_url']).get_json()
+    raise AssertionError('보고서 작업이 끝나지 않았습니다')
+
+
+def test_report_job_renders_artifact_and_reuses_it(app_module, admin):
+    seed(app_module)
+    response = admin.post('/api/admin/reports', json={'type': 'complete', 'subject': SUBJECT})
+    assert response.status_code in (200, 202)
+    job = wait_for(admin, response.get_json())
+    assert job['status'] == 'done'
+
+    download = admin.get(job['download_url'])
+    html = download.get_data(as_text=True)
+    assert 'job-2' in html and '합계 (3명)' in html
+    assert download.headers['Content-Disposition'].startswith('attachment')
+
+    # 데이터가 바뀌지 않았으면 같은 보고서를 바로 반환
+    reused = admin.post('/api/admin/reports', json={'type': 'complete', 'subject': SUBJECT})
+    assert reused.status_code == 200 and reused.get_json()['job_id'] == job['job_id']
+
+    # 답변이 추가되면 새 작업
+    seed(app_module)
+    assert admin.post('/api/admin/reports', json={'type': 'complete', 'subject': SUBJECT}).get_json()['job_id'] != \
+        job['job_id']
+
+
+def test_report_job_validation(admin, student):
+    assert admin.post('/api/admin/reports', json={'type': 'nope'}).status_code == 400
+    assert admin.post('/api/admin/reports', json={'start': '2026-02-30'}).status_code == 400
+    assert admin.get('/api/admin/reports/../../etc').status_code == 404
+    assert admin.get('/api/admin/reports/' + '0' * 32).status_code == 404
+    assert student.post('/api/admin/reports', json={}).status_code == 403
+
+
+def test_failed_jobs_and_eviction(tmp_path):
+    def render(report_type, params, out):
+        if report_type == 'fail':
+            raise RuntimeError('실패')
+        out.write(f"<html>{params['n']}</html>")
+        return f"report_{params['n']}.html"
+
+    jobs = ReportJobs(str(tmp_path), render, max_workers=1, max_artifacts=3)
+    ids = [jobs.submit('ok', {'n': n}, 1)['job_id'] for n in range(3)]
+    failed = jobs.submit('fail', {}, 1)
+    jobs._executor.shutdown(wait=True)
+
+    assert jobs.status(failed['job_id'])['status'] == 'failed'
+    assert not any(name.endswith('.tmp') for name in os.listdir(tmp_path))
+    # 가장 최근에 끝난 3개만 보관
+    assert jobs.status(ids[0]) is None and not os.path.exists(jobs.artifact_path(ids[0]))
+    assert [jobs.status(job_id)['filename'] for job_id in ids[1:]] == ['report_1.html', 'report_2.html']
+    assert jobs.stats['evicted'] == 1
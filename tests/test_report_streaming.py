@@ -0,0 +1,41 @@
+from models import db, User
+from stats_engine import iter_student_stats
+
+
+def seed(app_module, count=3):
+    ids = []
+    with app_module.app.app_context():
+        for i in range(count):
+            username = f'report-{i}'
+            user = User.query.filter_by(username=username).first()
+            if user is None:
+                user = User(username=username)
+                user.set_password('pw')
+                db.session.add(user)
+                db.session.commit()
+            ids.append(user.id)
+    for user_id in ids:
+        app_module.answer_recorder.record(user_id, {'question': '문제'}, '①', True,
+                                          {'subject': '보고서과학', 'grade': '중1', 'unit': '생물'})
+    app_module.answer_recorder.flush()
+    return ids
+
+
+def test_student_rows_are_read_in_batches(app_module):
+    seed(app_module)
+    with app_module.app.app_context():
+        rows = list(iter_student_stats(db.session, subject='보고서과학', batch_size=1))
+    assert [(student.username, total, correct) for student, total, correct in rows] == \
+        [('report-0', 1, 1), ('report-1', 1, 1), ('report-2', 1, 1)]
+
+
+def test_reports_are_streamed_with_summary(app_module, admin):
+    seed(app_module)
+    response = admin.get('/api/admin/statistics/download?subject=보고서과학', buffered=False)
+    assert response.status_code == 200 and not response.is_sequence
+    html = response.get_data(as_text=True)
+    assert html.index('report-0') < html.index('report-2') < html.index('합계 (3명)')
+
+    response = admin.get('/admin/stats/student-report', buffered=False)
+    assert not response.is_sequence
+    assert 'report-1' in response.get_data(as_text=True)
@@ -0,0 +1,92 @@
+import time
+import threading
+from datetime import datetime
+
+from sqlalchemy import create_engine, inspect, insert, text
+
+import schema_migrations
+from models import db, SchemaMigration
+
+VERSIONS = [migration.version for migration in schema_migrations.MIGRATIONS]
+
+
+def index_names(engine, table):
+    return {index['name'] for index in inspect(engine).get_indexes(table)}
+
+
+def test_versions_are_unique_and_ordered():
+    assert VERSIONS == sorted(set(VERSIONS))
+
+
+def test_old_database_is_upgraded_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        # 인덱스와 question_id/category_id가 없던 버전의 답변 테이블
+        connection.execute(text('CREATE TABLE answer (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, '
+                                'subject VARCHAR(50), question TEXT NOT NULL, user_answer VARCHAR(10) NOT NULL, '
+                                'is_correct BOOLEAN NOT NULL, timestamp DATETIME NOT NULL)'))
+        connection.execute(text("INSERT INTO answer (user_id, subject, question, user_answer, is_correct, timestamp) "
+                                "VALUES (1, '과학', '문제', '①', 1, '2026-01-01 00:00:00')"))
+    # create_all은 없는 테이블만 만듦
+    db.metadata.create_all(engine)
+    assert 'ix_answer_user_timestamp' not in index_names(engine, 'answer')
+
+    assert schema_migrations.upgrade(engine) == VERSIONS
+    assert schema_migrations.upgrade(engine) == []
+    assert schema_migrations.pending(engine) == []
+
+    columns = {column['name'] for column in inspect(engine).get_columns('answer')}
+    assert {'question_id', 'category_id'} <= columns
+    indexes = index_names(engine, 'answer')
+    assert {'ix_answer_user_timestamp', 'ix_answer_category_timestamp', 'ix_answer_timestamp'} <= indexes
+    assert 'ix_answer_category_id' not in indexes
+    assert 'ix_answer_bucket_user' in index_names(engine, 'answer_bucket')
+    with engine.connect() as connection:
+        assert connection.execute(text('SELECT subject FROM answer')).scalar() == '과학'
+
+
+def test_new_database_records_migrations_without_changes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    db.metadata.create_all(engine)
+    before = index_names(engine, 'answer')
+    assert schema_migrations.upgrade(engine) == VERSIONS
+    assert index_names(engine, 'answer') == before
+    assert schema_migrations.applied_versions(engine) == set(VERSIONS)
+
+
+def test_status_and_upgrade_commands(app_module):
+    runner = app_module.app.test_cli_runner()
+    result = runner.invoke(args=['db-status'])
+    assert all(f'{version:>3} 적용' in result.output for version in VERSIONS)
+    assert '적용할 스키마 마이그레이션이 없습니다' in runner.invoke(args=['db-upgrade']).output
+
+
+def test_concurrent_workers_apply_each_migration_once(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'workers.db'}", connect_args={'timeout': 30})
+    db.metadata.create_all(engine)
+    calls = []
+
+    def slow_migration(engine):
+        calls.append(threading.get_ident())
+        time.sleep(0.3)
+
+    monkeypatch.setattr(schema_migrations, 'MIGRATIONS', (schema_migrations.Migration(1, '느린 변경', slow_migration),))
+    monkeypatch.setattr(schema_migrations, 'LOCK_POLL_INTERVAL', 0.05)
+    results = []
+    workers = [threading.Thread(target=lambda: results.append(schema_migrations.upgrade(engine))) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len(calls) == 1 and sorted(results) == [[], [], [1]]
+    assert schema_migrations.applied_versions(engine) == {1}
+
+
+def test_stale_lock_from_crashed_worker_is_released(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'stale.db'}")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(SchemaMigration).values(
+            version=schema_migrations.LOCK_VERSION, name='lock', applied_at=datetime(2000, 1, 1)))
+    assert schema_migrations.upgrade(engine) == VERSIONS
+    assert schema_migrations.applied_versions(engine) == set(VERSIONS)
@@ -0,0 +1,161 @@
+import threading
+import time
+
+import pytest
+
+from session_store import (SessionStore, InProcessSessionStore, SQLiteSessionStore, create_session_store,
+                           pack, unpack)
+
+
+def quiz_entry(count=3):
+    questions = [{'question': f'문제 {i} ' + '설명' * 100, 'correct': '정답'} for i in range(count)]
+    return {'questions': questions, 'current_index': 1, 'quiz': questions[1],
+            'progress': {'current': 2, 'total': count}}
+
+
+def test_pack_drops_duplicate_current_quiz_and_compresses():
+    entry = quiz_entry()
+    data = pack(entry)
+    assert data[:1] == b'z'
+    assert len(data) < len(str(entry).encode('utf-8')) / 2
+    assert unpack(data) == entry
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return InProcessSessionStore(ttl=60)
+    return SQLiteSessionStore(str(tmp_path / 'sessions.db'), ttl=60)
+
+
+def test_dict_interface(store):
+    store['thread-1'] = quiz_entry()
+    assert 'thread-1' in store
+    assert store['thread-1']['progress']['current'] == 2
+    assert store.get('missing') is None
+    assert store.keys() == ['thread-1']
+    assert store.pop('thread-1')['current_index'] == 1
+    assert 'thread-1' not in store
+
+
+def test_update_is_atomic(store):
+    store['thread-1'] = {'progress': {'current': 0}}
+
+    def increment(entry):
+        entry['progress']['current'] += 1
+
+    workers = [threading.Thread(target=lambda: [store.update('thread-1', increment) for _ in range(25)])
+               for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert store['thread-1']['progress']['current'] == 100
+    assert store.update('missing', increment) is None
+
+
+def test_entries_expire(store):
+    store.ttl = 0.05
+    store['thread-1'] = quiz_entry()
+    time.sleep(0.1)
+    assert store.get('thread-1') is None
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    worker_a = create_session_store('sqlite:///' + path)
+    worker_b = create_session_store('sqlite:///' + path)
+    worker_a['thread-1'] = quiz_entry()
+    assert worker_b['thread-1'] == quiz_entry()
+
+
+def test_answer_graded_by_another_worker(app_module, student, fake_client):
+    quiz = student.post('/api/chat', json={'message': '2문제 출제', 'subject': '과학', 'grade': '중2'}).get_json()
+    # 다른 워커 프로세스처럼 같은 저장소 파일을 새로 연결해서 확인
+    other_worker = SQLiteSessionStore(app_module.current_quiz_store.path)
+    assert other_worker[quiz['thread_id']]['questions'] == quiz['questions']
+
+    result = student.post('/api/chat', json={
+        'message': quiz['questions'][0]['correct'], 'thread_id': quiz['thread_id'], 'is_quiz_answer': True
+    }).get_json()
+    assert result['answer']['correct'] is True
+    assert result['next_question']['progress'] == {'current': 2, 'total': 2}
+    assert other_worker[quiz['thread_id']]['current_index'] == 1
+
+
+def test_memory_store_round_trips_entries_exactly():
+    store = InProcessSessionStore(ttl=60)
+    entries = [
+        quiz_entry(),
+        {'quiz': {'question': '한 문제'}, 'progress': {'current': 1, 'total': 1}},
+        {'progress': {'current': 0}},
+        {'questions': [{'question': 'a'}, {'question': 'b'}], 'current_index': 0,
+         'quiz': {'question': '다른 문제'}, 'streaming': True},
+    ]
+    for i, entry in enumerate(entries):
+        store[f'thread-{i}'] = entry
+        assert store[f'thread-{i}'] == entry
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = InProcessSessionStore(ttl=60, max_entries=2)
+    store['a'] = quiz_entry()
+    store['b'] = quiz_entry()
+    store.get('a')
+    store['c'] = quiz_entry()
+    assert store.keys() == ['a', 'c']
+    stats = store.stats()
+    assert stats['evictions'] == 1
+    assert stats['entries'] == 2
+    assert 0 < stats['bytes'] <= stats['max_bytes']
+
+
+def test_memory_store_respects_byte_limit():
+    store = InProcessSessionStore(ttl=60, max_bytes=2000)
+    for i in range(50):
+        store[f'thread-{i}'] = quiz_entry(10)
+    stats = store.stats()
+    assert stats['bytes'] <= 2000
+    assert stats['entries'] + stats['evictions'] == 50
+    store.delete(store.keys()[0])
+    assert store.stats()['bytes'] == sum(store._sessions[key].nbytes for key in store.keys())
+
+
+def test_admin_quiz_session_status(admin, student):
+    assert student.get('/api/admin/quiz-sessions').status_code == 403
+    data = admin.get('/api/admin/quiz-sessions').get_json()
+    assert data['backend'] == 'sqlite'
+    assert data['process_memory'] > 0
+
+
+def test_store_must_implement_interface():
+    class PartialStore(SessionStore):
+        def get(self, key, default=None):
+            return default
+
+    with pytest.raises(TypeError):
+        PartialStore()
+
+
+def test_redis_store_round_trip(monkeypatch):
+    redis = pytest.importorskip('redis')
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, 'from_url', classmethod(lambda cls, url: fakeredis.FakeRedis(server=server)))
+
+    store = create_session_store('redis://localhost:6379/0', ttl=60)
+    store['thread-1'] = quiz_entry()
+    assert store['thread-1'] == quiz_entry()
+    assert store.keys() == ['thread-1']
+    assert 0 < store.client.ttl(store.PREFIX + 'thread-1') <= 60
+
+    def advance(entry):
+        entry['current_index'] = 2
+
+    assert store.update('thread-1', advance)['current_index'] == 2
+    # 다른 워커(같은 Redis를 쓰는 다른 저장소 객체)에서도 변경이 보임
+    other = create_session_store('redis://localhost:6379/0', ttl=60)
+    assert other['thread-1']['current_index'] == 2
+    assert store.update('missing', advance) is None
+    del store['thread-1']
+    assert other.get('thread-1') is None
@@ -0,0 +1,104 @@
+from datetime import date, datetime
+
+from sqlalchemy import insert
+
+import category_store
+import stats_rollup
+from models import db, Answer, AnswerBucket
+from stats_engine import compute_stats, accuracy_trend
+from test_stats_rollup import make_user
+
+SUBJECT = '기간과학'
+
+
+def save(app_module, user_id, answers):
+    """(timestamp, 정답 여부) 목록을 답변 기록기와 같은 방식으로 저장"""
+    rows = [{'user_id': user_id, 'subject': SUBJECT, 'grade': '중2', 'unit': '전기', 'question': '문제',
+             'user_answer': '①', 'is_correct': is_correct, 'timestamp': timestamp}
+            for timestamp, is_correct in answers]
+    with app_module.app.app_context():
+        rows = category_store.attach(db.session, rows)
+        db.session.execute(insert(Answer), rows)
+        stats_rollup.add_answers(db.session, rows)
+        db.session.commit()
+
+
+def bucket_rows(user_id, period):
+    return sorted((row.bucket_start, row.attempts, row.correct)
+                  for row in AnswerBucket.query.filter_by(user_id=user_id, period=period))
+
+
+def test_buckets_follow_inserts_deletes_and_rebuild(app_module):
+    user_id = make_user(app_module, 'bucket-student')
+    # 2026-03-02는 월요일, 버킷 날짜는 STATS_TIMEZONE(기본값 Asia/Seoul, UTC+9) 기준
+    save(app_module, user_id, [(datetime(2026, 3, 2, 9), True), (datetime(2026, 3, 4, 9), False),
+                               (datetime(2026, 3, 4, 23), True), (datetime(2026, 3, 10, 9), True)])
+
+    with app_module.app.app_context():
+        # UTC 3월 4일 23시는 한국 시간 3월 5일
+        assert bucket_rows(user_id, 'day') == [(date(2026, 3, 2), 1, 1), (date(2026, 3, 4), 1, 0),
+                                               (date(2026, 3, 5), 1, 1), (date(2026, 3, 10), 1, 1)]
+        assert bucket_rows(user_id, 'week') == [(date(2026, 3, 2), 3, 2), (date(2026, 3, 9), 1, 1)]
+
+        after_first_week = [Answer.user_id == user_id, Answer.timestamp >= datetime(2026, 3, 9)]
+        stats_rollup.remove_answers(db.session, *after_first_week)
+        Answer.query.filter(*after_first_week).delete()
+        db.session.commit()
+        assert bucket_rows(user_id, 'week') == [(date(2026, 3, 2), 3, 2)]
+
+        incremental = bucket_rows(user_id, 'day')
+        stats_rollup.rebuild(db.session)
+        db.session.commit()
+        assert bucket_rows(user_id, 'day') == incremental
+
+
+def test_date_filters_use_stats_timezone(app_module, admin):
+    user_id = make_user(app_module, 'bucket-timezone')
+    # UTC 6월 1일 20시 = 한국 시간 6월 2일 5시
+    save(app_module, user_id, [(datetime(2026, 6, 1, 20), True)])
+
+    assert stats_rollup.day_start_utc(date(2026, 6, 2)) == datetime(2026, 6, 1, 15)
+    data = admin.get(f'/api/admin/stats/trend?period=day&student_id={user_id}&start=2026-06-02').get_json()
+    assert [bucket['bucket_start'] for bucket in data['buckets']] == ['2026-06-02']
+    # 답변 다운로드도 같은 날짜 기준으로 거름
+    exported = admin.get(f'/api/admin/answers/export?format=ndjson&student_id={user_id}&start=2026-06-02&end=2026-06-02')
+    assert len(exported.get_data(as_text=True).splitlines()) == 1
+    exported = admin.get(f'/api/admin/answers/export?format=ndjson&student_id={user_id}&end=2026-06-01')
+    assert exported.get_data(as_text=True).strip() == ''
+
+
+def test_date_range_stats_and_trend(app_module):
+    user_id = make_user(app_module, 'bucket-range')
+    save(app_module, user_id, [(datetime(2026, 4, 1, 9), False), (datetime(2026, 4, 8, 9), True),
+                               (datetime(2026, 4, 9, 9), True)])
+
+    with app_module.app.app_context():
+        stats = compute_stats(db.session, user_id, start=date(2026, 4, 8), end=date(2026, 4, 30))
+        assert (stats.total_answers, stats.total_correct) == (2, 2)
+        assert compute_stats(db.session, user_id).total_answers == 3
+
+        trend = accuracy_trend(db.session, 'week', student_id=user_id)
+        assert [(point.bucket_start, point.attempts, point.accuracy_rate) for point in trend] == \
+            [('2026-03-30', 1, 0), ('2026-04-06', 2, 100.0)]
+        # 시작일이 주 중간이어도 그 주 전체를 포함
+        assert len(accuracy_trend(db.session, 'week', start=date(2026, 4, 2), student_id=user_id)) == 2
+
+
+def test_trend_endpoint_and_dashboard_range(app_module, admin):
+    user_id = make_user(app_module, 'bucket-endpoint')
+    save(app_module, user_id, [(datetime(2026, 5, 4, 9), True), (datetime(2026, 5, 5, 9), False)])
+
+    data = admin.get(f'/api/admin/stats/trend?period=day&student_id={user_id}').get_json()
+    assert data['buckets'] == [
+        {'bucket_start': '2026-05-04', 'attempts': 1, 'correct': 1, 'accuracy_rate': 100.0},
+        {'bucket_start': '2026-05-05', 'attempts': 1, 'correct': 0, 'accuracy_rate': 0},
+    ]
+    assert admin.get('/api/admin/stats/trend?period=month').status_code == 400
+    assert admin.get('/api/admin/stats/trend?start=2026-13-01').status_code == 400
+
+    page = admin.get(f'/admin?student_id={user_id}&start=2026-05-05&end=2026-05-05').get_data(as_text=True)
+    assert '2026-05-04' in page      # 5/5가 속한 주(월요일 시작)의 추이
+    assert admin.get('/admin?start=not-a-date').status_code == 200
+
+    report = admin.get(f'/api/admin/statistics/download?student_id={user_id}&start=2026-05-05')
+    assert '기간: 2026-05-05' in report.get_data(as_text=True)
@@ -0,0 +1,43 @@
+import stats_rollup
+from models import db, User
+from session_store import InProcessSessionStore
+from stats_cache import StatsCache
+
+
+def test_results_are_reused_until_answers_change(app_module):
+    cache = StatsCache(InProcessSessionStore(ttl=60))
+    with app_module.app.app_context():
+        user_id = User.query.filter_by(username='admin').first().id
+        first = cache.load(db.session, subject='캐시과학')
+        second = cache.load(db.session, subject='캐시과학')
+        assert second == first
+        assert cache.stats == {'hits': 1, 'misses': 1, 'errors': 0}
+        version = stats_rollup.data_version(db.session)
+
+    app_module.answer_recorder.record(user_id, {'question': '문제'}, '①', True,
+                                      {'subject': '캐시과학', 'grade': '중1', 'unit': '힘'})
+    app_module.answer_recorder.flush()
+
+    with app_module.app.app_context():
+        assert stats_rollup.data_version(db.session) == version + 1
+        updated = cache.load(db.session, subject='캐시과학')
+        assert updated.total_answers == first.total_answers + 1
+        assert cache.snapshot()['hit_ratio'] == round(1 / 3, 3)
+
+
+def test_cached_result_round_trip(app_module):
+    with app_module.app.app_context():
+        store = InProcessSessionStore(ttl=60)
+        cache = StatsCache(store)
+        result = cache.load(db.session)
+        key = StatsCache.make_key(stats_rollup.data_version(db.session))
+        assert store.get(key) == result.to_dict()
+        assert cache.load(db.session) == result
+
+
+def test_admin_stats_cache_status(admin, student):
+    assert student.get('/api/admin/stats-cache').status_code == 403
+    admin.get('/admin')
+    admin.get('/admin')
+    data = admin.get('/api/admin/stats-cache').get_json()
+    assert data['hits'] >= 1 and data['data_version'] > 0
@@ -0,0 +1,75 @@
+from sqlalchemy.dialects import postgresql
+
+from models import db, User
+from stats_engine import StatsResult, compute_stats, grouping_sets_query, iter_student_stats, student_summary
+
+
+def seed(app_module):
+    recorder = app_module.answer_recorder
+    ids = []
+    with app_module.app.app_context():
+        for username in ('engine-a', 'engine-b'):
+            user = User.query.filter_by(username=username).first()
+            if user is None:
+                user = User(username=username)
+                user.set_password('pw')
+                db.session.add(user)
+                db.session.commit()
+            ids.append(user.id)
+    answers = [
+        (ids[0], '엔진과학', '중1', '물질', True),
+        (ids[0], '엔진과학', '중1', '물질', False),
+        (ids[0], '엔진과학', '중2', '전기', True),
+        (ids[1], '엔진과학', '중1', '물질', True),
+        (ids[1], '엔진사회', '중1', '지리', False),
+    ]
+    for user_id, subject, grade, unit, is_correct in answers:
+        recorder.record(user_id, {'question': '문제'}, '①', is_correct,
+                        {'subject': subject, 'grade': grade, 'unit': unit})
+    recorder.flush()
+    return ids
+
+
+def test_single_pass_groupings(app_module):
+    first, second = seed(app_module)
+    with app_module.app.app_context():
+        stats = compute_stats(db.session, subject='엔진과학')
+        assert (stats.total_answers, stats.total_correct) == (4, 3)
+        assert stats.accuracy_rate == 75
+        units = {(u.grade, u.unit): (u.attempts, u.correct, u.unique_students) for u in stats.by_unit}
+        assert units == {('중1', '물질'): (3, 2, 2), ('중2', '전기'): (1, 1, 1)}
+        assert [(g.grade, g.total_questions, g.incorrect_answers) for g in sorted(stats.by_grade, key=lambda g: g.grade)] \
+            == [('중1', 3, 1), ('중2', 1, 0)]
+        assert {user.username: (total, correct)
+                for user, total, correct in iter_student_stats(db.session, subject='엔진과학')} \
+            == {'engine-a': (3, 2), 'engine-b': (1, 1)}
+        assert student_summary(db.session, subject='엔진과학') == {'students': 2, 'total': 4, 'correct': 3}
+        assert student_summary(db.session, second, '엔진과학') == {'students': 1, 'total': 1, 'correct': 1}
+        assert {'엔진과학', '엔진사회'} <= set(stats.subjects)
+
+        # 학생 필터는 진도율 계산에서 제외
+        filtered = compute_stats(db.session, student_id=second, subject='엔진과학')
+        assert filtered.total_answers == 1
+        assert filtered.progress[first] == 3 and filtered.progress[second] == 1
+
+
+def test_grouping_sets_statement_for_postgresql():
+    sql = str(grouping_sets_query(1, '과학', '중1').compile(dialect=postgresql.dialect()))
+    assert 'GROUPING SETS' in sql.upper()
+    assert 'grouping(answer_counts.user_id)' in sql and 'JOIN category' in sql
+
+
+def test_subject_and_grade_reports_use_filters(app_module, admin):
+    seed(app_module)
+    report = admin.get('/admin/stats/subject-report?grade=중2')
+    assert report.status_code == 200
+    assert '엔진과학' in report.get_data(as_text=True)
+    report = admin.get('/admin/stats/grade-report?subject=엔진사회')
+    assert report.status_code == 200
+
+
+def test_cached_result_no_longer_holds_student_rows():
+    data = StatsResult(total_answers=3).to_dict()
+    assert 'by_student' not in data
+    # 이전 버전이 저장한 캐시 항목도 읽을 수 있음
+    assert StatsResult.from_dict(dict(data, by_student=[[{'id': 1, 'username': 'a'}, 3, 2]])).total_answers == 3
@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import category_store
+import stats_rollup
+from models import db, Answer, AnswerRollup, Category, User
+
+
+def make_user(app_module, username):
+    with app_module.app.app_context():
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            user = User(username=username)
+            user.set_password('pw')
+            db.session.add(user)
+            db.session.commit()
+        return user.id
+
+
+def answer_row(user_id, subject='과학', grade='중1', unit='물질', is_correct=True):
+    return {'user_id': user_id, 'subject': subject, 'grade': grade, 'unit': unit,
+            'question': '문제', 'user_answer': '①', 'is_correct': is_correct, 'timestamp': datetime.utcnow()}
+
+
+def answer_category(answer):
+    """답변의 (과목, 학년, 단원)"""
+    category = db.session.get(Category, answer.category_id)
+    return category.subject, category.grade, category.unit
+
+
+def rollup_rows(user_id):
+    return sorted(
+        (category.subject, category.grade, category.unit, row.attempts, row.correct)
+        for row, category in db.session.query(AnswerRollup, Category)
+        .join(Category, Category.id == AnswerRollup.category_id).filter(AnswerRollup.user_id == user_id)
+    )
+
+
+def test_rollups_follow_inserts_and_deletes(app_module):
+    user_id = make_user(app_module, 'rollup-student')
+    recorder = app_module.answer_recorder
+    for row in [answer_row(user_id), answer_row(user_id, is_correct=False),
+                answer_row(user_id, unit=None), answer_row(user_id, subject='사회', unit='지리')]:
+        recorder.record(row['user_id'], {'question': '문제'}, '①', row['is_correct'], row)
+    recorder.flush()
+
+    with app_module.app.app_context():
+        assert rollup_rows(user_id) == [('과학', '중1', '', 1, 1), ('과학', '중1', '물질', 2, 1), ('사회', '중1', '지리', 1, 1)]
+
+        social = [Answer.user_id == user_id, *category_store.answer_criteria('사회')]
+        stats_rollup.remove_answers(db.session, *social)
+        Answer.query.filter(*social).delete(synchronize_session=False)
+        db.session.commit()
+        assert rollup_rows(user_id) == [('과학', '중1', '', 1, 1), ('과학', '중1', '물질', 2, 1)]
+
+        incremental = rollup_rows(user_id)
+        stats_rollup.rebuild(db.session)
+        db.session.commit()
+        assert rollup_rows(user_id) == incremental
+
+
+def test_update_or_insert_fallback(app_module):
+    user_id = make_user(app_module, 'rollup-fallback')
+    with app_module.app.app_context():
+        key = category_store.category_key('과학')
+        category_id = category_store.intern(db.session, [key])[key]
+        for _ in range(2):
+            stats_rollup._update_or_insert(db.session, AnswerRollup, stats_rollup.KEY_COLUMNS,
+                                           stats_rollup.rollup_key(user_id, category_id), 2, 1)
+        db.session.commit()
+        assert rollup_rows(user_id) == [('과학', '', '', 4, 2)]
+        AnswerRollup.query.filter_by(user_id=user_id).delete()
+        db.session.commit()
+
+
+def test_dashboard_and_reports_read_rollups(app_module, admin):
+    user_id = make_user(app_module, 'rollup-dashboard')
+    app_module.answer_recorder.record(user_id, {'question': '문제'}, '①', True,
+                                      {'subject': '과학', 'grade': '중2', 'unit': '빛과 파동'})
+    app_module.answer_recorder.flush()
+
+    page = admin.get(f'/admin?student_id={user_id}').get_data(as_text=True)
+    assert '빛과 파동' in page
+    report = admin.get('/api/admin/statistics/download?subject=과학')
+    assert report.status_code == 200 and 'rollup-dashboard' in report.get_data(as_text=True)
+
+    response = admin.post(f'/admin/stats/delete/{user_id}')
+    assert response.get_json()['success'] is True
+    with app_module.app.app_context():
+        assert rollup_rows(user_id) == []
+
+
+def test_rebuild_command(app_module):
+    runner = app_module.app.test_cli_runner()
+    result = runner.invoke(args=['rebuild-rollups'])
+    assert '답변 집계 테이블을 다시 만들었습니다' in result.output
@@ -0,0 +1,87 @@
+import pytest
+
+from models import db, User
+from student_pages import student_page, decode_cursor
+
+SUBJECT = '페이지과학'
+
+
+def seed(app_module):
+    # page-0: 4문제 중 1개, page-1: 2문제 중 2개, page-2: 2문제 중 1개, page-3: 답변 없음
+    results = {'page-0': [True, False, False, False], 'page-1': [True, True], 'page-2': [True, False], 'page-3': []}
+    ids = {}
+    with app_module.app.app_context():
+        for username in results:
+            user = User.query.filter_by(username=username).first()
+            if user is None:
+                user = User(username=username)
+                user.set_password('pw')
+                db.session.add(user)
+                db.session.commit()
+            ids[username] = user.id
+    with app_module.app.app_context():
+        # 세션 범위 DB를 공유하므로 처음 한 번만 답변 추가
+        seeded = bool(student_page(db.session, subject=SUBJECT, active_only=True).rows)
+    if not seeded:
+        for username, answers in results.items():
+            for is_correct in answers:
+                app_module.answer_recorder.record(ids[username], {'question': '문제'}, '①', is_correct,
+                                                  {'subject': SUBJECT, 'grade': '중1', 'unit': '물질'})
+        app_module.answer_recorder.flush()
+    return ids
+
+
+def walk(session, **kwargs):
+    """한 행씩 페이지를 넘기며 전체 목록을 모음"""
+    names, cursor = [], None
+    while True:
+        page = student_page(session, cursor=cursor, limit=1, subject=SUBJECT, **kwargs)
+        names += [row.username for row in page.rows if row.username.startswith('page-')]
+        if not page.next_cursor:
+            return names
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize('sort, order, expected', [
+    ('name', 'asc', ['page-0', 'page-1', 'page-2']),
+    ('name', 'desc', ['page-2', 'page-1', 'page-0']),
+    ('answers', 'desc', ['page-0', 'page-2', 'page-1']),
+    ('accuracy', 'desc', ['page-1', 'page-2', 'page-0']),
+    ('accuracy', 'asc', ['page-0', 'page-2', 'page-1']),
+])
+def test_keyset_pages_follow_sort_order(app_module, sort, order, expected):
+    seed(app_module)
+    with app_module.app.app_context():
+        assert walk(db.session, sort=sort, order=order, active_only=True) == expected
+
+
+def test_inactive_students_are_listed_unless_active_only(app_module):
+    seed(app_module)
+    with app_module.app.app_context():
+        names = walk(db.session, sort='answers', order='asc')
+    assert names[0] == 'page-3' and 'admin' not in names
+
+
+def test_students_endpoint_returns_next_cursor(app_module, admin, student):
+    seed(app_module)
+    response = admin.get(f'/api/admin/students?subject={SUBJECT}&active=1&sort=accuracy&order=desc&limit=2')
+    data = response.get_json()
+    assert [row['username'] for row in data['students']] == ['page-1', 'page-2']
+    assert data['students'][0]['accuracy_rate'] == 100.0
+    assert decode_cursor(data['next_cursor'])[1] == data['students'][1]['id']
+
+    data = admin.get(f'/api/admin/students?subject={SUBJECT}&active=1&sort=accuracy&order=desc&limit=2'
+                     f'&cursor={data["next_cursor"]}').get_json()
+    assert [row['username'] for row in data['students']] == ['page-0'] and data['next_cursor'] is None
+
+    assert admin.get('/api/admin/students?cursor=garbage').status_code == 400
+    assert student.get('/api/admin/students').status_code == 403
+
+
+def test_admin_pages_render_first_page(app_module, admin):
+    seed(app_module)
+    html = admin.get(f'/admin?subject={SUBJECT}&sort=answers&order=desc').get_data(as_text=True)
+    html = html[html.index('studentStatsBody'):]
+    assert html.index('page-0') < html.index('page-2') < html.index('page-1')
+    html = admin.get('/admin/users?sort=name').get_data(as_text=True)
+    assert 'page-3' in html and 'loadMoreUsers' in html
@@ -0,0 +1,122 @@
+import json
+
+import pytest
+
+from sqlalchemy import insert
+
+import category_store
+import stats_rollup
+import unit_normalizer
+from models import db, Answer, NormalizeCheckpoint
+from test_stats_rollup import make_user, answer_row, answer_category, rollup_rows
+
+
+def save(app_module, rows):
+    recorder = app_module.answer_recorder
+    for row in rows:
+        recorder.record(row['user_id'], {'question': '문제'}, '①', row['is_correct'], row)
+    recorder.flush()
+
+
+def categories(user_id):
+    return sorted(answer_category(answer) for answer in Answer.query.filter_by(user_id=user_id))
+
+
+def write_rules(tmp_path, rules):
+    path = tmp_path / 'mappings.json'
+    path.write_text(json.dumps({'rules': rules}, ensure_ascii=False), encoding='utf-8')
+    return unit_normalizer.load_rules(str(path))
+
+
+def test_default_mapping_file_loads():
+    rules = unit_normalizer.load_rules()
+    assert {rule.column for rule in rules} == {'subject', 'grade', 'unit'}
+
+
+def test_invalid_rule_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        write_rules(tmp_path, [{'column': 'question', 'from': ['a'], 'to': 'b'}])
+
+
+def test_dry_run_then_chunked_rewrite_keeps_rollups(app_module, tmp_path):
+    user_id = make_user(app_module, 'normalize-student')
+    save(app_module, [answer_row(user_id, subject='정규', grade='중 이', unit='전기'),
+                      answer_row(user_id, subject='정규', grade='중이학년', unit='전기', is_correct=False),
+                      answer_row(user_id, subject='정규', grade='중2', unit='전기')])
+    rules = write_rules(tmp_path, [{'name': '중2', 'column': 'grade', 'from': ['중 이', '중이학년'], 'to': '중2'}])
+
+    with app_module.app.app_context():
+        assert unit_normalizer.dry_run(db.session, rules)[0]['count'] == 2
+        assert [grade for _, grade, _ in categories(user_id)] == ['중 이', '중2', '중이학년']
+
+        results = unit_normalizer.run(db.session, rules, chunk_size=1)
+        assert results[0]['count'] == 2
+        assert categories(user_id) == [('정규', '중2', '전기')] * 3
+        assert rollup_rows(user_id) == [('정규', '중2', '전기', 3, 2)]
+        assert unit_normalizer.dry_run(db.session, rules)[0]['count'] == 0
+        assert NormalizeCheckpoint.query.count() == 0
+
+
+def test_interrupted_run_resumes_from_checkpoint(app_module, tmp_path, monkeypatch):
+    user_id = make_user(app_module, 'normalize-resume')
+    save(app_module, [answer_row(user_id, subject='재개', unit=f'단원{i}') for i in range(3)])
+    rules = write_rules(tmp_path, [{'column': 'unit', 'match': 'like', 'from': ['단원%'], 'to': '표준 단원'}])
+
+    rewrite = unit_normalizer._rewrite_chunk
+    calls = []
+
+    def fail_on_second_chunk(session, rule, ids):
+        calls.append(ids)
+        if len(calls) == 2:
+            raise RuntimeError('중단')
+        rewrite(session, rule, ids)
+
+    with app_module.app.app_context():
+        monkeypatch.setattr(unit_normalizer, '_rewrite_chunk', fail_on_second_chunk)
+        with pytest.raises(RuntimeError):
+            unit_normalizer.run(db.session, rules, chunk_size=1)
+        db.session.rollback()
+        checkpoint = db.session.get(NormalizeCheckpoint, rules[0].key)
+        assert checkpoint.last_id == calls[0][-1] and checkpoint.updated_count == 1
+
+        monkeypatch.setattr(unit_normalizer, '_rewrite_chunk', rewrite)
+        assert unit_normalizer.run(db.session, rules, chunk_size=1)[0]['count'] == 3
+        assert categories(user_id) == [('재개', '중1', '표준 단원')] * 3
+
+
+def test_new_answers_are_standardized_when_saved(app_module):
+    user_id = make_user(app_module, 'normalize-write')
+    save(app_module, [answer_row(user_id, subject='한국사.', unit='조선'), answer_row(user_id, subject='한국사', unit='조선')])
+    with app_module.app.app_context():
+        assert categories(user_id) == [('한국사', '중1', '조선')] * 2
+
+
+def test_canonical_key_matches_sql_condition():
+    rules = unit_normalizer.load_rules()
+    assert unit_normalizer.canonical_key(('과학.', '중3', '화학 반응의 규칙과 에너지의 변화'), rules) == \
+        ('과학', '중3', '화학 반응의 규칙과 에너지 변화')
+    assert unit_normalizer.canonical_key(('과학', '중3', '물질'), rules) == ('과학', '중3', '물질')
+
+
+def test_standardize_route_supports_dry_run(app_module, admin):
+    user_id = make_user(app_module, 'normalize-route')
+    # 규칙을 추가하기 전에 저장된 분류 (저장 시 표준화되지 않은 분류)
+    with app_module.app.app_context():
+        key = ('한국사.', '중1', '조선')
+        rows = [dict(answer_row(user_id), subject=None, grade=None, unit=None,
+                     category_id=category_store.intern(db.session, [key])[key])]
+        db.session.execute(insert(Answer), rows)
+        stats_rollup.add_answers(db.session, rows)
+        db.session.commit()
+
+    data = admin.post('/admin/stats/standardize-units', json={'dry_run': True}).get_json()
+    assert data['dry_run'] is True and data['standardized_count'] >= 1
+    with app_module.app.app_context():
+        assert categories(user_id) == [('한국사.', '중1', '조선')]
+
+    data = admin.post('/admin/stats/standardize-units', json={}).get_json()
+    assert data['success'] is True
+    assert {rule['name']: rule['count'] for rule in data['rules']}['한국사 과목명'] >= 1
+    with app_module.app.app_context():
+        assert categories(user_id) == [('한국사', '중1', '조선')]
+        assert rollup_rows(user_id) == [('한국사', '중1', '조선', 1, 1)]
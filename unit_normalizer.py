@@ -0,0 +1,165 @@
+"""답변 분류(과목/학년/단원) 표준화
+
+매핑 파일(unit_mappings.json)의 규칙마다 분류(Category)가 규칙에 맞는 답변 ID를 NORMALIZE_CHUNK_SIZE개씩 골라
+표준 분류의 category_id로 바꾸고 청크마다 커밋하므로 큰 테이블에서도 메모리와 쓰기 잠금 시간이 일정합니다.
+청크마다 규칙별 진행 위치(NormalizeCheckpoint)를 함께 저장해 중단되면 이어서 처리합니다.
+새 답변은 저장할 때 category_store가 같은 규칙을 적용하므로 이 작업은 규칙을 추가했을 때만 필요합니다.
+
+    flask --app app standardize-units --dry-run   # 규칙별 대상 건수만 확인
+    flask --app app standardize-units
+"""
+import os
+import re
+import json
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import select, update, delete, func, or_, case
+from models import Answer, Category, ItemStat, NormalizeCheckpoint
+import stats_rollup
+import category_store
+
+logger = logging.getLogger(__name__)
+
+UNIT_MAPPINGS_PATH = os.environ.get('UNIT_MAPPINGS_PATH', 'unit_mappings.json')
+# 한 번에 UPDATE하고 커밋할 답변 수
+NORMALIZE_CHUNK_SIZE = int(os.environ.get('NORMALIZE_CHUNK_SIZE', 1000))
+
+COLUMNS = ('subject', 'grade', 'unit')
+MATCH_TYPES = ('exact', 'like')
+
+
+@dataclass
+class MappingRule:
+    """column 값이 from 중 하나(exact) 또는 패턴 중 하나(like)와 맞으면 to로 변경"""
+    name: str
+    column: str
+    match: str
+    values: list
+    target: str
+
+    @property
+    def key(self):
+        """규칙 내용 해시 (진행 위치 저장용)"""
+        raw = json.dumps([self.column, self.match, sorted(self.values), self.target], ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def condition(self, model=Category):
+        column = getattr(model, self.column)
+        if self.match == 'like':
+            matched = or_(*(column.like(pattern) for pattern in self.values))
+        else:
+            matched = column.in_(self.values)
+        return matched & (column != self.target)
+
+    def matches(self, value):
+        """값이 규칙에 맞는지 (condition과 같은 기준을 파이썬에서 확인, 답변 저장 시 표준화용)"""
+        if value == self.target:
+            return False
+        if self.match == 'like':
+            return any(_like_pattern(pattern).fullmatch(value) for pattern in self.values)
+        return value in self.values
+
+
+def _like_pattern(pattern):
+    """SQL LIKE 패턴(%, _)을 정규식으로 변환"""
+    return re.compile(''.join('.*' if char == '%' else '.' if char == '_' else re.escape(char) for char in pattern),
+                      re.DOTALL)
+
+
+def canonical_key(key, rules):
+    """(과목, 학년, 단원)에 규칙을 차례로 적용한 표준 분류"""
+    values = dict(zip(COLUMNS, key))
+    for rule in rules:
+        if rule.matches(values[rule.column]):
+            values[rule.column] = rule.target
+    return tuple(values[column] for column in COLUMNS)
+
+
+def load_rules(path=UNIT_MAPPINGS_PATH):
+    """매핑 파일의 규칙 목록 (형식이 틀리면 ValueError)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    rules = []
+    for index, item in enumerate(data.get('rules', []), start=1):
+        column = item.get('column')
+        match = item.get('match', 'exact')
+        values = item.get('from') or []
+        target = item.get('to')
+        if column not in COLUMNS or match not in MATCH_TYPES or not values or not target:
+            raise ValueError(f"잘못된 표준화 규칙 #{index}: {item}")
+        rules.append(MappingRule(item.get('name') or f"{column} → {target}", column, match, list(values), target))
+    return rules
+
+
+def dry_run(session, rules):
+    """규칙별로 바뀔 답변 수 (변경하지 않음)"""
+    return [dict(name=rule.name, column=rule.column, target=rule.target,
+                 count=session.scalar(select(func.count(Answer.id)).join(Category, Category.id == Answer.category_id)
+                                      .where(rule.condition())))
+            for rule in rules]
+
+
+def run(session, rules, chunk_size=NORMALIZE_CHUNK_SIZE):
+    """규칙을 차례로 적용하고 규칙별 변경 수를 반환 (청크마다 커밋, 중단되면 다음 실행에서 이어서 처리)"""
+    results = []
+    for rule in rules:
+        checkpoint = session.get(NormalizeCheckpoint, rule.key)
+        if checkpoint is None:
+            checkpoint = NormalizeCheckpoint(rule_key=rule.key, last_id=0, updated_count=0)
+            session.add(checkpoint)
+        elif checkpoint.last_id:
+            logger.info(f"표준화 재개: {rule.name} (답변 ID {checkpoint.last_id} 이후)")
+
+        while True:
+            ids = session.scalars(
+                select(Answer.id).where(Answer.category_id.in_(select(Category.id).where(rule.condition())),
+                                        Answer.id > checkpoint.last_id)
+                .order_by(Answer.id).limit(chunk_size)
+            ).all()
+            if not ids:
+                break
+            _rewrite_chunk(session, rule, ids)
+            checkpoint.last_id = ids[-1]
+            checkpoint.updated_count += len(ids)
+            checkpoint.updated_at = datetime.utcnow()
+            session.commit()
+
+        results.append(dict(name=rule.name, column=rule.column, target=rule.target,
+                            count=checkpoint.updated_count))
+        # 문항 통계의 분류도 같은 규칙으로 변경 (문항 수만큼이라 한 번에 처리)
+        mapping = _target_categories(session, rule, select(ItemStat.category_id).distinct())
+        if mapping:
+            session.execute(update(ItemStat).where(ItemStat.category_id.in_(mapping)).values(
+                category_id=case(mapping, value=ItemStat.category_id)))
+        # 규칙을 끝까지 적용했으면 진행 위치 삭제 (다음 실행은 새 데이터만 처음부터 확인)
+        session.execute(delete(NormalizeCheckpoint).where(NormalizeCheckpoint.rule_key == rule.key))
+        session.commit()
+    return results
+
+
+def _target_categories(session, rule, category_ids):
+    """category_ids 중 규칙에 맞는 분류의 {기존 category_id: 표준 분류 category_id} (표준 분류가 없으면 추가)"""
+    rows = session.execute(
+        select(Category.id, Category.subject, Category.grade, Category.unit)
+        .where(Category.id.in_(category_ids), rule.condition())
+    ).all()
+    targets = {}
+    for category_id, *key in rows:
+        values = dict(zip(COLUMNS, key), **{rule.column: rule.target})
+        targets[category_id] = tuple(values[column] for column in COLUMNS)
+    ids = category_store.intern(session, targets.values())
+    return {category_id: ids[key] for category_id, key in targets.items()}
+
+
+def _rewrite_chunk(session, rule, ids):
+    """청크 하나를 집계 테이블과 같은 트랜잭션에서 변경 (기존 분류는 남겨 두고 답변만 표준 분류로 옮김)"""
+    in_chunk = Answer.id.in_(ids)
+    mapping = _target_categories(session, rule, select(Answer.category_id).where(in_chunk).distinct())
+    stats_rollup.remove_answers(session, in_chunk)
+    session.execute(
+        update(Answer).where(in_chunk).values(category_id=case(mapping, value=Answer.category_id))
+        .execution_options(synchronize_session=False)
+    )
+    stats_rollup.include_answers(session, in_chunk)